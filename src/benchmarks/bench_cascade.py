@@ -0,0 +1,89 @@
+"""
+基准测试 - 小模型→主模型级联
+对示例文档中的表格先只用主模型匹配，再加载小模型以级联方式匹配（均不使用响应缓存），
+统计两种方式的总耗时、级联中各阶段小模型的命中率（校验通过的比例）、两级模型的耗时和估算节省的时间，
+并比较级联结果与只用主模型结果的 (valueId, new_key) 一致率
+
+用法:
+    python src/benchmarks/bench_cascade.py
+    python src/benchmarks/bench_cascade.py --small-model Qwen3-0.6B-Q8_0.gguf --tables 5,6,7 --mode combined
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.extractor import extract_docx_document
+from matchers import table_matcher
+from matchers.model_cascade import get_cascade_stats
+from models.model_manager import llm_manager
+
+
+def matched_pairs(results):
+    """匹配结果中有new_key的(valueId, new_key)集合"""
+    return {(item.get("valueId", ""), item["new_key"]) for item in results if item.get("new_key")}
+
+
+def run_tables(table_paths, key_description_path, table_format, match_mode, use_rules):
+    """匹配所有表格，返回({表格路径: 结果}, 总耗时)"""
+    results = {}
+    start = time.perf_counter()
+    for table_path in table_paths:
+        results[table_path] = table_matcher.match_table(table_path, key_description_path, table_format,
+                                                        use_rules=use_rules, match_mode=match_mode)
+    return results, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="小模型→主模型级联的命中率、耗时和一致率")
+    parser.add_argument("--model", default="gemma-3-4b-it-Q4_K_M.gguf", help="主模型文件名")
+    parser.add_argument("--small-model", default="Qwen3-0.6B-Q8_0.gguf", help="级联的小模型文件名")
+    parser.add_argument("--tables", default="", help="只测试指定编号的表格，如 5,6,7")
+    parser.add_argument("--format", default=table_matcher.DEFAULT_FORMAT, help="表格序列化格式")
+    parser.add_argument("--mode", choices=table_matcher.MATCH_MODES, default=table_matcher.MATCH_MODE_TWO_STAGE)
+    parser.add_argument("--rules", action="store_true", help="第一阶段先使用规则提取")
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+    key_description_path = os.path.join(project_dir, "document", "key_descriptions", "table_key_description.txt")
+
+    extract_dir = tempfile.mkdtemp(prefix="bench_cascade_")
+    _, table_count = extract_docx_document(docx_path, extract_dir)
+    numbers = [int(n) for n in args.tables.split(",") if n.strip()] or list(range(1, table_count + 1))
+    table_paths = [os.path.join(extract_dir, f"table_{n}.html") for n in numbers]
+
+    if not llm_manager.init_local_model(args.model):
+        sys.exit(1)
+    baseline, baseline_time = run_tables(table_paths, key_description_path, args.format, args.mode, args.rules)
+
+    if not llm_manager.init_small_model(args.small_model):
+        sys.exit(1)
+    cascaded, cascade_time = run_tables(table_paths, key_description_path, args.format, args.mode, args.rules)
+
+    expected_total = predicted_total = agreed = 0
+    for table_path in table_paths:
+        expected = matched_pairs(baseline[table_path])
+        predicted = matched_pairs(cascaded[table_path])
+        expected_total += len(expected)
+        predicted_total += len(predicted)
+        agreed += len(expected & predicted)
+
+    print(f"\n表格数: {len(table_paths)}, 方式: {args.mode}, 主模型: {args.model}, 小模型: {args.small_model}")
+    print(f"只用主模型: {baseline_time:.2f} 秒，级联: {cascade_time:.2f} 秒"
+          f"（实际节省 {baseline_time - cascade_time:.2f} 秒）")
+    print(f"与只用主模型的一致率: 召回 {agreed / expected_total if expected_total else 1.0:.1%}，"
+          f"精确 {agreed / predicted_total if predicted_total else 1.0:.1%}")
+    print(f"{'阶段':<10} {'调用':>6} {'小模型命中':>10} {'命中率':>8} {'小模型(秒)':>10} {'主模型(秒)':>10} {'估算节省(秒)':>12}")
+    for stage, stats in get_cascade_stats().items():
+        saved = f"{stats['saved_time']:.2f}" if stats["saved_time"] is not None else "N/A"
+        print(f"{stage:<10} {stats['calls']:>6} {stats['small_hits']:>10} {stats['hit_rate']:>8.1%} "
+              f"{stats['small_time']:>10.2f} {stats['large_time']:>10.2f} {saved:>12}")
@@ -0,0 +1,157 @@
+"""
+基准测试 - 表格并发匹配
+启动一个本地的OpenAI兼容桩服务（固定延迟模拟网络往返，按提示词返回合法的两阶段结果），
+远程模型指向该服务，分别以不同并发数匹配同一批表格，
+对比总耗时、单表耗时合计和加速比，并校验各并发数下的匹配结果与逐个匹配完全一致
+
+用法:
+    python src/benchmarks/bench_concurrent_matching.py
+    python src/benchmarks/bench_concurrent_matching.py --latency 0.5 --workers 1,4,8 --copies 5
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.extractor import extract_docx_document
+from matchers import table_matcher
+from models.model_manager import llm_manager
+
+
+def stub_reply(prompt):
+    """按提示词内容生成桩回复：第一阶段取前3个单元格ID，第二阶段原样映射key"""
+    if 'old_key' in prompt:
+        array_text = prompt[prompt.rfind('key-value数组：'):]
+        start = array_text.find('[')
+        end = array_text.rfind(']')
+        pairs = json.loads(array_text[start:end + 1]) if start != -1 and end != -1 else []
+        return json.dumps([{"old_key": item["key"], "value": item["value"], "new_key": item["key"]}
+                           for item in pairs], ensure_ascii=False)
+    cell_ids = re.findall(r'id="([A-Z]+\d+)"', prompt)[:3]
+    return json.dumps([{"key": f"key_{cell_id}", "valueId": cell_id} for cell_id in cell_ids])
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI兼容的/chat/completions桩接口"""
+    latency = 0.2
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        time.sleep(self.latency)
+        content = stub_reply(body["messages"][-1]["content"])
+        if body.get("stream"):
+            self._send_stream(body, content)
+            return
+        payload = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": body.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_stream(self, body, content):
+        """以SSE分块返回（每个分块8个字符），模拟流式输出"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        for start in range(0, len(content), 8):
+            chunk = json.dumps({
+                "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": body.get("model"),
+                "choices": [{"index": 0, "finish_reason": None, "delta": {"content": content[start:start + 8]}}],
+            })
+            self.wfile.write(f"data: {chunk}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(latency):
+    """在后台线程启动桩服务，返回(server, base_url)"""
+    StubHandler.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def load_results(match_results_dir):
+    results = {}
+    for name in sorted(os.listdir(match_results_dir)):
+        if name.endswith('_matches.json'):
+            with open(os.path.join(match_results_dir, name), 'r', encoding='utf-8') as f:
+                results[name] = json.load(f)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="表格并发匹配加速比测试（本地OpenAI兼容桩服务）")
+    parser.add_argument("--latency", type=float, default=0.2, help="桩服务每次请求的延迟（秒）")
+    parser.add_argument("--workers", default="1,2,4,8", help="要测试的并发数列表")
+    parser.add_argument("--copies", type=int, default=3, help="示例文档表格的复制份数，用于增加表格数量")
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_concurrent_")
+    extract_dir = os.path.join(work_dir, "extract")
+    extract_docx_document(docx_path, extract_dir)
+    base_tables = sorted(name for name in os.listdir(extract_dir) if name.endswith('.html'))
+
+    # 复制表格以模拟较大的报告
+    table_paths = []
+    for copy in range(args.copies):
+        for name in base_tables:
+            target = os.path.join(extract_dir, name) if copy == 0 else \
+                os.path.join(extract_dir, name.replace('.html', f'_{copy}.html'))
+            if copy:
+                shutil.copy(os.path.join(extract_dir, name), target)
+            table_paths.append(target)
+
+    key_description_path = os.path.join(work_dir, "table_key_description.txt")
+    with open(key_description_path, 'w', encoding='utf-8') as f:
+        f.write("桩服务测试用key描述")
+
+    server, base_url = start_stub_server(args.latency)
+    llm_manager.init_remote_model(api_key="stub", base_url=base_url, model="stub")
+
+    report = []
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        match_results_dir = os.path.join(work_dir, f"match_{workers}")
+        stats = table_matcher.match_tables(table_paths, key_description_path, match_results_dir,
+                                           max_workers=workers)
+        results = load_results(match_results_dir)
+        if baseline is None:
+            baseline = results
+        report.append((workers, stats, results == baseline))
+
+    server.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n表格数: {len(table_paths)}，桩服务延迟: {args.latency:.2f} 秒/请求")
+    print(f"{'并发数':>6} {'总耗时(s)':>10} {'单表耗时合计(s)':>16} {'加速比':>8} {'结果一致':>8}")
+    for workers, stats, same in report:
+        print(f"{workers:>6} {stats['wall_time']:>10.2f} {stats['summed_latency']:>16.2f} "
+              f"{stats['speedup']:>8.2f} {'是' if same else '否':>8}")
@@ -0,0 +1,83 @@
+"""
+基准测试 - docx原生读取 vs Word转换HTML再解析
+对比 docx_reader.read_docx 与 converter.word_to_html + table_extractor 的耗时，
+并校验两条路径输出的表格是否一致
+"""
+
+import os
+import sys
+import time
+import tempfile
+import importlib.util
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors import docx_reader
+
+
+def bench_native(docx_path, repeat):
+    """docx原生读取耗时（秒/次）"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        _, tables = docx_reader.read_docx(docx_path)
+    return (time.perf_counter() - start) / repeat, [table.to_html() for table in tables]
+
+
+def bench_convert(docx_path, html_path):
+    """Word转换HTML耗时（秒），未设置转换后端且win32com不可用时返回None"""
+    from converter.converter import word_to_html, get_conversion_backend
+
+    # win32com在转换时才导入，需要事先检查
+    if get_conversion_backend() is None and importlib.util.find_spec("win32com") is None:
+        return None
+    start = time.perf_counter()
+    word_to_html(docx_path, html_path)
+    return time.perf_counter() - start
+
+
+def bench_html_parse(html_path, repeat):
+    """解析Word导出HTML并清理表格的耗时（秒/次）"""
+    from bs4 import BeautifulSoup
+    from extractors.table_extractor import create_clean_table
+
+    with open(html_path, 'r', encoding='utf-8', errors='ignore') as f:
+        html_content = f.read()
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        soup = BeautifulSoup(html_content, 'html.parser')
+        tables = [create_clean_table(table) for table in soup.find_all('table')]
+    elapsed = (time.perf_counter() - start) / repeat
+    return elapsed, [str(table) for table in tables if table]
+
+
+if __name__ == "__main__":
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+    html_path = os.path.join(project_dir, "document", "document.html")
+    repeat = 20
+
+    native_time, native_tables = bench_native(docx_path, repeat)
+    print(f"docx原生读取: {native_time * 1000:.2f} ms/次, 表格 {len(native_tables)} 个")
+
+    convert_html_path = os.path.join(tempfile.gettempdir(), "bench_document.html")
+    convert_time = bench_convert(docx_path, convert_html_path)
+    if convert_time is not None:
+        print(f"Word转换HTML: {convert_time * 1000:.2f} ms")
+        html_path = convert_html_path
+    else:
+        print("Word转换HTML: 跳过（win32com不可用且未设置转换后端）")
+
+    if os.path.exists(html_path):
+        parse_time, html_tables = bench_html_parse(html_path, repeat)
+        total = parse_time + (convert_time or 0)
+        print(f"HTML解析提取: {parse_time * 1000:.2f} ms/次, 表格 {len(html_tables)} 个")
+        print(f"转换+解析合计: {total * 1000:.2f} ms, 加速比: {total / native_time:.1f}x")
+        same = sum(1 for a, b in zip(native_tables, html_tables) if a == b)
+        print(f"输出一致的表格: {same}/{max(len(native_tables), len(html_tables))}")
+    else:
+        print(f"HTML解析提取: 跳过（{html_path} 不存在）")
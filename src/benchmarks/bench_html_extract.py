@@ -0,0 +1,130 @@
+"""
+基准测试 - HTML提取：原有多次解析 vs 单次快速解析
+原有方式：paragraph_extractor与table_extractor各自用html.parser解析整份HTML，
+create_clean_table再为每个表格创建一个soup；
+新方式：html_reader.read_html只解析一次，同时输出段落和表格。
+统计解析耗时和峰值内存，并校验输出一致。
+峰值内存在独立子进程中以ru_maxrss统计，以包含lxml在C层分配的内存
+"""
+
+import os
+import sys
+import time
+import json
+import resource
+import tempfile
+import subprocess
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors import docx_reader, html_reader
+
+
+def build_word_like_html(docx_path, copies):
+    """用示例文档中的表格构造带Word样式标记的大型HTML"""
+    paragraphs, tables = docx_reader.read_docx(docx_path)
+    from bs4 import BeautifulSoup
+
+    body = []
+    for i in range(copies):
+        for text in paragraphs:
+            body.append(f"<p class=MsoNormal style='margin-bottom:0cm;line-height:normal'>"
+                        f"<span lang=EN-US style='font-size:10.0pt;font-family:\"Arial\",sans-serif'>{text}</span></p>")
+        for table_model in tables:
+            table = BeautifulSoup(table_model.to_html(), 'html.parser').table
+            rows = []
+            for row in table.find_all('tr'):
+                cells = []
+                for cell in row.find_all('td'):
+                    attrs = ''.join(f" {k}={v}" for k, v in cell.attrs.items())
+                    cells.append(f"<td width=120 valign=top style='width:90.0pt;border:solid windowtext 1.0pt;"
+                                 f"padding:0cm 5.4pt 0cm 5.4pt'{attrs}><p class=MsoNormal>"
+                                 f"<span lang=EN-US style='font-size:9.0pt'>{cell.get_text()}</span></p></td>")
+                rows.append(f"<tr style='height:14.2pt'>{''.join(cells)}</tr>")
+            body.append(f"<table class=MsoTableGrid border=1 cellspacing=0 cellpadding=0 "
+                        f"style='border-collapse:collapse;border:none'>{''.join(rows)}</table>")
+            body.append("<p class=MsoNormal>&nbsp;</p>")
+
+    return ("<html><head><meta http-equiv=Content-Type content='text/html; charset=utf-8'>"
+            "<style>p.MsoNormal{margin:0cm;font-size:10.5pt;}</style></head>"
+            f"<body lang=ZH-CN><div class=WordSection1>{''.join(body)}</div></body></html>")
+
+
+def legacy_extract(html_path):
+    """原有提取方式：两次完整解析 + 每个表格单独创建soup"""
+    from bs4 import BeautifulSoup
+    from extractors.table_extractor import create_clean_table
+
+    html_content = html_reader.read_html_text(html_path)
+    soup = BeautifulSoup(html_content, 'html.parser')
+    paragraphs = [p.get_text().strip() for p in soup.find_all(['p', 'div'])]
+    paragraphs = [text for text in paragraphs if text]
+
+    soup = BeautifulSoup(html_content, 'html.parser')
+    tables = [create_clean_table(table) for table in soup.find_all('table')]
+    return paragraphs, [str(table) for table in tables if table]
+
+
+MODES = {
+    "legacy": legacy_extract,
+    "single_pass": html_reader.read_html,
+}
+
+
+def run_mode(mode, html_path):
+    """在当前进程中执行一次提取，输出JSON格式的测量结果"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    paragraphs, tables = MODES[mode](html_path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "time": elapsed,
+        "peak_kb": peak,
+        "delta_kb": peak - baseline,
+        "paragraphs": paragraphs,
+        "tables": tables,
+    }, ensure_ascii=False))
+
+
+def measure(mode, html_path):
+    """在独立子进程中执行提取，返回测量结果"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run", mode, html_path],
+        check=True, capture_output=True, text=True, encoding='utf-8'
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_mode(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+
+    if len(sys.argv) > 1:
+        html_path = sys.argv[1]
+    else:
+        copies = 50
+        html_path = os.path.join(tempfile.gettempdir(), "bench_word_export.html")
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(build_word_like_html(docx_path, copies))
+
+    size_mb = os.path.getsize(html_path) / 1024 / 1024
+    print(f"测试文件: {html_path} ({size_mb:.1f} MB), lxml可用: {html_reader.HAS_LXML}")
+
+    legacy = measure("legacy", html_path)
+    single_pass = measure("single_pass", html_path)
+
+    for name, result in (("原有方式", legacy), ("单次解析", single_pass)):
+        print(f"{name}: {result['time']:.3f} 秒, 峰值内存 {result['peak_kb'] / 1024:.1f} MB"
+              f"（提取期间增长 {result['delta_kb'] / 1024:.1f} MB）")
+    print(f"加速比: {legacy['time'] / single_pass['time']:.1f}x")
+    print(f"段落输出一致: {legacy['paragraphs'] == single_pass['paragraphs']}, "
+          f"表格输出一致: {legacy['tables'] == single_pass['tables']}")
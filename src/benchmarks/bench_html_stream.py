@@ -0,0 +1,78 @@
+"""
+基准测试 - 流式表格提取的峰值内存
+用不同份数的示例表格构造大小递增的Word风格HTML，分别在独立子进程中运行
+整体解析（html_reader.read_html）与流式解析（html_reader.iter_tables），
+对比峰值内存随文档长度的变化，并校验两者输出的表格一致
+"""
+
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+import subprocess
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors import html_reader
+from benchmarks.bench_html_extract import build_word_like_html
+
+
+def run_mode(mode, html_path):
+    """在当前进程中执行一次提取，输出JSON格式的测量结果"""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == "stream":
+        table_count = 0
+        digest = 0
+        for table_html in html_reader.iter_tables(html_path):
+            table_count += 1
+            digest = hash((digest, table_html))
+    else:
+        _, tables = html_reader.read_html(html_path)
+        table_count = len(tables)
+        digest = 0
+        for table_html in tables:
+            digest = hash((digest, table_html))
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"time": elapsed, "delta_kb": peak - baseline, "tables": table_count, "digest": digest}))
+
+
+def measure(mode, html_path):
+    """在独立子进程中执行提取，返回测量结果"""
+    env = dict(os.environ, PYTHONHASHSEED="0")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--run", mode, html_path],
+        check=True, capture_output=True, text=True, env=env
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--run":
+        run_mode(sys.argv[2], sys.argv[3])
+        sys.exit(0)
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+
+    print(f"lxml可用: {html_reader.HAS_LXML}")
+    print(f"{'大小(MB)':>10} {'表格数':>8} {'整体解析(MB)':>14} {'流式解析(MB)':>14} {'整体(秒)':>10} {'流式(秒)':>10} {'一致':>6}")
+    for copies in (25, 100, 400):
+        html_path = os.path.join(tempfile.gettempdir(), f"bench_word_export_{copies}.html")
+        with open(html_path, 'w', encoding='utf-8') as f:
+            f.write(build_word_like_html(docx_path, copies))
+        size_mb = os.path.getsize(html_path) / 1024 / 1024
+
+        full = measure("full", html_path)
+        stream = measure("stream", html_path)
+        same = full["digest"] == stream["digest"] and full["tables"] == stream["tables"]
+        print(f"{size_mb:>10.1f} {stream['tables']:>8} {full['delta_kb'] / 1024:>14.1f} "
+              f"{stream['delta_kb'] / 1024:>14.1f} {full['time']:>10.2f} {stream['time']:>10.2f} {str(same):>6}")
+        os.remove(html_path)
@@ -0,0 +1,124 @@
+"""
+基准测试 - 第二阶段候选key筛选的召回率
+用已标注的old_key -> new_key（默认取匹配结果目录中使用完整key描述文件得到的table_N_matches.json）
+计算不同top-k下的召回率：正确的new_key出现在候选集中的比例，并列出被漏掉的key。
+同时统计平均候选数和key描述部分的字符数，与完整key描述文件对比。
+示例key描述文件只有几个key，可用--distractors加入生成的干扰key模拟生产环境的大规模key描述文件
+
+用法:
+    python src/benchmarks/bench_key_shortlist.py
+    python src/benchmarks/bench_key_shortlist.py --k 5,10,20,50 --distractors 3000
+    python src/benchmarks/bench_key_shortlist.py --labels document/match_results --embeddings
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from matchers.key_catalog import load_key_catalog, render_key_description
+from matchers.key_shortlist import shortlist_keys, shortlist_recall
+from matchers.key_embedding_index import get_key_embedding_index
+from models.model_manager import llm_manager
+
+# 没有匹配结果时使用的示例文档标注
+SAMPLE_LABELS = {
+    "table_6": [{"old_key": "Sp1", "value": "29.3℃", "new_key": "key_Sp1_temperature"},
+                {"old_key": "Bx1 Max", "value": "30.8℃", "new_key": "key_Bx1_max_temperature"},
+                {"old_key": "Bx1 Avg", "value": "29.6℃", "new_key": "key_Bx1_avg_temperature"},
+                {"old_key": "Bx1 Min", "value": "28.7℃", "new_key": "key_Bx1_min_temperature"}],
+    "table_7": [{"old_key": "Relative humidity", "value": "50.0%", "new_key": "key_relative_humidity"},
+                {"old_key": "Ambient temperature", "value": "25.1℃", "new_key": ""}],
+}
+
+DISTRACTOR_POINTS = ["Sp", "Bx", "Li", "El", "Ar"]
+DISTRACTOR_QUANTITIES = [("temperature", "温度"), ("humidity", "湿度"), ("emissivity", "发射率"),
+                         ("distance", "距离"), ("voltage", "电压"), ("current", "电流")]
+DISTRACTOR_STATS = [("", ""), ("max", "最高"), ("avg", "平均"), ("min", "最低")]
+
+
+def load_labels(labels_dir):
+    """读取匹配结果目录中的table_N_matches.json: {表格名: 匹配结果列表}"""
+    labels = {}
+    for path in sorted(glob.glob(os.path.join(labels_dir, "table_*_matches.json"))):
+        with open(path, 'r', encoding='utf-8') as f:
+            labels[os.path.basename(path)] = json.load(f)
+    return labels
+
+
+def write_catalog_with_distractors(key_description_path, count, output_path):
+    """在原key描述文件后追加count个生成的干扰key"""
+    with open(key_description_path, 'r', encoding='utf-8') as f:
+        lines = [line.rstrip('\n') for line in f if line.strip()]
+    existing = {line.split('：')[0].split(':')[0] for line in lines}
+    number = 1
+    while count > 0:
+        for point in DISTRACTOR_POINTS:
+            for quantity, quantity_cn in DISTRACTOR_QUANTITIES:
+                for stat, stat_cn in DISTRACTOR_STATS:
+                    name = f"{point}{number}"
+                    key = "_".join(part for part in ("key", name, stat, quantity) if part)
+                    if count <= 0 or key in existing:
+                        continue
+                    lines.append(f"{key}：{name.lower()}测量区域的{stat_cn}{quantity_cn}")
+                    count -= 1
+        number += 1
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines))
+
+
+def main():
+    project_dir = os.path.dirname(src_dir)
+    parser = argparse.ArgumentParser(description="第二阶段候选key筛选召回率")
+    parser.add_argument("--key-description", default=os.path.join(project_dir, "document", "key_descriptions",
+                                                                   "table_key_description.txt"))
+    parser.add_argument("--labels", default=os.path.join(project_dir, "document", "match_results"),
+                        help="标注来源：使用完整key描述文件得到的匹配结果目录")
+    parser.add_argument("--k", default="1,3,5,10,20,50", help="逗号分隔的top-k列表")
+    parser.add_argument("--distractors", type=int, default=0, help="追加的干扰key数量")
+    parser.add_argument("--embeddings", action="store_true", help="同时使用key向量索引筛选（需要嵌入模型）")
+    args = parser.parse_args()
+
+    labels = load_labels(args.labels) if os.path.isdir(args.labels) else {}
+    if not labels:
+        print(f"{args.labels} 中没有匹配结果，使用示例文档标注")
+        labels = SAMPLE_LABELS
+
+    key_description_path = args.key_description
+    if args.distractors:
+        key_description_path = os.path.join(tempfile.mkdtemp(), "table_key_description.txt")
+        write_catalog_with_distractors(args.key_description, args.distractors, key_description_path)
+
+    entries = load_key_catalog(key_description_path)
+    full_chars = len(render_key_description(entries))
+    embedding_index = None
+    if args.embeddings and llm_manager.init_embedding_model():
+        embedding_index = get_key_embedding_index(key_description_path)
+
+    labelled = sum(1 for results in labels.values() for item in results if item.get("new_key"))
+    print(f"key总数 {len(entries)}，标注表格 {len(labels)} 个，有效标注 {labelled} 个，"
+          f"完整key描述 {full_chars} 字符")
+    print(f"{'k':>5} {'召回率':>8} {'平均候选数':>10} {'平均字符数':>10} {'字符占比':>8}")
+    for k in [int(value) for value in args.k.split(',')]:
+        recall, missed, average = shortlist_recall(labels, key_description_path, k, embedding_index)
+        chars = [len(render_key_description(shortlist_keys(
+                     [{"key": item["old_key"], "value": item.get("value", "")} for item in results],
+                     key_description_path, k, embedding_index)))
+                 for results in labels.values()]
+        average_chars = sum(chars) / len(chars) if chars else 0
+        print(f"{k:>5} {recall:>8.1%} {average:>10.1f} {average_chars:>10.0f} "
+              f"{average_chars / full_chars if full_chars else 0:>8.1%}")
+        for table_name, old_key, new_key in missed:
+            print(f"      漏掉: {table_name} {old_key!r} -> {new_key}")
+
+
+if __name__ == "__main__":
+    main()
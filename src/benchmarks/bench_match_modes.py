@@ -0,0 +1,117 @@
+"""
+基准测试 - 两阶段匹配 vs 单次调用匹配
+对示例文档中的表格分别用两阶段（two_stage）和单次调用（combined）方式匹配（不使用响应缓存），
+统计总耗时、LLM调用次数、提示词token数（仅本地模型）、生成token数，
+并与已保存的*_matches.json（默认document/match_results）比较 (valueId, new_key) 的一致率；
+没有已保存结果的表格以两阶段结果为参照
+
+用法:
+    python src/benchmarks/bench_match_modes.py --backend local
+    python src/benchmarks/bench_match_modes.py --backend remote --tables 5,6,7 --shortlist-k 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.extractor import extract_docx_document
+from matchers import table_matcher
+from models.model_manager import llm_manager
+
+
+def matched_pairs(results):
+    """匹配结果中有new_key的(valueId, new_key)集合"""
+    return {(item.get("valueId", ""), item["new_key"]) for item in results if item.get("new_key")}
+
+
+def load_reference(reference_dir, table_name):
+    path = os.path.join(reference_dir, table_name.replace(".html", "_matches.json"))
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_mode(table_paths, key_description_path, match_mode, table_format, shortlist_k, use_rules):
+    """按指定方式匹配所有表格，返回({表格路径: 结果}, 统计)"""
+    generation_before = llm_manager.get_generation_stats()
+    prompt_before = llm_manager.get_prompt_stats()
+    results = {}
+    start = time.perf_counter()
+    for table_path in table_paths:
+        results[table_path] = table_matcher.match_table(table_path, key_description_path, table_format,
+                                                        use_rules=use_rules, shortlist_k=shortlist_k,
+                                                        match_mode=match_mode)
+    generation_after = llm_manager.get_generation_stats()
+    prompt_after = llm_manager.get_prompt_stats()
+    stats = {
+        "time": time.perf_counter() - start,
+        "calls": generation_after["calls"] - generation_before["calls"],
+        "completion_tokens": generation_after["tokens"] - generation_before["tokens"],
+        "prompt_tokens": prompt_after["prompt_tokens"] - prompt_before["prompt_tokens"],
+    }
+    return results, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="两阶段匹配与单次调用匹配的耗时、token数和一致率对比")
+    parser.add_argument("--backend", choices=["local", "remote"], default="local")
+    parser.add_argument("--tables", default="", help="只测试指定编号的表格，如 5,6,7")
+    parser.add_argument("--format", default=table_matcher.DEFAULT_FORMAT, help="表格序列化格式")
+    parser.add_argument("--shortlist-k", type=int, default=0, help="候选key筛选的top-k，0表示不筛选")
+    parser.add_argument("--rules", action="store_true", help="两阶段方式的第一阶段先使用规则提取")
+    parser.add_argument("--reference", default="", help="参照结果目录，默认document/match_results")
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+    key_description_path = os.path.join(project_dir, "document", "key_descriptions", "table_key_description.txt")
+    reference_dir = args.reference or os.path.join(project_dir, "document", "match_results")
+
+    if args.backend == "local":
+        if not llm_manager.init_local_model():
+            sys.exit(1)
+    elif not llm_manager.init_remote_model():
+        sys.exit(1)
+
+    extract_dir = tempfile.mkdtemp(prefix="bench_modes_")
+    _, table_count = extract_docx_document(docx_path, extract_dir)
+    numbers = [int(n) for n in args.tables.split(",") if n.strip()] or list(range(1, table_count + 1))
+    table_paths = [os.path.join(extract_dir, f"table_{n}.html") for n in numbers]
+
+    summary = {}
+    all_results = {}
+    for match_mode in table_matcher.MATCH_MODES:
+        all_results[match_mode], summary[match_mode] = run_mode(table_paths, key_description_path, match_mode,
+                                                                args.format, args.shortlist_k, args.rules)
+
+    # 一致率：参照结果中的(valueId, new_key)被复现的比例，以及输出中与参照一致的比例
+    for match_mode in table_matcher.MATCH_MODES:
+        reference_total = predicted_total = agreed = 0
+        for table_path in table_paths:
+            reference = load_reference(reference_dir, os.path.basename(table_path))
+            if reference is None:
+                reference = all_results[table_matcher.MATCH_MODE_TWO_STAGE][table_path]
+            expected = matched_pairs(reference)
+            predicted = matched_pairs(all_results[match_mode][table_path])
+            reference_total += len(expected)
+            predicted_total += len(predicted)
+            agreed += len(expected & predicted)
+        summary[match_mode]["recall"] = agreed / reference_total if reference_total else 1.0
+        summary[match_mode]["precision"] = agreed / predicted_total if predicted_total else 1.0
+
+    print(f"\n表格数: {len(table_paths)}, 后端: {args.backend}, 格式: {args.format}, shortlist_k: {args.shortlist_k}")
+    print(f"{'方式':<10} {'总耗时(秒)':>10} {'LLM调用':>8} {'提示词token':>12} {'生成token':>10} {'一致率(召回)':>12} {'一致率(精确)':>12}")
+    for match_mode, stats in summary.items():
+        prompt_tokens = stats["prompt_tokens"] if args.backend == "local" else "N/A"
+        print(f"{match_mode:<10} {stats['time']:>10.2f} {stats['calls']:>8} {prompt_tokens:>12} "
+              f"{stats['completion_tokens']:>10} {stats['recall']:>12.1%} {stats['precision']:>12.1%}")
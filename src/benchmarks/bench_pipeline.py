@@ -0,0 +1,86 @@
+"""
+基准测试 - 两阶段流水线
+使用bench_concurrent_matching的OpenAI兼容桩服务（固定延迟模拟每次LLM调用），
+分别以逐个匹配、按表格并发、两阶段流水线（各阶段不同工作线程数）匹配同一批表格，
+对比总耗时和吞吐量（表格/分钟），并校验结果与逐个匹配完全一致
+
+用法:
+    python src/benchmarks/bench_pipeline.py
+    python src/benchmarks/bench_pipeline.py --latency 0.5 --copies 5 --stages 1+1,2+2,1+3
+"""
+
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.extractor import extract_docx_document
+from matchers import table_matcher
+from models.model_manager import llm_manager
+from benchmarks.bench_concurrent_matching import start_stub_server, load_results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="两阶段流水线的吞吐量测试（本地OpenAI兼容桩服务）")
+    parser.add_argument("--latency", type=float, default=0.2, help="桩服务每次请求的延迟（秒）")
+    parser.add_argument("--copies", type=int, default=3, help="示例文档表格的复制份数，用于增加表格数量")
+    parser.add_argument("--workers", type=int, default=2, help="按表格并发时的并发数")
+    parser.add_argument("--stages", default="1+1,2+2", help="流水线两个阶段的工作线程数列表")
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    extract_dir = os.path.join(work_dir, "extract")
+    extract_docx_document(docx_path, extract_dir)
+    base_tables = sorted(name for name in os.listdir(extract_dir) if name.endswith('.html'))
+
+    # 复制表格以模拟较大的报告
+    table_paths = []
+    for copy in range(args.copies):
+        for name in base_tables:
+            target = os.path.join(extract_dir, name) if copy == 0 else \
+                os.path.join(extract_dir, name.replace('.html', f'_{copy}.html'))
+            if copy:
+                shutil.copy(os.path.join(extract_dir, name), target)
+            table_paths.append(target)
+
+    key_description_path = os.path.join(work_dir, "table_key_description.txt")
+    with open(key_description_path, 'w', encoding='utf-8') as f:
+        f.write("桩服务测试用key描述")
+
+    server, base_url = start_stub_server(args.latency)
+    llm_manager.init_remote_model(api_key="stub", base_url=base_url, model="stub")
+
+    configs = [("逐个匹配", {"max_workers": 1}),
+               (f"按表格并发 {args.workers}", {"max_workers": args.workers})]
+    for stages in args.stages.split(','):
+        stage_1_workers, stage_2_workers = (int(n) for n in stages.split('+'))
+        configs.append((f"流水线 {stage_1_workers}+{stage_2_workers}",
+                        {"pipeline": True, "stage_workers": (stage_1_workers, stage_2_workers)}))
+
+    report = []
+    baseline = None
+    for i, (name, options) in enumerate(configs):
+        match_results_dir = os.path.join(work_dir, f"match_{i}")
+        stats = table_matcher.match_tables(table_paths, key_description_path, match_results_dir, **options)
+        results = load_results(match_results_dir)
+        if baseline is None:
+            baseline = results
+        report.append((name, stats, results == baseline))
+
+    server.shutdown()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"\n表格数: {len(table_paths)}，桩服务延迟: {args.latency:.2f} 秒/请求")
+    print(f"{'方式':<16} {'总耗时(s)':>10} {'表格/分钟':>10} {'结果一致':>8}")
+    for name, stats, same in report:
+        print(f"{name:<16} {stats['wall_time']:>10.2f} {stats['tables_per_minute']:>10.1f} {'是' if same else '否':>8}")
@@ -0,0 +1,114 @@
+"""
+基准测试 - 投机解码（prompt lookup / 草稿模型）
+对示例文档中的表格分别在不使用投机解码、prompt_lookup、草稿模型（--draft-model）下
+运行第一阶段（提取key-value）和第二阶段（key匹配）的本地推理（不使用响应缓存），
+统计各阶段的生成token数、每秒生成token数、草稿token接受率，并检查输出是否与不使用投机解码时一致
+（温度为0，投机解码不应改变输出）。第二阶段的输入统一使用不使用投机解码时第一阶段的结果
+
+用法:
+    python src/benchmarks/bench_speculative.py
+    python src/benchmarks/bench_speculative.py --tables 5,6,7 --num-pred-tokens 16
+    python src/benchmarks/bench_speculative.py --draft-model gemma-3-1b-it-Q4_K_M.gguf
+"""
+
+import os
+import sys
+import copy
+import time
+import argparse
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.extractor import extract_docx_document
+from extractors.table_model import load_table
+from matchers import table_matcher
+from models.model_manager import llm_manager
+from models.draft_models import DEFAULT_NUM_PRED_TOKENS
+
+STAGES = ("stage_1", "stage_2")
+
+
+def run_stage(stage, tables, stage_2_inputs, key_description_path, table_format):
+    """运行一个阶段的所有表格，返回({表格路径: 结果}, 统计)"""
+    generation_before = llm_manager.get_generation_stats()
+    draft_before = llm_manager.get_draft_stats()
+    results = {}
+    start = time.perf_counter()
+    for table_path, table in tables.items():
+        if stage == "stage_1":
+            results[table_path] = table_matcher.extract_key_values_llm(table, table_format)
+        elif stage_2_inputs.get(table_path):
+            results[table_path] = table_matcher.match_keys_llm(stage_2_inputs[table_path], key_description_path)
+        else:
+            results[table_path] = []
+    elapsed = time.perf_counter() - start
+    generation_after = llm_manager.get_generation_stats()
+    draft_after = llm_manager.get_draft_stats()
+
+    tokens = generation_after["tokens"] - generation_before["tokens"]
+    stats = {"time": elapsed, "tokens": tokens, "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+             "proposed": 0, "accepted": 0}
+    if draft_after is not None:
+        stats["proposed"] = draft_after["proposed"] - draft_before["proposed"]
+        stats["accepted"] = draft_after["accepted"] - draft_before["accepted"]
+    return results, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="投机解码在两个匹配阶段的生成速度和草稿接受率")
+    parser.add_argument("--tables", default="", help="只测试指定编号的表格，如 5,6,7")
+    parser.add_argument("--format", default=table_matcher.DEFAULT_FORMAT, help="表格序列化格式")
+    parser.add_argument("--num-pred-tokens", type=int, default=DEFAULT_NUM_PRED_TOKENS, help="每次草稿的token数")
+    parser.add_argument("--draft-model", default="", help="models目录下与主模型同词表的草稿模型文件名")
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+    key_description_path = os.path.join(project_dir, "document", "key_descriptions", "table_key_description.txt")
+
+    extract_dir = tempfile.mkdtemp(prefix="bench_speculative_")
+    _, table_count = extract_docx_document(docx_path, extract_dir)
+    numbers = [int(n) for n in args.tables.split(",") if n.strip()] or list(range(1, table_count + 1))
+    tables = {}
+    for n in numbers:
+        table_path = os.path.join(extract_dir, f"table_{n}.html")
+        tables[table_path] = load_table(table_path)
+
+    configs = [("none", None), ("prompt_lookup", "prompt_lookup")]
+    if args.draft_model:
+        configs.append((args.draft_model, args.draft_model))
+
+    # 流式生成才能统计生成token数
+    llm_manager.set_streaming(True)
+    summary = {}
+    baseline = {}
+    stage_2_inputs = {}
+    for name, draft in configs:
+        # 各草稿方式都在进程内加载，不连接本地推理服务
+        if not llm_manager.init_local_model(draft=draft, num_pred_tokens=args.num_pred_tokens, server_url=None):
+            sys.exit(1)
+        for stage in STAGES:
+            results, stats = run_stage(stage, tables, stage_2_inputs, key_description_path, args.format)
+            if name == "none":
+                baseline[stage] = results
+                if stage == "stage_1":
+                    # resolve_positions会修改输入项，复制后再映射，保留原始结果用于比较
+                    for table_path, pairs in results.items():
+                        stage_2_inputs[table_path] = table_matcher.resolve_positions(tables[table_path],
+                                                                                     copy.deepcopy(pairs))
+            stats["identical"] = sum(results[path] == baseline[stage][path] for path in tables)
+            summary[(name, stage)] = stats
+
+    print(f"\n表格数: {len(tables)}, 格式: {args.format}, 每次草稿token数: {args.num_pred_tokens}")
+    print(f"{'投机解码':<28} {'阶段':<8} {'耗时(秒)':>9} {'生成token':>10} {'token/秒':>9} "
+          f"{'草稿token':>10} {'接受率':>8} {'输出一致':>8}")
+    for (name, stage), stats in summary.items():
+        acceptance = f"{stats['accepted'] / stats['proposed']:.1%}" if stats["proposed"] else "N/A"
+        print(f"{name:<28} {stage:<8} {stats['time']:>9.2f} {stats['tokens']:>10} "
+              f"{stats['tokens_per_second']:>9.1f} {stats['proposed']:>10} {acceptance:>8} "
+              f"{stats['identical']:>4}/{len(tables)}")
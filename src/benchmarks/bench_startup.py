@@ -0,0 +1,136 @@
+"""
+基准测试 - 启动耗时
+1. 在子进程中以 python -X importtime 导入main，汇总导入main的总耗时和耗时最多的模块，
+   并列出导入main后已加载的重量级依赖（应为空：llama_cpp、openai、docx等在使用时才导入）
+2. --load-model时对比模型加载与文档提取串行执行、以及后台加载模型同时提取文档的耗时，
+   本地推理服务（models/inference_server.py）运行时再测量连接服务并完成第一次调用的耗时
+
+用法:
+    python src/benchmarks/bench_startup.py
+    python src/benchmarks/bench_startup.py --top 20 --load-model
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+# 导入main时不应加载的重量级依赖
+HEAVY_MODULES = ("llama_cpp", "openai", "docx", "bs4", "win32com", "numpy", "uno")
+
+
+def import_times(module="main"):
+    """
+    在子进程中用-X importtime导入模块
+
+    Returns:
+        list: [(模块名, 自身耗时微秒, 累计耗时微秒, 嵌套层级)]，按导入完成顺序
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=src_dir, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"导入 {module} 失败: {result.stderr.strip().splitlines()[-1]}")
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def loaded_heavy_modules(module="main"):
+    """导入模块后已加载的重量级依赖"""
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=src_dir, capture_output=True, text=True)
+    return [name for name in result.stdout.strip().split(",") if name]
+
+
+def measure_model_overlap(docx_path):
+    """
+    对比串行（先加载模型再提取）与后台加载模型同时提取的耗时
+
+    Returns:
+        dict: {"load": 模型加载秒数, "extract": 提取秒数, "serial": 串行总耗时, "overlapped": 重叠执行总耗时}
+    """
+    from extractors.extractor import extract_docx_document
+    from models.model_manager import ModelManager
+
+    manager = ModelManager()
+    start = time.perf_counter()
+    manager.init_local_model(server_url=None)
+    load_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    extract_docx_document(docx_path, tempfile.mkdtemp(prefix="bench_startup_"))
+    extract_time = time.perf_counter() - start
+
+    # 先释放第一次加载的模型，避免同时占用两份内存
+    del manager
+    manager = ModelManager()
+    start = time.perf_counter()
+    ready = manager.load_in_background(lambda: manager.init_local_model(server_url=None))
+    extract_docx_document(docx_path, tempfile.mkdtemp(prefix="bench_startup_"))
+    ready.result()
+    overlapped = time.perf_counter() - start
+    return {"load": load_time, "extract": extract_time, "serial": load_time + extract_time,
+            "overlapped": overlapped}
+
+
+def measure_server_start():
+    """
+    连接本地推理服务并完成第一次调用的耗时
+
+    Returns:
+        dict: {"connect": 连接秒数, "first_call": 第一次调用秒数}，服务未运行时返回None
+    """
+    from models.model_manager import ModelManager
+
+    manager = ModelManager()
+    start = time.perf_counter()
+    if not manager.init_local_model() or manager.server_url is None:
+        return None
+    connect_time = time.perf_counter() - start
+    start = time.perf_counter()
+    manager.create_completion([{"role": "user", "content": "你好"}], use_cache=False, max_tokens=8)
+    return {"connect": connect_time, "first_call": time.perf_counter() - start}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="导入耗时与后台模型加载的启动耗时测试")
+    parser.add_argument("--module", default="main", help="要测量导入耗时的模块")
+    parser.add_argument("--top", type=int, default=15, help="列出累计耗时最多的模块数")
+    parser.add_argument("--load-model", action="store_true", help="同时测量后台加载模型与文档提取的重叠效果")
+    args = parser.parse_args()
+
+    entries = import_times(args.module)
+    total = next((cumulative for name, _, cumulative, _ in entries if name == args.module), 0)
+    print(f"导入 {args.module} 总耗时: {total / 1000:.1f} ms（共导入 {len(entries)} 个模块）")
+    print(f"\n累计耗时最多的 {args.top} 个模块:")
+    print(f"{'累计(ms)':>10} {'自身(ms)':>10}  模块")
+    for name, self_us, cumulative_us, depth in sorted(entries, key=lambda e: -e[2])[:args.top]:
+        print(f"{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {'  ' * depth}{name}")
+
+    heavy = loaded_heavy_modules(args.module)
+    print(f"\n导入 {args.module} 后已加载的重量级依赖: {', '.join(heavy) if heavy else '无'}")
+
+    if args.load_model:
+        docx_path = os.path.join(os.path.dirname(src_dir), "document", "document.docx")
+        timing = measure_model_overlap(docx_path)
+        print(f"\n模型加载 {timing['load']:.2f} 秒，文档提取 {timing['extract']:.2f} 秒")
+        print(f"串行: {timing['serial']:.2f} 秒，后台加载模型同时提取: {timing['overlapped']:.2f} 秒")
+        served = measure_server_start()
+        if served is None:
+            print("本地推理服务未运行，跳过连接服务的测量")
+        else:
+            print(f"连接本地推理服务 {served['connect']:.2f} 秒，第一次调用 {served['first_call']:.2f} 秒")
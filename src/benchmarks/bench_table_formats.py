@@ -0,0 +1,100 @@
+"""
+基准测试 - 表格序列化格式对比
+对示例文档中的表格，分别用各序列化格式（html / markdown / tsv / cells）生成第一阶段提示词，
+统计提示词字符数和token数（使用已加载模型的分词器），
+并可选地调用LLM测量第一阶段耗时、输出token数和有效结果数，或完整两阶段匹配耗时
+
+用法:
+    python src/benchmarks/bench_table_formats.py --backend local
+    python src/benchmarks/bench_table_formats.py --backend remote --run-llm --full
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+# 添加src目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+src_dir = os.path.dirname(current_dir)
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.extractor import extract_docx_document
+from extractors.table_model import load_table
+from matchers import table_matcher
+from matchers.table_serializers import SERIALIZERS, serialize_table
+from models.model_manager import llm_manager
+
+
+def run_stage_1(table, table_format, prompt_path):
+    """执行第一阶段，返回(提示词, 耗时, 输出文本, 有效结果数)"""
+    content, description = serialize_table(table, table_format)
+    prompt = table_matcher.prepare_system_prompt_1(prompt_path, content, description)
+    start = time.perf_counter()
+    response = llm_manager.create_completion([{"role": "user", "content": prompt}], temperature=0)
+    elapsed = time.perf_counter() - start
+    try:
+        pairs = table_matcher.resolve_positions(table, table_matcher.parse_response_1(response or ""))
+    except ValueError:
+        pairs = []
+    return elapsed, response or "", len(pairs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="表格序列化格式token数与耗时对比")
+    parser.add_argument("--backend", choices=["local", "remote", "none"], default="local",
+                        help="模型后端；none时只统计字符数")
+    parser.add_argument("--run-llm", action="store_true", help="调用LLM测量第一阶段耗时")
+    parser.add_argument("--full", action="store_true", help="额外测量完整两阶段匹配耗时")
+    parser.add_argument("--tables", default="", help="只测试指定编号的表格，如 5,6,7")
+    args = parser.parse_args()
+
+    project_dir = os.path.dirname(src_dir)
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+    key_description_path = os.path.join(project_dir, "document", "key_descriptions", "table_key_description.txt")
+    prompt_path = os.path.join(src_dir, "matchers", "table_system_prompt_1.md")
+
+    if args.backend == "local":
+        llm_manager.init_local_model()
+    elif args.backend == "remote":
+        llm_manager.init_remote_model()
+
+    extract_dir = tempfile.mkdtemp(prefix="bench_formats_")
+    _, table_count = extract_docx_document(docx_path, extract_dir)
+    numbers = [int(n) for n in args.tables.split(",") if n.strip()] or list(range(1, table_count + 1))
+    table_paths = [os.path.join(extract_dir, f"table_{n}.html") for n in numbers]
+    tables = [load_table(path) for path in table_paths]
+
+    summary = {}
+    for table_format in SERIALIZERS:
+        stats = {"chars": 0, "tokens": 0, "stage_1_time": 0.0, "completion_tokens": 0, "pairs": 0, "full_time": 0.0}
+        for table_path, table in zip(table_paths, tables):
+            content, description = serialize_table(table, table_format)
+            prompt = table_matcher.prepare_system_prompt_1(prompt_path, content, description)
+            stats["chars"] += len(prompt)
+            tokens = llm_manager.count_tokens(prompt)
+            stats["tokens"] = None if tokens is None or stats["tokens"] is None else stats["tokens"] + tokens
+
+            if args.run_llm and args.backend != "none":
+                elapsed, response, pair_count = run_stage_1(table, table_format, prompt_path)
+                stats["stage_1_time"] += elapsed
+                stats["pairs"] += pair_count
+                completion_tokens = llm_manager.count_tokens(response)
+                stats["completion_tokens"] = (None if completion_tokens is None or stats["completion_tokens"] is None
+                                              else stats["completion_tokens"] + completion_tokens)
+
+            if args.full and args.backend != "none":
+                start = time.perf_counter()
+                table_matcher.match_table(table_path, key_description_path, table_format)
+                stats["full_time"] += time.perf_counter() - start
+        summary[table_format] = stats
+
+    print(f"\n表格数: {len(tables)}, 后端: {args.backend}")
+    print(f"{'格式':<10} {'提示词字符':>10} {'提示词token':>12} {'阶段1耗时(秒)':>14} {'输出token':>10} {'有效结果':>8} {'两阶段耗时(秒)':>15}")
+    for table_format, stats in summary.items():
+        tokens = stats["tokens"] if stats["tokens"] is not None else "N/A"
+        completion = stats["completion_tokens"] if stats["completion_tokens"] is not None else "N/A"
+        print(f"{table_format:<10} {stats['chars']:>10} {tokens:>12} {stats['stage_1_time']:>14.2f} "
+              f"{completion:>10} {stats['pairs']:>8} {stats['full_time']:>15.2f}")
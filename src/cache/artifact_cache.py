@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内容寻址产物缓存 - 按输入文件哈希缓存转换/提取结果
+缓存键由输入文件内容的SHA-256、处理阶段名和处理器版本共同决定，
+输入字节不变且处理器版本不变时直接复用之前的产物
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+
+class ArtifactCache:
+    """
+    内容寻址产物缓存
+    每个缓存项是缓存目录下以键命名的子目录，索引文件记录大小和最近访问时间，
+    总大小超过上限时按LRU淘汰
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: 缓存根目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index: Dict[str, Dict[str, float]] = self._load_index()
+
+    # ================ 键计算 ================
+
+    @staticmethod
+    def hash_file(file_path: str) -> str:
+        """计算文件内容的SHA-256"""
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def make_key(self, input_path: str, stage: str, version: str) -> str:
+        """
+        根据输入文件内容、处理阶段和处理器版本生成缓存键
+
+        Args:
+            input_path: 输入文件路径（如document.docx）
+            stage: 处理阶段名（如"convert"、"extract"）
+            version: 处理器版本号，处理逻辑变化时需要更新
+        """
+        content_hash = self.hash_file(input_path)
+        return hashlib.sha256(f"{stage}:{version}:{content_hash}".encode('utf-8')).hexdigest()
+
+    # ================ 读写 ================
+
+    def contains(self, key: str) -> bool:
+        """缓存中是否有该键（不计入命中统计）"""
+        with self.lock:
+            return key in self.index and os.path.isdir(os.path.join(self.cache_dir, key))
+
+    def restore(self, key: str, target_dir: str) -> bool:
+        """
+        将缓存项中的文件复制到目标目录
+
+        Returns:
+            bool: 是否命中缓存
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        with self.lock:
+            if key not in self.index or not os.path.isdir(entry_dir):
+                self.index.pop(key, None)
+                self.misses += 1
+                return False
+
+            os.makedirs(target_dir, exist_ok=True)
+            for name in os.listdir(entry_dir):
+                src = os.path.join(entry_dir, name)
+                dst = os.path.join(target_dir, name)
+                if os.path.isdir(src):
+                    if os.path.exists(dst):
+                        shutil.rmtree(dst)
+                    shutil.copytree(src, dst)
+                else:
+                    shutil.copy2(src, dst)
+
+            self.index[key]["last_access"] = time.time()
+            self.hits += 1
+            self._save_index()
+        return True
+
+    def store(self, key: str, paths: List[str]):
+        """
+        将文件/目录保存为一个缓存项，已存在时覆盖
+
+        Args:
+            key: 缓存键
+            paths: 要缓存的文件或目录路径列表，恢复时按原文件名放入目标目录
+        """
+        tmp_dir = tempfile.mkdtemp(prefix="tmp_", dir=self.cache_dir)
+        try:
+            for path in paths:
+                dst = os.path.join(tmp_dir, os.path.basename(path))
+                if os.path.isdir(path):
+                    shutil.copytree(path, dst)
+                elif os.path.isfile(path):
+                    shutil.copy2(path, dst)
+            size = _dir_size(tmp_dir)
+
+            with self.lock:
+                entry_dir = os.path.join(self.cache_dir, key)
+                if os.path.exists(entry_dir):
+                    shutil.rmtree(entry_dir)
+                os.replace(tmp_dir, entry_dir)
+                self.index[key] = {"size": size, "last_access": time.time()}
+                self._evict()
+                self._save_index()
+        finally:
+            if os.path.exists(tmp_dir):
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def store_dir(self, key: str, source_dir: str):
+        """将目录下的所有内容保存为一个缓存项"""
+        self.store(key, [os.path.join(source_dir, name) for name in os.listdir(source_dir)])
+
+    # ================ 统计与淘汰 ================
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取缓存统计信息"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.index),
+                "total_bytes": sum(entry["size"] for entry in self.index.values()),
+            }
+
+    def _evict(self):
+        """按最近访问时间淘汰，直到总大小不超过上限（调用方持有锁）"""
+        total = sum(entry["size"] for entry in self.index.values())
+        for key in sorted(self.index, key=lambda k: self.index[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            total -= self.index.pop(key)["size"]
+            shutil.rmtree(os.path.join(self.cache_dir, key), ignore_errors=True)
+            self.evictions += 1
+
+    def _load_index(self) -> Dict[str, Dict[str, float]]:
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"加载缓存索引失败: {e}")
+        return {}
+
+    def _save_index(self):
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, index_path)
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+# 测试功能
+if __name__ == "__main__":
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_dir = os.path.dirname(os.path.dirname(current_dir))
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+
+    cache = ArtifactCache(os.path.join(tempfile.gettempdir(), "artifact_cache_test"))
+    key = cache.make_key(docx_path, "test", "1")
+    if not cache.restore(key, tempfile.gettempdir()):
+        cache.store(key, [docx_path])
+        cache.restore(key, tempfile.gettempdir())
+    print(f"缓存统计: {cache.get_stats()}")
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+LLM响应缓存 - 按后端、模型、完整消息和采样参数缓存模型输出
+缓存保存在SQLite数据库中，多个进程可以同时读写；
+按条目最长保存时间和数据库总大小淘汰，最近最少使用的条目优先淘汰
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class LLMResponseCache:
+    """
+    持久化LLM响应缓存
+    使用WAL模式和忙等待超时，保证多进程并发访问安全
+    """
+
+    def __init__(self, db_path: str, max_bytes: int = 256 * 1024 * 1024,
+                 max_age: Optional[float] = 30 * 24 * 3600):
+        """
+        Args:
+            db_path: SQLite数据库文件路径
+            max_bytes: 缓存响应总大小上限（字节）
+            max_age: 条目最长保存时间（秒），为None时不按时间淘汰
+        """
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " response TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+
+    # ================ 键计算 ================
+
+    @staticmethod
+    def make_key(backend: str, model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> str:
+        """
+        根据后端、模型标识、完整消息列表和采样参数生成缓存键
+
+        Args:
+            backend: 后端类型（如"local"、"remote"）
+            model: 模型标识（本地模型文件或远程模型名）
+            messages: 消息列表
+            params: 采样参数（如temperature、max_tokens）
+        """
+        payload = json.dumps([backend, model, messages, params], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    # ================ 读写 ================
+
+    def get(self, key: str) -> Optional[str]:
+        """查询缓存，未命中或条目已过期时返回None"""
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.max_age is not None and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        """保存响应，已存在时覆盖，随后按需淘汰"""
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._evict(now)
+
+    def clear(self):
+        """清空缓存"""
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ================ 统计与淘汰 ================
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取缓存统计信息（命中统计为本进程的数据）"""
+        with self.lock:
+            entries, total_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "total_bytes": total_bytes,
+            }
+
+    def _evict(self, now: float):
+        """删除过期条目，再按最近访问时间淘汰到总大小不超过上限（调用方持有锁）"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self.max_age is not None:
+                self.evictions += self.conn.execute(
+                    "DELETE FROM responses WHERE created < ?", (now - self.max_age,)).rowcount
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                for key, size in self.conn.execute(
+                        "SELECT key, size FROM responses ORDER BY last_access").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    total -= size
+                    self.evictions += 1
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+
+# 测试功能
+if __name__ == "__main__":
+    import tempfile
+
+    cache = LLMResponseCache(os.path.join(tempfile.gettempdir(), "llm_cache_test.sqlite3"), max_bytes=1024)
+    messages = [{"role": "user", "content": "你好"}]
+    key = cache.make_key("local", "test-model", messages, {"temperature": 0})
+    if cache.get(key) is None:
+        cache.put(key, "你好，我是测试模型")
+    print(f"缓存内容: {cache.get(key)}")
+    for i in range(100):
+        cache.put(cache.make_key("local", "test-model", [{"role": "user", "content": str(i)}], {}), "x" * 50)
+    print(f"缓存统计: {cache.get_stats()}")
@@ -1,8 +1,56 @@
-import win32com.client as win32
 import os
 
-def word_to_html(word_file, html_file):
-    """使用win32com调用Word应用将Word文件转换为HTML"""
+# 转换器版本号，转换方式或输出格式变化时需要更新，使产物缓存失效
+CONVERTER_VERSION = "1"
+
+# 文档转换后端（如office_pool.OfficePool），为None时使用本机Word应用（win32com）
+_conversion_backend = None
+
+def set_conversion_backend(backend):
+    """设置文档转换后端，传入None恢复为win32com方式"""
+    global _conversion_backend
+    _conversion_backend = backend
+
+def get_conversion_backend():
+    """获取当前文档转换后端"""
+    return _conversion_backend
+
+def word_to_html(word_file, html_file, cache=None):
+    """
+    将Word文件转换为HTML，优先使用已设置的转换后端，否则调用Word应用
+    传入产物缓存（ArtifactCache）时，输入文档未变化则直接复用之前的HTML
+    """
+    if cache is not None:
+        html_dir = os.path.dirname(os.path.abspath(html_file))
+        html_name = os.path.basename(html_file)
+        backend_name = type(_conversion_backend).__name__ if _conversion_backend else "win32com"
+        key = cache.make_key(word_file, f"convert:{backend_name}:{html_name}", CONVERTER_VERSION)
+        if cache.restore(key, html_dir):
+            print(f"输入文档未变化，已从缓存恢复: {html_file}")
+            return
+        old_mtime = os.path.getmtime(html_file) if os.path.exists(html_file) else None
+        _word_to_html(word_file, html_file)
+        # 只缓存本次成功生成的HTML
+        if os.path.exists(html_file) and os.path.getmtime(html_file) != old_mtime:
+            # Word导出的图片等资源位于同名的.files目录中
+            resource_dir = os.path.splitext(html_file)[0] + ".files"
+            cache.store(key, [html_file, resource_dir])
+        return
+
+    _word_to_html(word_file, html_file)
+
+def _word_to_html(word_file, html_file):
+    """执行实际的Word到HTML转换"""
+    if _conversion_backend is not None:
+        try:
+            result = _conversion_backend.word_to_html(word_file, html_file)
+            print(f"成功导出: {html_file}（耗时 {result.latency:.2f} 秒）")
+        except Exception as e:
+            print(f"导出失败: {e}")
+        return
+
+    import win32com.client as win32
+
     # 启动Word应用
     word = win32.Dispatch("Word.Application")
     word.Visible = False
@@ -0,0 +1,395 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Office转换池 - 基于常驻headless LibreOffice进程的文档转换后端
+多个soffice工作进程共享一个任务队列，避免每次转换都冷启动Office
+常驻进程需要pyuno（python3-uno）；没有pyuno时每个任务仍单独启动一次soffice命令行转换，
+转换池只提供并发和失败重试，不能省去启动开销
+"""
+
+import os
+import time
+import queue
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+
+# 目标格式 -> LibreOffice导出过滤器
+EXPORT_FILTERS = {
+    'html': 'HTML (StarWriter)',
+    'docx': 'MS Word 2007 XML',
+}
+
+# HTML需要以Writer（而非Writer/Web）方式打开，才能导出为docx
+IMPORT_FILTERS = {
+    '.html': 'HTML (StarWriter)',
+    '.htm': 'HTML (StarWriter)',
+}
+
+
+class ConversionResult:
+    """单次转换结果"""
+    __slots__ = ('source', 'target', 'latency', 'worker_id')
+
+    def __init__(self, source: str, target: str, latency: float, worker_id: int):
+        self.source = source
+        self.target = target
+        self.latency = latency
+        self.worker_id = worker_id
+
+
+class _SofficeWorker:
+    """
+    单个soffice工作进程
+    有pyuno时通过UNO socket连接常驻进程转换；
+    否则退化为命令行转换，每个任务都冷启动一次soffice（仅复用用户配置目录，省去首次初始化配置的时间）
+    """
+
+    def __init__(self, worker_id: int, soffice_path: str, profile_root: str, start_timeout: float):
+        self.worker_id = worker_id
+        self.soffice_path = soffice_path
+        self.profile_dir = os.path.join(profile_root, f"worker_{worker_id}")
+        self.start_timeout = start_timeout
+        self.process = None
+        self.port = None
+        self.desktop = None
+
+        try:
+            import uno  # noqa: F401
+            self.use_uno = True
+        except ImportError:
+            self.use_uno = False
+
+    def _profile_url(self) -> str:
+        return 'file://' + os.path.abspath(self.profile_dir).replace(os.sep, '/')
+
+    def start(self):
+        """启动soffice进程并建立UNO连接"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        if not self.use_uno:
+            return
+
+        self.port = _find_free_port()
+        self.process = subprocess.Popen(
+            [
+                self.soffice_path,
+                f"-env:UserInstallation={self._profile_url()}",
+                "--headless", "--invisible", "--nologo", "--norestore", "--nodefault",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.desktop = self._connect()
+
+    def _connect(self):
+        """等待soffice就绪并返回Desktop对象"""
+        import uno
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_context)
+        url = f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+
+        deadline = time.time() + self.start_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"soffice工作进程 {self.worker_id} 启动后立即退出")
+            try:
+                context = resolver.resolve(url)
+                return context.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", context)
+            except Exception:
+                if time.time() > deadline:
+                    raise RuntimeError(f"soffice工作进程 {self.worker_id} 启动超时")
+                time.sleep(0.2)
+
+    def stop(self):
+        """结束soffice进程"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+    def restart(self):
+        """重启崩溃的工作进程"""
+        self.stop()
+        self.start()
+
+    def is_alive(self) -> bool:
+        if not self.use_uno:
+            return True
+        return self.process is not None and self.process.poll() is None
+
+    def convert(self, source: str, target: str, target_format: str):
+        """执行一次转换"""
+        if self.use_uno:
+            self._convert_uno(source, target, target_format)
+        else:
+            self._convert_cli(source, target, target_format)
+
+    def _convert_uno(self, source: str, target: str, target_format: str):
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name = name
+            p.Value = value
+            return p
+
+        load_props = [prop("Hidden", True)]
+        import_filter = IMPORT_FILTERS.get(os.path.splitext(source)[1].lower())
+        if import_filter:
+            load_props.append(prop("FilterName", import_filter))
+
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(source)), "_blank", 0, tuple(load_props))
+        if doc is None:
+            raise RuntimeError(f"无法打开文档: {source}")
+        try:
+            doc.storeToURL(
+                uno.systemPathToFileUrl(os.path.abspath(target)),
+                (prop("FilterName", EXPORT_FILTERS[target_format]),))
+        finally:
+            doc.close(True)
+
+    def _convert_cli(self, source: str, target: str, target_format: str):
+        """没有pyuno时的命令行转换，每次调用都会启动并退出一个soffice进程"""
+        out_dir = tempfile.mkdtemp(prefix=f"office_pool_{self.worker_id}_")
+        try:
+            command = [
+                self.soffice_path,
+                f"-env:UserInstallation={self._profile_url()}",
+                "--headless", "--norestore",
+                "--convert-to", f"{target_format}:{EXPORT_FILTERS[target_format]}",
+                "--outdir", out_dir,
+            ]
+            import_filter = IMPORT_FILTERS.get(os.path.splitext(source)[1].lower())
+            if import_filter:
+                command.append(f"--infilter={import_filter}")
+            command.append(os.path.abspath(source))
+
+            subprocess.run(command, check=True, timeout=self.start_timeout * 4,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            produced = os.path.join(out_dir, os.path.splitext(os.path.basename(source))[0] + "." + target_format)
+            if not os.path.exists(produced):
+                raise RuntimeError(f"soffice未生成输出文件: {produced}")
+            shutil.move(produced, target)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+
+class OfficePool:
+    """
+    Office转换池
+    维护若干常驻headless soffice工作进程，所有转换请求进入同一队列并发执行，
+    工作进程崩溃时自动重启，并记录每次转换的耗时。
+    没有pyuno时工作进程不常驻，每个任务单独启动soffice（persistent为False）
+    """
+
+    def __init__(self,
+                 workers: int = 2,
+                 soffice_path: Optional[str] = None,
+                 start_timeout: float = 30.0,
+                 max_retries: int = 1):
+        self.soffice_path = soffice_path or shutil.which("soffice") or shutil.which("libreoffice")
+        if not self.soffice_path:
+            raise RuntimeError("未找到soffice/libreoffice可执行文件")
+
+        self.worker_count = workers
+        self.start_timeout = start_timeout
+        self.max_retries = max_retries
+        # 工作进程的用户配置目录，start()时创建，close()或启动失败时删除
+        self.profile_root = None
+
+        self.jobs = queue.Queue()
+        self.threads: List[threading.Thread] = []
+        self.workers: List[_SofficeWorker] = []
+
+        self.stats_lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.failures = 0
+        self.restarts = 0
+        self.started = False
+        # 工作进程是否常驻（需要pyuno）
+        try:
+            import uno  # noqa: F401
+            self.persistent = True
+        except ImportError:
+            self.persistent = False
+
+    def start(self):
+        """启动所有工作进程，任一工作进程启动失败时停止已启动的进程并抛出异常"""
+        if self.started:
+            return
+        self.profile_root = tempfile.mkdtemp(prefix="office_pool_")
+        try:
+            for worker_id in range(self.worker_count):
+                worker = _SofficeWorker(worker_id, self.soffice_path, self.profile_root, self.start_timeout)
+                self.workers.append(worker)
+                worker.start()
+                thread = threading.Thread(target=self._worker_loop, args=(worker,), daemon=True)
+                thread.start()
+                self.threads.append(thread)
+        except Exception:
+            self._stop_workers()
+            self._remove_profile_root()
+            raise
+        self.started = True
+        if self.persistent:
+            print(f"Office转换池已启动: {self.worker_count} 个常驻工作进程")
+        else:
+            print(f"Office转换池已启动: {self.worker_count} 个工作线程（未找到pyuno，每个任务单独启动soffice）")
+
+    def close(self):
+        """停止所有工作进程"""
+        if not self.started:
+            return
+        self._stop_workers()
+        self._remove_profile_root()
+        self.started = False
+
+    def _remove_profile_root(self):
+        """删除工作进程的用户配置目录"""
+        if self.profile_root:
+            shutil.rmtree(self.profile_root, ignore_errors=True)
+            self.profile_root = None
+
+    def _stop_workers(self):
+        """结束工作线程和soffice进程"""
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        for worker in self.workers:
+            worker.stop()
+        self.threads.clear()
+        self.workers.clear()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, source: str, target: str, target_format: Optional[str] = None) -> Future:
+        """
+        提交转换任务
+
+        Args:
+            source: 输入文件路径
+            target: 输出文件路径
+            target_format: 目标格式（html/docx），默认由输出文件扩展名决定
+
+        Returns:
+            Future: 结果为ConversionResult
+        """
+        if not self.started:
+            self.start()
+        if target_format is None:
+            target_format = os.path.splitext(target)[1].lstrip('.').lower()
+            if target_format == 'htm':
+                target_format = 'html'
+        if target_format not in EXPORT_FILTERS:
+            raise ValueError(f"不支持的目标格式: {target_format}")
+
+        future = Future()
+        self.jobs.put((source, target, target_format, future))
+        return future
+
+    def convert(self, source: str, target: str, target_format: Optional[str] = None) -> ConversionResult:
+        """同步转换，阻塞直到完成"""
+        return self.submit(source, target, target_format).result()
+
+    def word_to_html(self, word_file: str, html_file: str) -> ConversionResult:
+        return self.convert(word_file, html_file, 'html')
+
+    def html_to_word(self, html_file: str, word_file: str) -> ConversionResult:
+        return self.convert(html_file, word_file, 'docx')
+
+    def _worker_loop(self, worker: _SofficeWorker):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            source, target, target_format, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            start_time = time.perf_counter()
+            for attempt in range(self.max_retries + 1):
+                try:
+                    if not worker.is_alive():
+                        self._restart_worker(worker)
+                    worker.convert(source, target, target_format)
+                    latency = time.perf_counter() - start_time
+                    with self.stats_lock:
+                        self.latencies.append(latency)
+                    future.set_result(ConversionResult(source, target, latency, worker.worker_id))
+                    break
+                except Exception as e:
+                    if attempt < self.max_retries:
+                        print(f"工作进程 {worker.worker_id} 转换失败: {e}，重启后重试...")
+                        try:
+                            self._restart_worker(worker)
+                        except Exception as restart_error:
+                            print(f"工作进程 {worker.worker_id} 重启失败: {restart_error}")
+                        continue
+                    with self.stats_lock:
+                        self.failures += 1
+                    future.set_exception(e)
+
+    def _restart_worker(self, worker: _SofficeWorker):
+        with self.stats_lock:
+            self.restarts += 1
+        worker.restart()
+
+    def get_stats(self) -> Dict[str, float]:
+        """获取转换统计信息（耗时单位：秒）"""
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+            stats = {
+                "conversions": len(latencies),
+                "failures": self.failures,
+                "restarts": self.restarts,
+                "total_latency": sum(latencies),
+            }
+        if latencies:
+            stats["avg_latency"] = stats["total_latency"] / len(latencies)
+            stats["p50_latency"] = latencies[len(latencies) // 2]
+            stats["max_latency"] = latencies[-1]
+        return stats
+
+
+def _find_free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# 测试功能
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    docx_path = os.path.join(base_dir, "document", "document.docx")
+    html_path = os.path.join(base_dir, "document", "document.html")
+
+    with OfficePool(workers=2) as pool:
+        result = pool.word_to_html(docx_path, html_path)
+        print(f"转换完成: {result.target}, 耗时 {result.latency:.2f} 秒")
+        print(f"统计信息: {pool.get_stats()}")
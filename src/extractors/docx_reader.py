@@ -0,0 +1,256 @@
+"""
+DOCX原生读取模块 - 基于OOXML解析的实现
+直接从.docx压缩包中流式读取word/document.xml，提取表格和段落，
+输出与table_extractor.create_clean_table相同结构的精简HTML表格，
+不依赖Word应用程序（win32com），也不经过HTML中间文件
+"""
+
+import os
+import zipfile
+import xml.etree.ElementTree as ET
+
+try:
+    from .table_model import Table, model_path_for
+except ImportError:
+    # 作为脚本直接运行时
+    from table_model import Table, model_path_for
+
+# WordprocessingML命名空间
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+MC_NS = '{http://schemas.openxmlformats.org/markup-compatibility/2006}'
+
+_P = W_NS + 'p'
+_R = W_NS + 'r'
+_T = W_NS + 't'
+_TAB = W_NS + 'tab'
+_BR = W_NS + 'br'
+_CR = W_NS + 'cr'
+_TBL = W_NS + 'tbl'
+_TR = W_NS + 'tr'
+_TC = W_NS + 'tc'
+_GRID_SPAN = W_NS + 'gridSpan'
+_GRID_BEFORE = W_NS + 'gridBefore'
+_V_MERGE = W_NS + 'vMerge'
+_VAL = W_NS + 'val'
+_FALLBACK = MC_NS + 'Fallback'
+
+
+class _Cell:
+    """单元格构建状态"""
+    __slots__ = ('text_parts', 'colspan', 'rowspan', 'v_merge')
+
+    def __init__(self):
+        self.text_parts = []
+        self.colspan = 1
+        self.rowspan = 1
+        self.v_merge = None  # None / 'restart' / 'continue'
+
+
+class _Table:
+    """表格构建状态"""
+    __slots__ = ('index', 'rows', 'row', 'grid_col', 'cell', 'v_merge_origins')
+
+    def __init__(self, index):
+        self.index = index
+        self.rows = []
+        self.row = None
+        self.grid_col = 0
+        self.cell = None
+        # 网格列号 -> 纵向合并起始单元格
+        self.v_merge_origins = {}
+
+
+def read_docx(docx_path):
+    """
+    从docx文件中读取表格和段落
+
+    参数:
+        docx_path: Word文档路径
+
+    返回:
+        tuple: (段落文本列表, 表格模型列表)
+        表格为table_model.Table，to_html()与create_clean_table的输出一致；
+        按文档中的出现顺序排列（外层表格在其嵌套表格之前），
+        与extract_tables对Word导出HTML的编号一致
+    """
+    paragraphs = []
+    tables = []
+
+    table_stack = []
+    para_stack = []
+    fallback_depth = 0
+    # 段落属性w:tabs中的w:tab是制表位定义，只有文本块（w:r）中的w:tab是制表符
+    run_depth = 0
+
+    with zipfile.ZipFile(docx_path) as docx_zip:
+        with docx_zip.open('word/document.xml') as xml_file:
+            for event, elem in ET.iterparse(xml_file, events=('start', 'end')):
+                tag = elem.tag
+
+                # mc:Fallback与mc:Choice内容重复，跳过
+                if tag == _FALLBACK:
+                    fallback_depth += 1 if event == 'start' else -1
+                    continue
+                if fallback_depth:
+                    if event == 'end':
+                        elem.clear()
+                    continue
+
+                if event == 'start':
+                    if tag == _P:
+                        para_stack.append([])
+                    elif tag == _R:
+                        run_depth += 1
+                    elif tag == _TBL:
+                        # 预留位置，保证外层表格排在嵌套表格之前
+                        tables.append(None)
+                        table_stack.append(_Table(len(tables) - 1))
+                    elif tag == _TR and table_stack:
+                        table = table_stack[-1]
+                        table.row = []
+                        table.grid_col = 0
+                    elif tag == _TC and table_stack:
+                        table_stack[-1].cell = _Cell()
+                    continue
+
+                # event == 'end'
+                if tag == _T:
+                    if para_stack and elem.text:
+                        para_stack[-1].append(elem.text)
+                elif tag == _R:
+                    run_depth -= 1
+                elif tag == _TAB and run_depth and para_stack:
+                    para_stack[-1].append('\t')
+                elif tag in (_BR, _CR) and para_stack:
+                    para_stack[-1].append('\n')
+                elif tag == _P:
+                    text = ''.join(para_stack.pop()) if para_stack else ''
+                    if para_stack:
+                        # 文本框等嵌套段落，文本并入外层段落
+                        para_stack[-1].append(text)
+                    elif table_stack:
+                        # 单元格文本包含所有嵌套表格中的文本
+                        stripped = text.strip()
+                        if stripped:
+                            for table in table_stack:
+                                if table.cell is not None:
+                                    table.cell.text_parts.append(stripped)
+                    elif text.strip():
+                        paragraphs.append(text.strip())
+                    elem.clear()
+                elif tag == _GRID_SPAN and table_stack and table_stack[-1].cell is not None:
+                    table_stack[-1].cell.colspan = max(1, int(elem.get(_VAL, '1')))
+                elif tag == _V_MERGE and table_stack and table_stack[-1].cell is not None:
+                    table_stack[-1].cell.v_merge = 'restart' if elem.get(_VAL) == 'restart' else 'continue'
+                elif tag == _GRID_BEFORE and table_stack and table_stack[-1].row is not None:
+                    _skip_grid_before(table_stack[-1], int(elem.get(_VAL, '0')))
+                elif tag == _TC and table_stack:
+                    _close_cell(table_stack[-1])
+                elif tag == _TR and table_stack:
+                    table = table_stack[-1]
+                    # 只含纵向合并延续单元格的行也要保留，否则下一行会被上方的rowspan错开
+                    table.rows.append(table.row or [])
+                    table.row = None
+                elif tag == _TBL and table_stack:
+                    table = table_stack.pop()
+                    tables[table.index] = _build_table(table.rows)
+                    elem.clear()
+
+    return paragraphs, [table for table in tables if table]
+
+
+def _skip_grid_before(table, count):
+    """行首跳过的网格列（w:gridBefore）以空单元格占位，保证后续单元格落在正确的列"""
+    for _ in range(max(0, count)):
+        table.v_merge_origins.pop(table.grid_col, None)
+        table.row.append(_Cell())
+        table.grid_col += 1
+
+
+def _close_cell(table):
+    """结束当前单元格，处理横向/纵向合并"""
+    cell = table.cell
+    table.cell = None
+    if cell is None or table.row is None:
+        return
+
+    grid_col = table.grid_col
+    table.grid_col += cell.colspan
+
+    if cell.v_merge == 'continue':
+        origin = table.v_merge_origins.get(grid_col)
+        if origin is not None:
+            # 被合并的单元格不单独输出，与Word导出HTML一致
+            origin.rowspan += 1
+            return
+    elif cell.v_merge == 'restart':
+        table.v_merge_origins[grid_col] = cell
+    else:
+        table.v_merge_origins.pop(grid_col, None)
+
+    table.row.append(cell)
+
+
+def _build_table(rows):
+    """将行数据构建为表格模型"""
+    if not any(rows):
+        return None
+    return Table.from_rows([
+        [(''.join(cell.text_parts), cell.colspan, cell.rowspan, 'td') for cell in row]
+        for row in rows
+    ])
+
+
+def extract_tables_from_docx(docx_path, output_dir):
+    """从docx文件中提取所有表格，每个表格保存为独立HTML文件及表格模型文件"""
+    try:
+        _, tables = read_docx(docx_path)
+
+        if not tables:
+            print("未找到任何表格")
+            return 0
+
+        for table_count, table in enumerate(tables, 1):
+            output_file = os.path.join(output_dir, f"table_{table_count}.html")
+            with open(output_file, 'w', encoding='utf-8') as file:
+                file.write(table.to_html())
+            table.save(model_path_for(output_file))
+            print(f"表格 {table_count} 已保存")
+
+        print(f"总共保存了 {len(tables)} 个表格")
+        return len(tables)
+    except Exception as e:
+        print(f"表格提取失败: {e}")
+        return 0
+
+
+def extract_paragraphs_from_docx(docx_path, output_dir):
+    """从docx文件中提取所有正文段落并保存（不包含表格内段落）"""
+    try:
+        paragraphs, _ = read_docx(docx_path)
+    except Exception as e:
+        print(f"无法读取docx文件: {docx_path}, {e}")
+        return 0
+
+    for paragraph_count, text in enumerate(paragraphs, 1):
+        para_filename = f"paragraph_{paragraph_count}.txt"
+        with open(os.path.join(output_dir, para_filename), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    return len(paragraphs)
+
+
+# 测试功能
+if __name__ == "__main__":
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_dir = os.path.dirname(os.path.dirname(current_dir))
+
+    docx_path = os.path.join(project_dir, "document", "document.docx")
+
+    paragraphs, tables = read_docx(docx_path)
+    print(f"段落数量: {len(paragraphs)}")
+    print(f"表格数量: {len(tables)}")
+    for i, table in enumerate(tables, 1):
+        table_html = table.to_html()
+        preview = table_html[:200] + "..." if len(table_html) > 200 else table_html
+        print(f"表格 {i}: {preview}")
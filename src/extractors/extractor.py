@@ -4,22 +4,21 @@ Word文档提取器 - 封装文档元素提取功能
 """  
 
 import os
+import json
 import shutil
-from . import paragraph_extractor
-from . import table_extractor
+import hashlib
+from . import docx_reader
+from . import html_reader
+from .table_model import model_path_for
 
-def extract_document(html_path, output_dir):
-    """
-    从HTML文件提取所有内容元素
-    
-    参数:
-        html_path: HTML文件路径
-        output_dir: 输出目录路径
-        
-    返回:
-        tuple: (段落数量, 表格数量)
-    """
-    # 检查并清理输出目录
+# 提取器版本号，提取逻辑或输出格式变化时需要更新，使产物缓存失效
+EXTRACTOR_VERSION = "3"
+
+# 表格指纹清单文件名，记录每个table_N.html的内容指纹
+MANIFEST_FILE = "manifest.json"
+
+def _clean_output_dir(output_dir):
+    """检查并清理输出目录"""
     if os.path.exists(output_dir):
         # 删除目录中的所有内容
         for item in os.listdir(output_dir):
@@ -31,12 +30,242 @@ def extract_document(html_path, output_dir):
     else:
         # 创建输出目录
         os.makedirs(output_dir)
+
+def _save_paragraphs(paragraphs, output_dir):
+    """将段落文本保存为paragraph_N.txt"""
+    for paragraph_count, text in enumerate(paragraphs, 1):
+        with open(os.path.join(output_dir, f"paragraph_{paragraph_count}.txt"), 'w', encoding='utf-8') as f:
+            f.write(text)
+    return len(paragraphs)
+
+def fingerprint_table_html(table_html):
+    """表格内容指纹"""
+    return hashlib.sha256(table_html.encode('utf-8')).hexdigest()
+
+def load_manifest(output_dir):
+    """
+    加载提取目录中的表格指纹清单
+    
+    返回:
+        dict: {表格文件名: 指纹}，清单不存在或提取器版本不同时返回空字典
+    """
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except Exception as e:
+        print(f"加载表格指纹清单失败: {e}")
+        return {}
+    if manifest.get("version") != EXTRACTOR_VERSION:
+        return {}
+    return manifest.get("tables", {})
+
+def get_table_fingerprint(table_path):
+    """获取表格文件的指纹，优先读取所在目录的指纹清单，否则按文件内容计算"""
+    fingerprint = load_manifest(os.path.dirname(table_path)).get(os.path.basename(table_path))
+    if fingerprint:
+        return fingerprint
+    with open(table_path, 'r', encoding='utf-8') as f:
+        return fingerprint_table_html(f.read())
+
+class _TableWriter:
+    """
+    按顺序写出table_N.html / table_N.json并维护指纹清单
+    增量模式下内容指纹未变化的表格不重写，已不存在的表格文件被删除；
+    读取中途失败时保留未写到的旧表格
+    """
+    
+    def __init__(self, output_dir, incremental=False):
+        self.output_dir = output_dir
+        self.old_fingerprints = load_manifest(output_dir) if incremental else {}
+        self.fingerprints = {}
+        self.changed = []
+    
+    def write(self, table_html, table_model):
+        table_name = f"table_{len(self.fingerprints) + 1}.html"
+        table_path = os.path.join(self.output_dir, table_name)
+        fingerprint = fingerprint_table_html(table_html)
+        self.fingerprints[table_name] = fingerprint
+        
+        if (self.old_fingerprints.get(table_name) == fingerprint
+                and os.path.exists(table_path) and os.path.exists(model_path_for(table_path))):
+            return
+        
+        with open(table_path, 'w', encoding='utf-8') as f:
+            f.write(table_html)
+        table_model.save(model_path_for(table_path))
+        self.changed.append(table_name)
+    
+    def finish(self, complete=True):
+        """
+        保存指纹清单，返回表格数量
+        complete为True时删除多余的旧表格文件；为False（读取中途失败）时保留旧表格，
+        清单中未写到的表格沿用旧指纹
+        """
+        fingerprints = self.fingerprints
+        if complete:
+            _remove_tables(self.output_dir, [name for name in self.old_fingerprints if name not in fingerprints])
+        else:
+            fingerprints = {**self.old_fingerprints, **fingerprints}
+        
+        with open(os.path.join(self.output_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump({"version": EXTRACTOR_VERSION, "tables": fingerprints}, f, ensure_ascii=False, indent=2)
+        
+        if complete:
+            print(f"总共 {len(self.fingerprints)} 个表格，其中 {len(self.changed)} 个为新增或已变化")
+        else:
+            print(f"读取未完成：已写出 {len(self.fingerprints)} 个表格，其余旧表格保留")
+        return len(self.fingerprints)
+
+def _remove_tables(output_dir, table_names):
+    """删除表格HTML及其表格模型文件"""
+    for table_name in table_names:
+        table_path = os.path.join(output_dir, table_name)
+        for path in (table_path, model_path_for(table_path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+def _save_tables(tables, output_dir, incremental=False, complete=True):
+    """保存(表格HTML, 表格模型)列表，complete为False表示读取失败、列表不完整"""
+    writer = _TableWriter(output_dir, incremental)
+    for table_html, table_model in tables:
+        writer.write(table_html, table_model)
+    return writer.finish(complete)
+
+def _stream_tables(html_path, output_dir, incremental=False):
+    """流式提取表格，每解析完一个表格立即写出，返回(表格数量, 是否完整读取)"""
+    writer = _TableWriter(output_dir, incremental)
+    try:
+        for table_html, table_model in html_reader.iter_tables(html_path, with_models=True):
+            writer.write(table_html, table_model)
+    except Exception as e:
+        print(f"表格流式提取失败: {e}")
+        return writer.finish(complete=False), False
+    return writer.finish(), True
+
+def _prepare_output_dir(output_dir, incremental):
+    """全量模式清空输出目录；增量模式只确保目录存在"""
+    if incremental:
+        os.makedirs(output_dir, exist_ok=True)
+    else:
+        _clean_output_dir(output_dir)
+
+def _count_extracted(output_dir):
+    """统计输出目录中的段落和表格文件数量"""
+    names = os.listdir(output_dir)
+    paragraph_count = sum(1 for name in names if name.startswith('paragraph_') and name.endswith('.txt'))
+    table_count = sum(1 for name in names if name.startswith('table_') and name.endswith('.html'))
+    return paragraph_count, table_count
+
+def _restore_from_cache(cache, key, output_dir, incremental=False):
+    """
+    尝试从产物缓存恢复提取结果，命中时返回(段落数量, 表格数量)，否则返回None
+    未命中时不改动输出目录；命中时全量模式先清空输出目录，
+    增量模式只删除恢复后指纹清单中没有的表格文件
+    """
+    if cache is None:
+        return None
+    if not incremental and cache.contains(key):
+        _clean_output_dir(output_dir)
+    if not cache.restore(key, output_dir):
+        return None
+    if incremental:
+        manifest = load_manifest(output_dir)
+        _remove_tables(output_dir, [name for name in os.listdir(output_dir)
+                                    if name.startswith('table_') and name.endswith('.html')
+                                    and name not in manifest])
+    print("输入文档未变化，已从缓存恢复提取结果")
+    return _count_extracted(output_dir)
+
+def extract_document(html_path, output_dir, cache=None, streaming=False, incremental=False):
+    """
+    从HTML文件提取所有内容元素
+    
+    参数:
+        html_path: HTML文件路径
+        output_dir: 输出目录路径
+        cache: 产物缓存（ArtifactCache），为None时不使用缓存
+        streaming: 是否使用流式模式（增量解析，逐个写出表格，内存占用与文档长度无关），
+            流式模式只提取表格
+        incremental: 是否增量提取，只重写内容有变化或新增的表格文件
+        
+    返回:
+        tuple: (段落数量, 表格数量)
+    """
+    key = cache.make_key(html_path, "extract_html", EXTRACTOR_VERSION) if cache else None
+    counts = _restore_from_cache(cache, key, output_dir, incremental)
+    if counts is not None:
+        return counts
+    
+    _prepare_output_dir(output_dir, incremental)
+    
+    if streaming:
+        # 流式模式：增量解析，逐个写出表格
+        paragraph_count = 0
+        table_count, complete = _stream_tables(html_path, output_dir, incremental)
+    else:
+        # 单次解析HTML，同时得到段落和表格
+        complete = True
+        try:
+            paragraphs, tables = html_reader.read_html(html_path, with_models=True)
+        except Exception as e:
+            print(f"HTML解析失败: {e}")
+            paragraphs, tables = [], []
+            complete = False
+        
+        # 处理段落
+        # paragraph_count = _save_paragraphs(paragraphs, output_dir)
+        paragraph_count = 0
+        
+        # 处理表格
+        table_count = _save_tables(tables, output_dir, incremental, complete)
+    
+    # 只缓存成功的提取结果
+    if cache is not None and complete and (paragraph_count or table_count):
+        cache.store_dir(key, output_dir)
+    
+    return paragraph_count, table_count
+
+def extract_docx_document(docx_path, output_dir, cache=None, incremental=False):
+    """
+    直接从docx文件提取所有内容元素（无需转换为HTML）
+    
+    参数:
+        docx_path: Word文档路径
+        output_dir: 输出目录路径
+        cache: 产物缓存（ArtifactCache），为None时不使用缓存
+        incremental: 是否增量提取，只重写内容有变化或新增的表格文件
+        
+    返回:
+        tuple: (段落数量, 表格数量)
+    """
+    key = cache.make_key(docx_path, "extract_docx", EXTRACTOR_VERSION) if cache else None
+    counts = _restore_from_cache(cache, key, output_dir, incremental)
+    if counts is not None:
+        return counts
+    
+    _prepare_output_dir(output_dir, incremental)
+    
+    complete = True
+    try:
+        paragraphs, tables = docx_reader.read_docx(docx_path)
+    except Exception as e:
+        print(f"docx读取失败: {e}")
+        paragraphs, tables = [], []
+        complete = False
     
     # 处理段落
-    # paragraph_count = paragraph_extractor.extract_paragraphs(html_path, output_dir)
+    # paragraph_count = _save_paragraphs(paragraphs, output_dir)
     paragraph_count = 0
     
     # 处理表格
-    table_count = table_extractor.extract_tables(html_path, output_dir)
+    table_count = _save_tables([(table.to_html(), table) for table in tables], output_dir, incremental,
+                               complete)
+    
+    # 只缓存成功的提取结果
+    if cache is not None and complete and (paragraph_count or table_count):
+        cache.store_dir(key, output_dir)
     
-    return paragraph_count, table_count
\ No newline at end of file
+    return paragraph_count, table_count
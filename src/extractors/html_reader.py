@@ -0,0 +1,245 @@
+"""
+HTML单次解析读取模块
+对Word导出的HTML只解析一次，同时得到段落和清理后的表格，
+输出与paragraph_extractor / table_extractor.create_clean_table完全一致。
+优先使用lxml解析；lxml不可用时退化为带SoupStrainer的BeautifulSoup单次解析。
+另提供基于增量解析的流式表格读取，用于超大HTML文件
+"""
+
+import html
+import codecs
+
+try:
+    from .table_model import Table
+except ImportError:
+    # 作为脚本直接运行时
+    from table_model import Table
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+
+def read_html_text(html_path):
+    """读取HTML文件内容，优先utf-8，失败时使用gbk"""
+    try:
+        with open(html_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except UnicodeDecodeError:
+        with open(html_path, 'r', encoding='gbk') as f:
+            return f.read()
+
+
+def read_html(html_path, with_models=False):
+    """
+    单次解析HTML文件，提取段落和表格
+
+    参数:
+        html_path: Word导出的HTML文件路径
+        with_models: 是否同时构建表格模型
+
+    返回:
+        tuple: (段落文本列表, 表格列表)
+        段落与paragraph_extractor相同（所有<p>/<div>的非空文本），
+        表格为与table_extractor.create_clean_table输出相同的HTML字符串；
+        with_models为True时表格为(HTML字符串, table_model.Table)元组
+    """
+    html_content = read_html_text(html_path)
+    if HAS_LXML:
+        return _read_with_lxml(html_content, with_models)
+    return _read_with_soup(html_content, with_models)
+
+
+def detect_encoding(html_path, chunk_size=1024 * 1024):
+    """按块校验文件是否为utf-8，否则视为gbk（与read_html_text的规则一致）"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    try:
+        with open(html_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'gbk'
+
+
+def iter_tables(html_path, encoding=None, with_models=False):
+    """
+    流式读取HTML中的表格，每解析完一个表格就立即产出并释放其内存
+
+    参数:
+        html_path: Word导出的HTML文件路径
+        encoding: 文件编码，默认自动检测（utf-8或gbk）
+        with_models: 是否同时构建表格模型
+
+    产出:
+        str: 与create_clean_table输出一致的表格HTML，按文档顺序；
+        with_models为True时为(HTML字符串, table_model.Table)元组。
+        嵌套表格在其最外层表格结束时随外层表格一起产出（外层在前），
+        以保持与extract_tables相同的编号
+    """
+    if not HAS_LXML:
+        # 没有lxml时无法增量解析，退化为整体解析
+        _, tables = read_html(html_path, with_models)
+        yield from tables
+        return
+
+    encoding = encoding or detect_encoding(html_path)
+    table_depth = 0
+    context = etree.iterparse(html_path, events=('start', 'end'), html=True, encoding=encoding)
+    for event, element in context:
+        if element.tag == 'table':
+            if event == 'start':
+                table_depth += 1
+                continue
+            table_depth -= 1
+            if table_depth == 0:
+                # 最外层表格结束：依次产出它和其中的嵌套表格
+                for table in element.iter('table'):
+                    clean_table = _clean_table(table, with_models)
+                    if clean_table:
+                        yield clean_table
+        if event == 'end' and table_depth == 0:
+            # 表格之外的元素已处理完毕，释放已解析的节点
+            element.clear()
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+    del context
+
+
+# ================ lxml实现 ================
+
+def _read_with_lxml(html_content, with_models=False):
+    root = lxml.html.document_fromstring(html_content)
+
+    paragraphs = []
+    tables = []
+    # 一次遍历，按文档顺序同时收集段落和表格
+    for element in root.iter('table', 'p', 'div'):
+        if element.tag == 'table':
+            clean_table = _clean_table(element, with_models)
+            if clean_table:
+                tables.append(clean_table)
+        else:
+            text = ''.join(_iter_strings(element)).strip()
+            if text:
+                paragraphs.append(text)
+
+    return paragraphs, tables
+
+
+def _iter_strings(element):
+    """按文档顺序遍历元素内的所有文本（不含注释），与BeautifulSoup的get_text一致"""
+    if isinstance(element.tag, str) and element.text:
+        yield element.text
+    for child in element:
+        yield from _iter_strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _stripped_text(element):
+    """等价于BeautifulSoup的get_text(strip=True)"""
+    return ''.join(s.strip() for s in _iter_strings(element) if s.strip())
+
+
+def _clean_table(table, with_model=False):
+    """
+    与create_clean_table语义一致的表格清理，直接输出HTML字符串
+    with_model为True时返回(HTML字符串, Table)
+    """
+    # 处理表格标题
+    caption_text = None
+    caption = next(table.iterdescendants('caption'), None)
+    if caption is not None:
+        caption_text = _stripped_text(caption) or None
+
+    # 处理所有表格内容（thead, tbody, tfoot）
+    sections = []
+    for section_name in ('thead', 'tbody', 'tfoot'):
+        section = next(table.iterdescendants(section_name), None)
+        if section is None:
+            continue
+        # 空行（全部被上方rowspan占据）保留原位，否则后续行的单元格位置会错开
+        rows = [_clean_row(row) for row in section.iterdescendants('tr')]
+        if any(rows):
+            sections.append((section_name, rows))
+
+    # 处理没有包装在thead/tbody/tfoot中的直接行
+    direct_rows = [_clean_row(row) for row in table.iterchildren('tr')]
+    if any(direct_rows):
+        sections.append((None, direct_rows))
+
+    if not sections:
+        return None
+
+    parts = ['<table>']
+    if caption_text:
+        parts.append(f'<caption>{_escape(caption_text)}</caption>')
+    for section_name, rows in sections:
+        rendered = ''.join(_render_row(row) for row in rows)
+        parts.append(f'<{section_name}>{rendered}</{section_name}>' if section_name else rendered)
+    parts.append('</table>')
+    table_html = ''.join(parts)
+
+    if not with_model:
+        return table_html
+    model = Table.from_rows([row for _, rows in sections for row in rows], caption_text)
+    return table_html, model
+
+
+def _clean_row(row):
+    """返回行内单元格数据[(text, colspan, rowspan, tag), ...]"""
+    return [(_stripped_text(cell), cell.get('colspan'), cell.get('rowspan'), cell.tag)
+            for cell in row.iterdescendants('td', 'th')]
+
+
+def _render_row(cells):
+    parts = ['<tr>']
+    for text, colspan, rowspan, tag in cells:
+        attrs = ''
+        if colspan:
+            attrs += f' colspan="{_escape_attr(colspan)}"'
+        if rowspan:
+            attrs += f' rowspan="{_escape_attr(rowspan)}"'
+        parts.append(f'<{tag}{attrs}>{_escape(text)}</{tag}>')
+    parts.append('</tr>')
+    return ''.join(parts)
+
+
+def _escape(text):
+    return html.escape(text, quote=False)
+
+
+def _escape_attr(value):
+    return html.escape(value, quote=False).replace('"', '&quot;')
+
+
+# ================ BeautifulSoup退化实现 ================
+
+def _read_with_soup(html_content, with_models=False):
+    from bs4 import BeautifulSoup, SoupStrainer
+    from .table_extractor import create_clean_table
+
+    # 只构建table/p/div子树，跳过样式、头部等无关内容
+    soup = BeautifulSoup(html_content, 'html.parser', parse_only=SoupStrainer(['table', 'p', 'div']))
+
+    paragraphs = []
+    tables = []
+    for element in soup.find_all(['table', 'p', 'div']):
+        if element.name == 'table':
+            clean_table = create_clean_table(element)
+            if clean_table:
+                table_html = str(clean_table)
+                tables.append((table_html, Table.from_html(table_html)) if with_models else table_html)
+        else:
+            text = element.get_text().strip()
+            if text:
+                paragraphs.append(text)
+
+    return paragraphs, tables
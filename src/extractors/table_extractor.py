@@ -62,28 +62,25 @@ def create_clean_table(original_table):
         if section:
             new_section = soup.new_tag(section_name)
             _process_rows(section.find_all('tr'), new_section, soup)
-            if new_section.find('tr'):
+            if new_section.find(['td', 'th']):
                 new_table.append(new_section)
     
     # 处理没有包装在thead/tbody/tfoot中的直接行
     direct_rows = original_table.find_all('tr', recursive=False)
-    for row in direct_rows:
-        if row.parent.name == 'table':
-            new_row = _create_clean_row(row, soup)
-            if new_row:
-                new_table.append(new_row)
+    if any(row.find(['td', 'th']) for row in direct_rows):
+        for row in direct_rows:
+            if row.parent.name == 'table':
+                new_table.append(_create_clean_row(row, soup))
     
-    return new_table if new_table.find('tr') else None
+    return new_table if new_table.find(['td', 'th']) else None
 
 def _process_rows(rows, container, soup):
     """处理行集合"""
     for row in rows:
-        new_row = _create_clean_row(row, soup)
-        if new_row:
-            container.append(new_row)
+        container.append(_create_clean_row(row, soup))
 
 def _create_clean_row(original_row, soup):
-    """创建简化的表格行"""
+    """创建简化的表格行，空行（全部被上方rowspan占据）也保留"""
     new_row = soup.new_tag('tr')
     cells = original_row.find_all(['td', 'th'])
     
@@ -102,7 +99,7 @@ def _create_clean_row(original_row, soup):
         
         new_row.append(new_cell)
     
-    return new_row if new_row.find(['td', 'th']) else None
+    return new_row
 
 # 测试功能
 if __name__ == "__main__":
@@ -0,0 +1,290 @@
+"""
+表格内存模型
+紧凑的表格/单元格网格表示，行列合并已解析为网格坐标。
+由提取器构建一次并保存为table_N.json，匹配器和替换器直接加载使用，
+不再各自重复解析表格HTML。
+每个单元格按其左上角网格坐标分配稳定的短ID（列字母+行号，如B2），
+LLM只需输出ID，由索引映射回精确坐标
+"""
+
+import os
+import re
+import json
+import html
+from array import array
+from html.parser import HTMLParser
+
+
+class Cell:
+    """
+    单元格
+
+    属性:
+        text: 单元格文本
+        tag: 标签名（td/th）
+        row: 网格行号（即所在的源行号）
+        col: 网格列号（合并单元格取左上角）
+        rowspan: 跨行数
+        colspan: 跨列数
+        row_pos: 在源行中的序号（HTML中该行第几个td/th）
+        id: 单元格ID（列字母+从1开始的行号，如B2）
+    """
+    __slots__ = ('text', 'tag', 'row', 'col', 'rowspan', 'colspan', 'row_pos', 'id')
+
+    def __init__(self, text, tag='td', row=0, col=0, rowspan=1, colspan=1, row_pos=0):
+        self.text = text
+        self.tag = tag
+        self.row = row
+        self.col = col
+        self.rowspan = rowspan
+        self.colspan = colspan
+        self.row_pos = row_pos
+        self.id = make_cell_id(row, col)
+
+    def __repr__(self):
+        return f"Cell({self.id}: {self.text!r}, pos=({self.row}, {self.col}), span=({self.rowspan}, {self.colspan}))"
+
+
+class Table:
+    """
+    表格网格
+
+    grid为按行展开的array('i')，每个网格位置保存覆盖它的单元格序号，-1表示空位
+    """
+    __slots__ = ('cells', 'rows', 'n_rows', 'n_cols', 'grid', 'caption', 'id_index')
+
+    def __init__(self, cells, rows, n_rows, n_cols, grid, caption=None):
+        self.cells = cells
+        self.rows = rows
+        self.n_rows = n_rows
+        self.n_cols = n_cols
+        self.grid = grid
+        self.caption = caption
+        # 单元格ID -> 单元格序号
+        self.id_index = {cell.id: index for index, cell in enumerate(cells)}
+
+    # ================ 构建 ================
+
+    @classmethod
+    def from_rows(cls, rows, caption=None):
+        """
+        根据源行数据构建表格，按HTML表格规则解析合并单元格
+
+        参数:
+            rows: [[(text, colspan, rowspan, tag), ...], ...]，空行（全部被上方rowspan占据的行）保留原位
+            caption: 表格标题
+        """
+        cells = []
+        row_indices = []
+        occupied = {}
+        n_cols = 0
+
+        for r, row in enumerate(rows):
+            c = 0
+            indices = []
+            for row_pos, (text, colspan, rowspan, tag) in enumerate(row):
+                while (r, c) in occupied:
+                    c += 1
+                colspan = _to_span(colspan)
+                rowspan = _to_span(rowspan)
+                index = len(cells)
+                cells.append(Cell(text, tag, r, c, rowspan, colspan, row_pos))
+                indices.append(index)
+                for dr in range(rowspan):
+                    for dc in range(colspan):
+                        occupied[(r + dr, c + dc)] = index
+                c += colspan
+                n_cols = max(n_cols, c)
+            row_indices.append(indices)
+
+        # 只保留实际存在的行，越界的rowspan在网格中截断
+        n_rows = len(rows)
+        grid = array('i', [-1]) * (n_rows * n_cols)
+        for (r, c), index in occupied.items():
+            if r < n_rows:
+                grid[r * n_cols + c] = index
+
+        return cls(cells, row_indices, n_rows, n_cols, grid, caption)
+
+    @classmethod
+    def from_html(cls, table_html):
+        """从精简表格HTML（table_N.html）构建"""
+        parser = _CleanTableParser()
+        parser.feed(table_html)
+        parser.close()
+        return cls.from_rows(parser.rows, parser.caption)
+
+    # ================ 访问 ================
+
+    def cell_at(self, row, col):
+        """返回覆盖网格位置(row, col)的单元格，越界或空位返回None"""
+        if not (0 <= row < self.n_rows and 0 <= col < self.n_cols):
+            return None
+        index = self.grid[row * self.n_cols + col]
+        return self.cells[index] if index >= 0 else None
+
+    def cell_by_id(self, cell_id):
+        """按单元格ID查找单元格（忽略大小写和空白），不存在时返回None"""
+        if not isinstance(cell_id, str):
+            return None
+        index = self.id_index.get(cell_id.strip().upper())
+        return self.cells[index] if index is not None else None
+
+    def row_cells(self, row):
+        """返回源行row中的所有单元格"""
+        return [self.cells[index] for index in self.rows[row]]
+
+    def find_cells(self, text):
+        """返回文本等于text的所有单元格"""
+        return [cell for cell in self.cells if cell.text == text]
+
+    # ================ 序列化 ================
+
+    def to_html(self, cell_ids=False):
+        """
+        渲染为与create_clean_table一致的精简HTML
+        cell_ids为True时为每个单元格加上id属性，供LLM按ID引用单元格
+        """
+        parts = ['<table>']
+        if self.caption:
+            parts.append(f'<caption>{html.escape(self.caption, quote=False)}</caption>')
+        for indices in self.rows:
+            parts.append('<tr>')
+            for index in indices:
+                cell = self.cells[index]
+                attrs = f' id="{cell.id}"' if cell_ids else ''
+                if cell.colspan > 1:
+                    attrs += f' colspan="{cell.colspan}"'
+                if cell.rowspan > 1:
+                    attrs += f' rowspan="{cell.rowspan}"'
+                parts.append(f'<{cell.tag}{attrs}>{html.escape(cell.text, quote=False)}</{cell.tag}>')
+            parts.append('</tr>')
+        parts.append('</table>')
+        return ''.join(parts)
+
+    def to_dict(self):
+        """紧凑的可序列化形式：每行为[text, colspan, rowspan, tag]列表"""
+        rows = []
+        for indices in self.rows:
+            rows.append([[self.cells[i].text, self.cells[i].colspan, self.cells[i].rowspan, self.cells[i].tag]
+                         for i in indices])
+        return {"caption": self.caption, "rows": rows}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls.from_rows([[tuple(cell) for cell in row] for row in data["rows"]], data.get("caption"))
+
+    def save(self, json_path):
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, json_path):
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def model_path_for(table_html_path):
+    """table_N.html对应的表格模型文件路径（table_N.json）"""
+    return os.path.splitext(table_html_path)[0] + '.json'
+
+
+def load_table(table_html_path):
+    """
+    加载提取器生成的表格模型
+    优先读取table_N.json，不存在时（旧的提取结果）从table_N.html构建
+    """
+    json_path = model_path_for(table_html_path)
+    if os.path.exists(json_path):
+        return Table.load(json_path)
+    with open(table_html_path, 'r', encoding='utf-8') as f:
+        return Table.from_html(f.read())
+
+
+def load_table_by_number(extract_dir, table_number):
+    """按表格编号加载表格模型，文件不存在时返回None"""
+    table_html_path = os.path.join(extract_dir, f"table_{table_number}.html")
+    if not os.path.exists(table_html_path) and not os.path.exists(model_path_for(table_html_path)):
+        return None
+    return load_table(table_html_path)
+
+
+def parse_position(value_pos):
+    """
+    解析位置信息，支持"(行, 列)"字符串和[行, 列]列表两种格式
+
+    返回:
+        tuple: (row, col)，无法解析时返回(None, None)
+    """
+    if isinstance(value_pos, (list, tuple)) and len(value_pos) == 2:
+        try:
+            return int(value_pos[0]), int(value_pos[1])
+        except (TypeError, ValueError):
+            return None, None
+    if isinstance(value_pos, str):
+        match = re.search(r'(\d+)\s*[,，]\s*(\d+)', value_pos)
+        if match:
+            return int(match.group(1)), int(match.group(2))
+    return None, None
+
+
+def format_position(row, col):
+    """格式化为matcher输出使用的"(行, 列)"字符串"""
+    return f"({row}, {col})"
+
+
+def make_cell_id(row, col):
+    """网格坐标 -> 单元格ID，如(0, 0) -> A1，(1, 27) -> AB2"""
+    letters = ''
+    col += 1
+    while col:
+        col, remainder = divmod(col - 1, 26)
+        letters = chr(ord('A') + remainder) + letters
+    return f"{letters}{row + 1}"
+
+
+def _to_span(value):
+    try:
+        span = int(value)
+    except (TypeError, ValueError):
+        return 1
+    return span if span > 0 else 1
+
+
+class _CleanTableParser(HTMLParser):
+    """解析精简表格HTML（不含嵌套表格）"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self.caption = None
+        self.row = None
+        self.cell = None
+        self.in_caption = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self.row = []
+        elif tag in ('td', 'th') and self.row is not None:
+            attrs = dict(attrs)
+            self.cell = [[], attrs.get('colspan', 1), attrs.get('rowspan', 1), tag]
+        elif tag == 'caption':
+            self.in_caption = True
+            self.caption = ''
+
+    def handle_endtag(self, tag):
+        if tag in ('td', 'th') and self.cell is not None:
+            text_parts, colspan, rowspan, cell_tag = self.cell
+            self.row.append((''.join(text_parts), colspan, rowspan, cell_tag))
+            self.cell = None
+        elif tag == 'tr' and self.row is not None:
+            self.rows.append(self.row)
+            self.row = None
+        elif tag == 'caption':
+            self.in_caption = False
+
+    def handle_data(self, data):
+        if self.cell is not None:
+            self.cell[0].append(data)
+        elif self.in_caption:
+            self.caption += data
@@ -5,15 +5,19 @@ Word文档智能模板生成系统 - 主程序
 
 import os  
 import time
-from converter.converter import word_to_html
-from extractors.extractor import extract_document
+from extractors.extractor import extract_docx_document
 from matchers.matcher import match_document
+from matchers.model_cascade import get_cascade_stats
+from matchers.table_matcher import PIPELINE_STAGE_2
 from replacers.replacer import replace_document
 from models.model_manager import llm_manager
+from cache.artifact_cache import ArtifactCache
+from cache.llm_cache import LLMResponseCache
 
 def main():
     """
-    主流程：按照LLM初始化 → 转换 → 提取 → 匹配 → 替换的顺序执行
+    主流程：按照LLM初始化 → 提取 → 匹配 → 替换的顺序执行
+    提取阶段直接读取docx，不再通过Word转换为HTML
     """
     print("===== Word文档智能模板生成系统 =====\n")
     
@@ -24,11 +28,46 @@ def main():
     project_dir = os.path.dirname(src_dir)  # 向上一级到项目根目录
     doc_dir = os.path.join(project_dir, "document")
     doc_path = os.path.join(doc_dir, "document.docx")
-    html_path = os.path.join(doc_dir, "document.html")
     extract_dir = os.path.join(doc_dir, "document_extract")
     key_descriptions_dir = os.path.join(doc_dir, "key_descriptions")
     match_results_dir = os.path.join(doc_dir, "match_results")
     template_doc_path = os.path.join(doc_dir, "template.docx")
+    cache_dir = os.path.join(doc_dir, "artifact_cache")
+    llm_cache_path = os.path.join(doc_dir, "llm_cache", "responses.sqlite3")
+    # 是否使用LLM响应缓存，调试提示词效果需要每次重新推理时设为False
+    use_llm_cache = True
+    # 按两阶段的输出schema约束生成（本地模型语法采样，远程API使用response_format）
+    use_constrained_decoding = True
+    # 流式生成，检测到循环重复或超过单次调用的时间预算（秒）时提前停止
+    use_streaming = True
+    generation_time_budget = 300
+    # 本地模型的投机解码: None / "prompt_lookup"（从提示词复制草稿）/ models目录下同词表的草稿模型文件名
+    local_draft = "prompt_lookup"
+    # 常驻的本地推理服务（python src/models/inference_server.py）运行时直接使用其中已加载的模型，
+    # 不再每次运行都加载模型；服务未运行时在进程内加载，设为None时总在进程内加载
+    local_server_url = "http://127.0.0.1:8765"
+    # 小模型→主模型级联：先用小模型生成，校验不通过时再用主模型（models目录下没有小模型时只用主模型）
+    use_model_cascade = True
+    small_model_name = "Qwen3-0.6B-Q8_0.gguf"
+    # 发送给LLM的表格格式，可选: html / markdown / tsv / cells
+    table_format = "html"
+    # 同时进行的表格匹配数上限，使用远程模型时并发调用LLM
+    max_workers = 4
+    # 第一阶段先按规则提取key-value，只有版式复杂的表格调用LLM
+    use_rules = True
+    # 第二阶段先用key词汇索引匹配字面一致的key
+    use_lexical = True
+    # 第二阶段再用key向量索引匹配，需要models目录下有嵌入模型
+    use_embeddings = True
+    # 第二阶段提示词中每个key保留的候选key数，key总数不超过该值时使用完整的key描述文件
+    shortlist_k = 20
+    # 匹配方式: two_stage（两阶段）/ combined（每个表格单次调用LLM，对比见benchmarks/bench_match_modes.py）
+    match_mode = "two_stage"
+    # 两阶段流水线：表格N的第二阶段与表格N+1的第一阶段同时进行，各阶段的工作线程数（本地模型各为1）
+    use_pipeline = True
+    stage_workers = (2, 2)
+    # 本地模型为第二阶段单独加载一个模型实例（内存占用翻倍），两个阶段的推理才能重叠
+    pin_stage_model = False
 
     # 确保目录存在
     os.makedirs(extract_dir, exist_ok=True)
@@ -36,27 +75,46 @@ def main():
     os.makedirs(key_descriptions_dir, exist_ok=True)
     os.makedirs(os.path.dirname(template_doc_path), exist_ok=True)
     
+    # 产物缓存：输入文档未变化时跳过提取，直接进入匹配
+    artifact_cache = ArtifactCache(cache_dir)
+    # LLM响应缓存：提示词和模型都未变化时直接复用之前的输出
+    if use_llm_cache:
+        llm_manager.set_response_cache(LLMResponseCache(llm_cache_path))
+    llm_manager.set_constrained_decoding(use_constrained_decoding)
+    llm_manager.set_streaming(use_streaming, time_budget=generation_time_budget)
+    
+    def load_models():
+        """加载各模型，返回嵌入模型是否可用"""
+        llm_manager.init_local_model(draft=local_draft, server_url=local_server_url)
+        if use_pipeline and pin_stage_model:
+            llm_manager.init_stage_model(PIPELINE_STAGE_2)
+        # 复用各表格提示词共同前缀（任务说明、key描述文件）的KV状态
+        llm_manager.enable_prompt_cache()
+        if use_model_cascade:
+            llm_manager.init_small_model(small_model_name, server_url=local_server_url)
+        return use_embeddings and llm_manager.init_embedding_model()
+    
     try:
-        # 步骤1: 初始化LLM模型
-        print("===== 步骤1: 初始化语言模型 =====")
-        llm_manager.init_local_model()
-        print("远程模型初始化完成\n")
-          # 步骤2: Word文档转换为HTML
-        print("===== 步骤2: 文档转换 =====")
-        word_to_html(doc_path, html_path)
-        print(f"Word文档已转换为HTML: {html_path}\n")
-        
-        # 步骤3: 提取文档元素
-        print("===== 步骤3: 文档元素提取 =====")
-        paragraph_count, table_count = extract_document(html_path, extract_dir)
+        # 步骤1: 初始化LLM模型（后台加载，同时进行文档提取）
+        print("===== 步骤1: 初始化语言模型（后台加载） =====\n")
+        models_ready = llm_manager.load_in_background(load_models)
+        # 步骤2: 提取文档元素
+        print("===== 步骤2: 文档元素提取 =====")
+        paragraph_count, table_count = extract_docx_document(doc_path, extract_dir, cache=artifact_cache,
+                                                                incremental=True)
         print(f"文档元素提取完成:")
         print(f"  - 段落数量: {paragraph_count}")
         print(f"  - 表格数量: {table_count}")
         print(f"  - 总元素数: {paragraph_count + table_count}")
-        print(f"  - 保存位置: {extract_dir}\n")
+        print(f"  - 保存位置: {extract_dir}")
+        cache_stats = artifact_cache.get_stats()
+        print(f"  - 缓存命中/未命中: {cache_stats['hits']}/{cache_stats['misses']}\n")
         
-        # 步骤4: 智能语义匹配
-        print("===== 步骤4: 智能语义匹配 =====")
+        # 步骤3: 智能语义匹配
+        print("===== 步骤3: 智能语义匹配 =====")
+        wait_start = time.time()
+        use_embeddings = models_ready.result()
+        print(f"模型加载完成（等待 {time.time() - wait_start:.2f} 秒）\n")
 
         extracted_files = [
             # os.path.join(project_dir, "document/document_extract/table_5.html"),
@@ -69,20 +127,42 @@ def main():
             match_stats = {} # 或者根据需要进行其他处理
         else:
             print(f"将对以下提取的文件进行匹配: {extracted_files}\n")
-            match_stats = match_document(extracted_files, key_descriptions_dir, match_results_dir)
+            match_stats = match_document(extracted_files, key_descriptions_dir, match_results_dir, table_format,
+                                         incremental=True, group_repeated=True,
+                                         max_workers=max_workers, use_rules=use_rules,
+                                         use_embeddings=use_embeddings, use_lexical=use_lexical,
+                                         shortlist_k=shortlist_k, match_mode=match_mode,
+                                         pipeline=use_pipeline, stage_workers=stage_workers)
         
         if match_stats:
             print(f"匹配结果统计:")
             print(f"  - 处理表格数: {match_stats.get('total_tables_processed', 0)}")
             print(f"  - 匹配字段数: {match_stats.get('total_keys_matched', 0)}")
             print(f"  - 有匹配表格数: {match_stats.get('tables_with_matches', 0)}")
+            print(f"  - 未变化跳过数: {match_stats.get('tables_skipped', 0)}")
+            print(f"  - 重复表格沿用数: {match_stats.get('tables_projected', 0)}")
+            llm_cache_stats = llm_manager.get_cache_stats()
+            if llm_cache_stats:
+                print(f"  - LLM缓存命中率: {llm_cache_stats['hit_rate']:.0%}"
+                      f"（{llm_cache_stats['hits']}/{llm_cache_stats['hits'] + llm_cache_stats['misses']}）")
+            print(f"  - KV状态复用节省: {match_stats.get('prompt_eval_saved', 0):.2f} 秒")
+            generation_stats = llm_manager.get_generation_stats()
+            aborted = sum(generation_stats[reason] for reason in ("repetition", "max_tokens", "timeout", "incomplete"))
+            print(f"  - 流式生成: {generation_stats['calls']} 次，中止 {aborted} 次"
+                  f"（重复 {generation_stats['repetition']}，超时 {generation_stats['timeout']}）")
+            for stage, stats in get_cascade_stats().items():
+                saved = f"{stats['saved_time']:.2f} 秒" if stats['saved_time'] is not None else "无法估算"
+                print(f"  - 级联（{stage}）: 小模型命中 {stats['small_hits']}/{stats['calls']}（{stats['hit_rate']:.0%}），"
+                      f"小模型 {stats['small_time']:.2f} 秒，主模型 {stats['large_time']:.2f} 秒，估算节省 {saved}")
+            print(f"  - 匹配耗时: {match_stats.get('wall_time', 0):.2f} 秒（加速比 {match_stats.get('speedup', 1):.2f}x，"
+                  f"{match_stats.get('tables_per_minute', 0):.1f} 表格/分钟）")
             print(f"  - 保存位置: {match_results_dir}\n")
         else:
             print("未找到任何匹配结果\n")
         
-        # 步骤5: 生成模板文档
-        print("===== 步骤5: 模板文档生成 =====")
-        replace_document(doc_path, match_results_dir, template_doc_path)
+        # 步骤4: 生成模板文档
+        print("===== 步骤4: 模板文档生成 =====")
+        replace_document(doc_path, match_results_dir, template_doc_path, extract_dir)
         print(f"模板文档生成完成: {template_doc_path}\n")
         
         # 计算总耗时
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+key描述文件解析模块
+table_key_description.txt每行为“key：描述”（全角或半角冒号），描述中可用“|”分隔多个别名，
+解析为key条目列表，供第二阶段的索引和候选筛选使用
+"""
+
+import os
+import re
+
+
+class KeyEntry:
+    """
+    key描述文件中的一个条目
+
+    属性:
+        key: 模板中使用的key（如key_relative_humidity）
+        description: key的描述（如相对湿度）
+        line: 描述文件中的原始行
+    """
+    __slots__ = ('key', 'description', 'line')
+
+    def __init__(self, key, description, line):
+        self.key = key
+        self.description = description
+        self.line = line
+
+    def __repr__(self):
+        return f"KeyEntry({self.key!r}: {self.description!r})"
+
+    def key_words(self):
+        """key名称拆分出的词，如key_Bx1_max_temperature -> Bx1 max temperature"""
+        name = self.key[4:] if self.key.lower().startswith('key_') else self.key
+        return ' '.join(part for part in re.split(r'[_\-\s]+', name) if part)
+
+    def search_text(self):
+        """用于检索的文本：描述 + key名称中的词"""
+        return f"{self.description} {self.key_words()}".strip()
+
+
+_catalog_cache = {}
+
+
+def parse_key_description(text):
+    """解析key描述文本，返回KeyEntry列表（跳过空行和不含key的行）"""
+    entries = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        parts = re.split(r'[：:]', line, maxsplit=1)
+        key = parts[0].strip()
+        if not key:
+            continue
+        description = parts[1].strip() if len(parts) > 1 else ''
+        entries.append(KeyEntry(key, description, line))
+    return entries
+
+
+def load_key_catalog(key_description_path):
+    """加载key描述文件，按文件修改时间和大小缓存解析结果"""
+    stat = os.stat(key_description_path)
+    cache_key = (os.path.abspath(key_description_path), stat.st_mtime_ns, stat.st_size)
+    entries = _catalog_cache.get(cache_key)
+    if entries is None:
+        with open(key_description_path, 'r', encoding='utf-8') as f:
+            entries = parse_key_description(f.read())
+        _catalog_cache[cache_key] = entries
+    return entries
+
+
+def render_key_description(entries):
+    """把key条目渲染回key描述文件的格式"""
+    return '\n'.join(entry.line for entry in entries)
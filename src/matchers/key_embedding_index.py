@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+key向量索引模块
+key描述文件中的条目用本地GGUF嵌入模型（llama-cpp）编码一次，组成归一化的NumPy矩阵；
+第二阶段把一个表格的所有old_key一次批量编码，按余弦相似度取top-k。
+最高相似度足够高且与第二名拉开差距的key直接确定new_key，
+相似度低或前两名接近的key仍交给LLM判断
+"""
+
+import os
+import sys
+import importlib.util
+
+# NumPy在建立索引时才导入，不影响程序启动
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+from models.model_manager import llm_manager
+from matchers.key_catalog import load_key_catalog
+
+# 直接接受匹配的最低相似度
+DEFAULT_ACCEPT_SIMILARITY = 0.85
+# 第一名与第二名相似度的最小差距，小于该值视为难以区分
+DEFAULT_MIN_MARGIN = 0.05
+
+
+class KeyEmbeddingIndex:
+    """
+    key描述向量索引
+
+    属性:
+        entries: KeyEntry列表
+        matrix: 归一化后的向量矩阵，形状为(条目数, 维度)
+    """
+
+    def __init__(self, entries, embed_fn):
+        """
+        Args:
+            entries: KeyEntry列表
+            embed_fn: 批量编码函数，输入文本列表，返回向量列表
+        """
+        import numpy as np
+        self.entries = entries
+        self.embed_fn = embed_fn
+        self.matrix = _normalize(np.asarray(embed_fn([entry.search_text() for entry in entries]),
+                                            dtype=np.float32)) if entries else None
+
+    def search(self, texts, top_k=5):
+        """
+        批量检索
+
+        Args:
+            texts: 查询文本列表（一次编码）
+            top_k: 每个查询返回的候选数
+
+        Returns:
+            list: 每个查询一个[(KeyEntry, 相似度), ...]，按相似度降序
+        """
+        if not texts or self.matrix is None:
+            return [[] for _ in texts]
+        import numpy as np
+        vectors = _normalize(np.asarray(self.embed_fn(list(texts)), dtype=np.float32))
+        similarities = vectors @ self.matrix.T
+        k = min(top_k, len(self.entries))
+        results = []
+        for row in similarities:
+            top = np.argpartition(-row, k - 1)[:k]
+            top = top[np.argsort(-row[top])]
+            results.append([(self.entries[i], float(row[i])) for i in top])
+        return results
+
+    def resolve(self, key_value_pairs, accept_similarity=DEFAULT_ACCEPT_SIMILARITY, min_margin=DEFAULT_MIN_MARGIN):
+        """
+        用向量相似度确定第一阶段key对应的new_key
+
+        Args:
+            key_value_pairs: 第一阶段结果[{"key", "value", "valuePos", "valueId"}]
+            accept_similarity: 直接接受的最低相似度
+            min_margin: 第一名与第二名的最小差距
+
+        Returns:
+            tuple: (已确定的结果列表（与第二阶段输出格式一致）, 需要交给LLM的key-value列表)
+        """
+        matched = []
+        remaining = []
+        candidates = self.search([item["key"] for item in key_value_pairs], top_k=2)
+        for item, top in zip(key_value_pairs, candidates):
+            if not top:
+                remaining.append(item)
+                continue
+            best_entry, best = top[0]
+            second = top[1][1] if len(top) > 1 else -1.0
+            if best >= accept_similarity and best - second >= min_margin:
+                matched.append({
+                    "old_key": item["key"],
+                    "value": item["value"],
+                    "new_key": best_entry.key,
+                    "valuePos": item.get("valuePos", ""),
+                    "valueId": item.get("valueId", "")
+                })
+            else:
+                remaining.append(item)
+        return matched, remaining
+
+
+_index_cache = {}
+
+
+def get_key_embedding_index(key_description_path):
+    """
+    获取key描述文件的向量索引，按文件内容和嵌入模型缓存
+
+    Returns:
+        KeyEmbeddingIndex: 未加载嵌入模型或缺少NumPy时返回None
+    """
+    if not HAS_NUMPY:
+        print("未安装NumPy，无法使用key向量索引")
+        return None
+    if llm_manager.embedding_model is None:
+        print("未加载嵌入模型，无法使用key向量索引")
+        return None
+
+    entries = load_key_catalog(key_description_path)
+    cache_key = (id(entries), llm_manager.embedding_model_id)
+    index = _index_cache.get(cache_key)
+    if index is None:
+        index = KeyEmbeddingIndex(entries, llm_manager.embed)
+        _index_cache.clear()
+        _index_cache[cache_key] = index
+        print(f"已为 {len(entries)} 个key建立向量索引")
+    return index
+
+
+def _normalize(matrix):
+    import numpy as np
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+key词汇索引模块
+把key描述文件编译为归一化的词汇索引：全角/半角折叠（NFKC）、忽略大小写、去除空白和标点，
+key名称、key名称中的词、描述以及描述中用“|”分隔的别名都作为索引词，构建Aho-Corasick自动机。
+第二阶段中old_key与索引词完全相同（精确命中），或old_key完全由同一个key的索引词组成
+（近似命中，如“key_relative_humidity：相对湿度”）时直接确定new_key，无需调用LLM。
+只是包含某个key的索引词（如“最低相对湿度”“Sp1测量点的温度差”）时含义可能不同，
+不直接确定，只作为候选key交给LLM
+"""
+
+import os
+import sys
+import unicodedata
+from collections import deque
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+from matchers.key_catalog import load_key_catalog
+
+# 词汇索引版本号，命中规则变化时需要更新，使增量匹配结果失效
+LEXICAL_INDEX_VERSION = "2"
+# 近似命中时，匹配到的索引词至少覆盖old_key归一化文本的比例；
+# 低于1.0时“最低相对湿度”之类只包含索引词、含义不同的key也会被直接确定
+DEFAULT_MIN_COVERAGE = 1.0
+# 索引词的最小长度，过短的词容易误命中
+MIN_TERM_LENGTH = 2
+
+
+def normalize_text(text):
+    """全角/半角折叠、转小写，去除空白、标点和下划线"""
+    text = unicodedata.normalize('NFKC', text).lower()
+    return ''.join(ch for ch in text
+                   if not unicodedata.category(ch).startswith(('P', 'Z', 'C')) and not ch.isspace())
+
+
+def entry_terms(entry):
+    """key条目的所有索引词（已归一化）"""
+    name = entry.key[4:] if entry.key.lower().startswith('key_') else entry.key
+    texts = [entry.key, name, entry.key_words()]
+    texts.extend(alias for alias in entry.description.split('|'))
+    terms = []
+    for text in texts:
+        term = normalize_text(text)
+        if len(term) >= MIN_TERM_LENGTH and term not in terms:
+            terms.append(term)
+    return terms
+
+
+class KeyLexicalIndex:
+    """
+    基于Aho-Corasick自动机的key词汇索引
+
+    属性:
+        entries: KeyEntry列表
+        terms: 索引词 -> 条目序号集合
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.terms = {}
+        for index, entry in enumerate(entries):
+            for term in entry_terms(entry):
+                self.terms.setdefault(term, set()).add(index)
+        self._build_automaton()
+
+    def _build_automaton(self):
+        """构建goto/fail/output表，节点0为根节点"""
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for term in self.terms:
+            node = 0
+            for ch in term:
+                next_node = self.goto[node].get(ch)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][ch] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = next_node
+            self.output[node].append(term)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(ch, 0)
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find_terms(self, normalized):
+        """返回归一化文本中出现的所有索引词[(结束位置, 索引词), ...]"""
+        found = []
+        node = 0
+        for pos, ch in enumerate(normalized):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for term in self.output[node]:
+                found.append((pos, term))
+        return found
+
+    def lookup(self, text, min_coverage=DEFAULT_MIN_COVERAGE):
+        """
+        查找文本对应的key条目
+
+        Returns:
+            KeyEntry: 精确或近似命中的唯一条目，无法确定时返回None
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        # 精确命中
+        indices = self.terms.get(normalized)
+        if indices is not None:
+            return self.entries[next(iter(indices))] if len(indices) == 1 else None
+
+        # 近似命中：出现的索引词都指向同一个条目，且覆盖了整个文本
+        indices, coverage = self._term_hits(normalized)
+        if len(indices) != 1 or coverage < min_coverage:
+            return None
+        return self.entries[next(iter(indices))]
+
+    def _term_hits(self, normalized):
+        """文本中出现的索引词指向的条目序号集合，以及这些索引词覆盖文本的比例"""
+        indices = set()
+        covered = [False] * len(normalized)
+        for end, term in self.find_terms(normalized):
+            indices.update(self.terms[term])
+            for pos in range(end - len(term) + 1, end + 1):
+                covered[pos] = True
+        return indices, sum(covered) / len(normalized) if normalized else 0.0
+
+    def candidates(self, key_value_pairs):
+        """
+        未命中的key中包含的索引词指向的条目，作为第二阶段LLM的候选key
+
+        Returns:
+            list: KeyEntry列表，保持key描述文件中的顺序
+        """
+        selected = set()
+        for item in key_value_pairs:
+            normalized = normalize_text(item["key"])
+            if normalized:
+                selected.update(self._term_hits(normalized)[0])
+        return [entry for index, entry in enumerate(self.entries) if index in selected]
+
+    def resolve(self, key_value_pairs, min_coverage=DEFAULT_MIN_COVERAGE):
+        """
+        用词汇索引确定第一阶段key对应的new_key
+
+        Returns:
+            tuple: (已确定的结果列表（与第二阶段输出格式一致）, 未命中的key-value列表)
+        """
+        matched = []
+        remaining = []
+        for item in key_value_pairs:
+            entry = self.lookup(item["key"], min_coverage)
+            if entry is None:
+                remaining.append(item)
+                continue
+            matched.append({
+                "old_key": item["key"],
+                "value": item["value"],
+                "new_key": entry.key,
+                "valuePos": item.get("valuePos", ""),
+                "valueId": item.get("valueId", "")
+            })
+        return matched, remaining
+
+
+_index_cache = {}
+
+
+def get_key_lexical_index(key_description_path):
+    """获取key描述文件的词汇索引，按文件内容缓存"""
+    entries = load_key_catalog(key_description_path)
+    index = _index_cache.get(id(entries))
+    if index is None:
+        index = KeyLexicalIndex(entries)
+        _index_cache.clear()
+        _index_cache[id(entries)] = index
+    return index
+
+
+# 测试功能
+if __name__ == "__main__":
+    key_description_path = os.path.join(os.path.dirname(project_dir), "document", "key_descriptions",
+                                        "table_key_description.txt")
+    index = get_key_lexical_index(key_description_path)
+    for text in ["相对湿度", "key_relative_humidity：相对湿度", "Relative humidity", "ＳＰ１ temperature",
+                 "Bx1 Max", "温度", "最低相对湿度", "Sp1测量点的温度差"]:
+        entry = index.lookup(text)
+        candidates = [candidate.key for candidate in index.candidates([{"key": text}])] if entry is None else []
+        print(f"{text!r} -> {entry.key if entry else None} {candidates if candidates else ''}")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+第二阶段候选key筛选模块
+生产环境的key描述文件有数千个key，整体放进第二阶段提示词会超出n_ctx，提示词计算也会成为主要耗时。
+按表格中提取到的每个key（及其value中单位对应的物理量）检索相似度最高的top-k个候选
+（词和字符n-gram的TF-IDF，可叠加向量索引），
+只把候选的并集渲染进placeholder_key_description。
+key总数不超过top-k时保留完整的描述文件，提示词与不筛选时完全相同（不影响前缀KV复用）
+"""
+
+import os
+import re
+import sys
+import math
+import unicodedata
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+from matchers.key_catalog import load_key_catalog
+
+# 每个key保留的候选数
+DEFAULT_TOP_K = 20
+
+# value中的单位 -> 物理量词，补充到检索文本中（如“Sp1”的值为“29.3℃”时按“Sp1 温度 temperature”检索）
+UNIT_HINTS = [
+    (re.compile(r'℃|°C|°F|°'), "温度 temperature"),
+    (re.compile(r'%\s*RH|RH', re.IGNORECASE), "湿度 humidity"),
+    (re.compile(r'\d\s*(kV|mV|V)\b'), "电压 voltage"),
+    (re.compile(r'\d\s*(kA|mA|A)\b'), "电流 current"),
+    (re.compile(r'\d\s*(km|cm|mm|m)\b'), "距离 distance"),
+]
+
+
+# 英文/数字词和连续的中文
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+|[\u4e00-\u9fff]+')
+
+
+def _features(text):
+    """
+    检索特征计数：英文/数字词整词及带词边界的字符三元组（sp1与sp11可区分），中文取字符二元组
+    """
+    features = {}
+
+    def add(feature):
+        features[feature] = features.get(feature, 0) + 1
+
+    for token in TOKEN_PATTERN.findall(unicodedata.normalize('NFKC', text).lower()):
+        if token.isascii():
+            add(f"w:{token}")
+            marked = f"#{token}#"
+            for i in range(len(marked) - 2):
+                add(marked[i:i + 3])
+        elif len(token) == 1:
+            add(token)
+        else:
+            for i in range(len(token) - 1):
+                add(token[i:i + 2])
+    return features
+
+
+def query_text(item):
+    """候选检索文本：key加上value中单位对应的物理量词"""
+    value = item.get("value") or ""
+    hints = [hint for pattern, hint in UNIT_HINTS if pattern.search(value)]
+    return " ".join([item["key"]] + hints)
+
+
+class KeyNgramIndex:
+    """
+    key描述的TF-IDF倒排索引（词频取对数），按余弦相似度检索
+    """
+
+    def __init__(self, entries):
+        self.entries = entries
+        doc_grams = [_features(f"{entry.key} {entry.search_text()}") for entry in entries]
+        document_frequency = {}
+        for grams in doc_grams:
+            for gram in grams:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+        self.idf = {gram: math.log(1 + len(entries) / df) for gram, df in document_frequency.items()}
+
+        # 特征 -> [(条目序号, 权重), ...]
+        self.postings = {}
+        self.norms = []
+        for index, grams in enumerate(doc_grams):
+            norm = 0.0
+            for gram, count in grams.items():
+                weight = (1 + math.log(count)) * self.idf[gram]
+                self.postings.setdefault(gram, []).append((index, weight))
+                norm += weight * weight
+            self.norms.append(math.sqrt(norm) or 1.0)
+
+    def search(self, text, top_k=DEFAULT_TOP_K):
+        """返回与text最相似的top_k个条目[(KeyEntry, 相似度), ...]，按相似度降序"""
+        scores = {}
+        query_norm = 0.0
+        for gram, count in _features(text).items():
+            idf = self.idf.get(gram)
+            if idf is None:
+                continue
+            weight = (1 + math.log(count)) * idf
+            query_norm += weight * weight
+            for index, doc_weight in self.postings[gram]:
+                scores[index] = scores.get(index, 0.0) + weight * doc_weight
+        if not scores:
+            return []
+        query_norm = math.sqrt(query_norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1] / self.norms[item[0]], reverse=True)[:top_k]
+        return [(self.entries[index], score / (self.norms[index] * query_norm)) for index, score in ranked]
+
+
+_index_cache = {}
+
+
+def get_key_ngram_index(key_description_path):
+    """获取key描述文件的检索索引，按文件内容缓存"""
+    entries = load_key_catalog(key_description_path)
+    index = _index_cache.get(id(entries))
+    if index is None:
+        index = KeyNgramIndex(entries)
+        _index_cache.clear()
+        _index_cache[id(entries)] = index
+    return index
+
+
+def shortlist_keys(key_value_pairs, key_description_path, top_k=DEFAULT_TOP_K, embedding_index=None,
+                   extra_entries=None):
+    """
+    为一个表格的第一阶段key筛选候选key
+
+    Args:
+        key_value_pairs: 第一阶段结果[{"key", "value", ...}]
+        key_description_path: key描述文件路径
+        top_k: 每个old_key保留的候选数
+        embedding_index: 可选的KeyEmbeddingIndex，向量检索的top-k并入候选
+        extra_entries: 额外并入的候选KeyEntry（如词汇索引中被old_key包含的key）
+
+    Returns:
+        list: 候选KeyEntry列表，保持key描述文件中的顺序
+    """
+    entries = load_key_catalog(key_description_path)
+    if len(entries) <= top_k:
+        return list(entries)
+
+    index = get_key_ngram_index(key_description_path)
+    queries = [query_text(item) for item in key_value_pairs]
+    selected = {id(entry) for entry in extra_entries or ()}
+    for query in queries:
+        selected.update(id(entry) for entry, _ in index.search(query, top_k))
+    if embedding_index is not None:
+        for candidates in embedding_index.search(queries, top_k):
+            selected.update(id(entry) for entry, _ in candidates)
+    return [entry for entry in entries if id(entry) in selected]
+
+
+def shortlist_recall(labelled_pairs, key_description_path, top_k=DEFAULT_TOP_K, embedding_index=None):
+    """
+    候选筛选的召回率：正确的new_key出现在其表格候选集中的比例
+
+    Args:
+        labelled_pairs: {表格名: 匹配结果[{"old_key", "value", "new_key"}, ...]}，new_key为空的项不计入
+        key_description_path: key描述文件路径
+        top_k: 每个old_key保留的候选数
+        embedding_index: 可选的KeyEmbeddingIndex
+
+    Returns:
+        tuple: (召回率, 漏掉的[(表格名, old_key, new_key), ...], 平均候选数)
+    """
+    total = 0
+    missed = []
+    candidate_counts = []
+    for table_name, results in labelled_pairs.items():
+        pairs = [{"key": item["old_key"], "value": item.get("value", "")} for item in results]
+        candidates = {entry.key for entry in shortlist_keys(pairs, key_description_path, top_k, embedding_index)}
+        candidate_counts.append(len(candidates))
+        for item in results:
+            if not item.get("new_key"):
+                continue
+            total += 1
+            if item["new_key"] not in candidates:
+                missed.append((table_name, item["old_key"], item["new_key"]))
+    recall = (total - len(missed)) / total if total else 1.0
+    average = sum(candidate_counts) / len(candidate_counts) if candidate_counts else 0.0
+    return recall, missed, average
@@ -8,7 +8,12 @@ import shutil
 # 使用绝对导入
 from . import table_matcher # 确保table_matcher被正确导入
 
-def match_document(extract_files: list[str], key_descriptions_dir: str, match_results_dir: str):
+def match_document(extract_files: list[str], key_descriptions_dir: str, match_results_dir: str,
+                   table_format: str = table_matcher.DEFAULT_FORMAT, incremental: bool = False,
+                   group_repeated: bool = False, max_workers: int = 1, use_rules: bool = False,
+                   use_embeddings: bool = False, use_lexical: bool = False, shortlist_k: int = 0,
+                   match_mode: str = table_matcher.MATCH_MODE_TWO_STAGE, pipeline: bool = False,
+                   stage_workers: tuple = (1, 1)):
     """
     对提取的文档元素进行匹配分析
     
@@ -16,12 +21,25 @@ def match_document(extract_files: list[str], key_descriptions_dir: str, match_re
         extract_files: 要进行语义识别的提取文件列表
         key_descriptions_dir: 关键字描述文件所在目录
         match_results_dir: 匹配结果目录路径，用于保存匹配结果
+        table_format: 发送给LLM的表格格式（html / markdown / tsv / cells）
+        incremental: 是否增量匹配，保留匹配结果目录，只重新匹配内容或匹配上下文有变化的表格
+        group_repeated: 是否识别重复版式的表格，每种版式只调用LLM匹配一次
+        max_workers: 同时进行的表格匹配数上限，大于1时并发调用LLM（仅远程模型有效）
+        use_rules: 第一阶段是否先使用规则提取，只有置信度不足的表格调用LLM
+        use_embeddings: 第二阶段是否先使用key向量索引，只有难以确定的key调用LLM（需先加载嵌入模型）
+        use_lexical: 第二阶段是否先使用key词汇索引，精确/近似命中的key不调用LLM
+        shortlist_k: 大于0时第二阶段提示词中每个key只放入top-k个候选key，key描述文件很大时使用
+        match_mode: 匹配方式，two_stage（两阶段）或combined（每个表格单次调用LLM）
+        pipeline: 两阶段匹配是否按流水线执行（表格N的第二阶段与表格N+1的第一阶段同时进行）
+        stage_workers: 流水线中第一、第二阶段的工作线程数
         
     返回:
         dict: 匹配结果统计信息，如匹配的元素数量等
     """
-    # 检查并清理输出目录
-    if os.path.exists(match_results_dir):
+    # 检查并清理输出目录（增量模式保留已有结果）
+    if incremental:
+        os.makedirs(match_results_dir, exist_ok=True)
+    elif os.path.exists(match_results_dir):
         # 删除目录中的所有内容
         for item in os.listdir(match_results_dir):
             item_path = os.path.join(match_results_dir, item)
@@ -60,7 +78,12 @@ def match_document(extract_files: list[str], key_descriptions_dir: str, match_re
     # 处理表格 - 调用table_matcher模块的match_tables函数
     # 注意：match_tables 函数也需要能够接受文件列表
     if table_files:
-        table_stats = table_matcher.match_tables(table_files, table_key_description_path, match_results_dir)
+        table_stats = table_matcher.match_tables(table_files, table_key_description_path, match_results_dir,
+                                                 table_format, incremental, group_repeated,
+                                                 max_workers, use_rules, use_embeddings=use_embeddings,
+                                                 use_lexical=use_lexical, shortlist_k=shortlist_k,
+                                                 match_mode=match_mode, pipeline=pipeline,
+                                                 stage_workers=stage_workers)
         # 合并统计信息
         stats.update(table_stats)
     
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+小模型→主模型级联
+每次匹配调用先用小模型（如qwen3-0.6b，生成速度约为gemma-3-4b的2.5倍）在较紧的token预算内生成，
+校验结果（能否解析、单元格ID/位置是否在表格内、value是否与单元格文本一致、new_key是否在key描述文件中），
+只有校验不通过的调用才交给主模型重新生成。
+按阶段统计小模型的命中率、两级模型的耗时，以及估算节省的时间
+"""
+
+import os
+import sys
+import time
+import threading
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+from models.model_manager import llm_manager
+from models.stream_guard import ABORT_REASONS
+from extractors.table_model import parse_position
+
+# 小模型的token预算占主模型预算的比例（小模型更容易循环输出，尽早中止后交给主模型）
+SMALL_MODEL_TOKEN_RATIO = 0.5
+
+_stats_lock = threading.Lock()
+# 各阶段的级联统计: {阶段: {"calls", "small_hits", "escalations", "small_time", "large_time"}}
+_cascade_stats = {}
+
+
+def cascade_completion(stage, messages, validate, json_schema=None, max_tokens=None, refresh_cache=False):
+    """
+    级联生成：已加载小模型时先用小模型，validate返回失败原因时再用主模型；未加载小模型时直接使用主模型
+
+    Args:
+        stage: 阶段名称（用于统计）
+        messages: 消息列表
+        validate: 校验函数，输入模型输出文本，通过时返回None，否则返回失败原因
+        json_schema: 输出的JSON Schema
+        max_tokens: 主模型的token预算，小模型使用其中的SMALL_MODEL_TOKEN_RATIO
+        refresh_cache: 跳过缓存读取
+
+    Returns:
+        str: 模型输出，失败时返回None
+    """
+    if not llm_manager.has_small_model():
+        return llm_manager.create_completion(messages, temperature=0, refresh_cache=refresh_cache,
+                                             json_schema=json_schema, max_tokens=max_tokens)
+
+    small_tokens = max(int(max_tokens * SMALL_MODEL_TOKEN_RATIO), 1) if max_tokens else None
+    start = time.perf_counter()
+    response = llm_manager.create_completion(messages, temperature=0, refresh_cache=refresh_cache,
+                                             json_schema=json_schema, max_tokens=small_tokens, small_model=True)
+    generation = llm_manager.last_generation_stats
+    if not response:
+        reason = "返回空结果"
+    elif generation and generation["stop_reason"] in ABORT_REASONS:
+        reason = f"生成中止（{generation['stop_reason']}）"
+    else:
+        try:
+            reason = validate(response)
+        except Exception as e:
+            reason = f"无法解析: {str(e)}"
+    small_time = time.perf_counter() - start
+
+    if reason is None:
+        _record(stage, small_time, None)
+        print(f"{stage}: 小模型结果校验通过")
+        return response
+
+    print(f"{stage}: 小模型结果校验未通过（{reason}），改用主模型")
+    start = time.perf_counter()
+    response = llm_manager.create_completion(messages, temperature=0, refresh_cache=refresh_cache,
+                                             json_schema=json_schema, max_tokens=max_tokens)
+    _record(stage, small_time, time.perf_counter() - start)
+    return response
+
+
+def _record(stage, small_time, large_time):
+    with _stats_lock:
+        stats = _cascade_stats.setdefault(stage, {"calls": 0, "small_hits": 0, "escalations": 0,
+                                                  "small_time": 0.0, "large_time": 0.0})
+        stats["calls"] += 1
+        stats["small_time"] += small_time
+        if large_time is None:
+            stats["small_hits"] += 1
+        else:
+            stats["escalations"] += 1
+            stats["large_time"] += large_time
+
+
+def get_cascade_stats():
+    """
+    获取各阶段的级联统计
+
+    saved_time: 小模型命中的调用按主模型的平均耗时估算应花的时间，减去小模型的全部耗时（含未通过校验的调用）；
+    没有交给主模型的调用时无法估算，为None
+
+    Returns:
+        dict: {阶段: {"calls", "small_hits", "escalations", "small_time", "large_time", "hit_rate", "saved_time"}}
+    """
+    result = {}
+    with _stats_lock:
+        for stage, stats in _cascade_stats.items():
+            stats = dict(stats)
+            stats["hit_rate"] = stats["small_hits"] / stats["calls"] if stats["calls"] else 0.0
+            stats["saved_time"] = None
+            if stats["escalations"]:
+                average_large_time = stats["large_time"] / stats["escalations"]
+                stats["saved_time"] = stats["small_hits"] * average_large_time - stats["small_time"]
+            result[stage] = stats
+    return result
+
+
+# ================ 校验 ================
+
+def check_cells(table, items):
+    """
+    第一阶段结果的校验：不能为空，每项的key非空，valueId存在（或旧格式的valuePos在表格范围内），
+    给出value时必须与单元格文本一致（提示词要求保留value为空的key-value，空单元格的value应为空）
+
+    Returns:
+        str: 失败原因，通过时返回None
+    """
+    if not items:
+        return "没有提取到key-value"
+    for item in items:
+        if not str(item.get('key', '')).strip():
+            return "key为空"
+        if 'valueId' in item:
+            cell = table.cell_by_id(item['valueId'])
+            if cell is None:
+                return f"单元格ID {item['valueId']} 不存在"
+        else:
+            row, col = parse_position(item.get('valuePos', ''))
+            cell = table.cell_at(row, col) if row is not None else None
+            if cell is None:
+                return f"位置 {item.get('valuePos')} 超出表格范围"
+        if 'value' in item and str(item['value']).strip() != cell.text.strip():
+            return f"{item['key']} 的value与单元格文本不符"
+    return None
+
+
+def check_new_keys(items, catalog_keys):
+    """new_key只能是key描述文件中的key或空字符串"""
+    for item in items:
+        if item['new_key'] and item['new_key'] not in catalog_keys:
+            return f"new_key {item['new_key']} 不在key描述文件中"
+    return None
+
+
+def check_matches(items, key_value_pairs, catalog_keys):
+    """
+    第二阶段结果的校验：每个输入的key都有结果，old_key和value与输入一致，new_key在key描述文件中
+
+    Returns:
+        str: 失败原因，通过时返回None
+    """
+    inputs = {item['key']: str(item['value']) for item in key_value_pairs}
+    for item in items:
+        if item['old_key'] not in inputs:
+            return f"old_key {item['old_key']} 不是输入的key"
+        if str(item['value']).strip() != inputs[item['old_key']].strip():
+            return f"{item['old_key']} 的value与输入不符"
+    missing = set(inputs) - {item['old_key'] for item in items}
+    if missing:
+        return f"缺少 {len(missing)} 个key的结果"
+    return check_new_keys(items, catalog_keys)
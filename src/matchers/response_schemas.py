@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+两阶段（及单次调用匹配）输出的JSON Schema
+传给llm_manager.create_completion后，本地模型按schema生成的语法约束采样，远程API使用response_format，
+输出总能解析，生成到数组的“]”即结束。
+第一阶段的valueId限定为表格中实际存在的单元格ID，第二阶段的old_key限定为输入的key、
+new_key限定为提示词中的候选key（或空字符串）。
+不设置maxItems：转换后的语法会按项数展开成深层嵌套的可选规则，大表格的语法过大
+"""
+
+# new_key的候选key超过该数量时不再列举为enum（语法过大会拖慢采样），只约束为字符串
+MAX_ENUM_KEYS = 500
+
+
+def stage_1_schema(table):
+    """
+    第一阶段输出: [{"key": "...", "valueId": "B2"}, ...]
+
+    Args:
+        table: 表格模型（extractors.table_model.Table）
+    """
+    cell_ids = [cell.id for cell in table.cells]
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "key": {"type": "string", "minLength": 1},
+                "valueId": {"enum": cell_ids},
+            },
+            "required": ["key", "valueId"],
+            "additionalProperties": False,
+        },
+    }
+
+
+def stage_2_schema(key_value_pairs, entries):
+    """
+    第二阶段输出: [{"old_key": "...", "value": "...", "new_key": "..."}, ...]
+
+    Args:
+        key_value_pairs: 提示词中的key-value列表[{"key", "value"}]
+        entries: 提示词中的候选KeyEntry列表
+    """
+    old_keys = list(dict.fromkeys(item["key"] for item in key_value_pairs))
+    return {
+        "type": "array",
+        "items": {
+            "type": "object",
+            "properties": {
+                "old_key": {"enum": old_keys},
+                "value": {"type": "string"},
+                "new_key": _new_key_schema(entries),
+            },
+            "required": ["old_key", "value", "new_key"],
+            "additionalProperties": False,
+        },
+    }
+
+
+def combined_schema(table, entries):
+    """
+    单次调用匹配的输出: [{"key": "...", "valueId": "B2", "new_key": "..."}, ...]
+
+    Args:
+        table: 表格模型
+        entries: 提示词中的候选KeyEntry列表
+    """
+    schema = stage_1_schema(table)
+    item = schema["items"]
+    item["properties"]["new_key"] = _new_key_schema(entries)
+    item["required"].append("new_key")
+    return schema
+
+
+def _new_key_schema(entries):
+    if len(entries) <= MAX_ENUM_KEYS:
+        return {"enum": [entry.key for entry in entries] + [""]}
+    return {"type": "string"}
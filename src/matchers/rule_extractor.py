@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+规则化key-value提取模块
+大部分表格是简单的“标签→值”版式（标签单元格后跟值单元格，或表头行下跟数据行），
+直接在已解析合并单元格的表格网格上按规则提取第一阶段的key-value，并给出置信度。
+置信度低于阈值的表格（含大段文字、单元格内联“标签: 值”等复杂版式）仍交给LLM
+"""
+
+import os
+import re
+import sys
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+from extractors.table_model import format_position
+
+# 规则提取器版本号，规则变化时需要更新，使增量匹配结果失效
+RULE_EXTRACTOR_VERSION = "1"
+
+# 默认置信度阈值，低于该值的表格使用LLM提取
+DEFAULT_CONFIDENCE_THRESHOLD = 0.75
+
+# 带单位的数值，如 29.3℃、50.0%、0.24m、208V 30A、50%RH
+NUMERIC_PATTERN = re.compile(
+    r'^[-+±]?\d[\d.,]*\s*(℃|°C|°F|°|%\s*RH|%|‰|RH|[a-zA-Zμ]{1,3}(/[a-zA-Z]{1,3})?)?'
+    r'(\s*[-+±~～/,，]?\s*\d[\d.,]*\s*(℃|°C|°F|°|%|[a-zA-Zμ]{1,3})?)*$'
+)
+# 单元格内联的“标签: 值”
+INLINE_PAIR_PATTERN = re.compile(r'^[^:：]{1,30}[:：]\s*\S')
+# 统计量子标签，出现在空值分组标签（如Bx1）之后时key加上分组前缀
+STAT_LABELS = {'max', 'min', 'avg', 'mean', 'average', 'delta', '最大', '最小', '最高', '最低', '平均', '平均值',
+               '最大值', '最小值', '最高值', '最低值'}
+
+# 标签单元格的最大长度，超过时视为正文段落
+MAX_LABEL_LENGTH = 40
+
+
+def label_score(text):
+    """单元格作为标签（key）的可能性，0~1"""
+    text = text.strip()
+    if not text or NUMERIC_PATTERN.match(text):
+        return 0.0
+    if text[-1] in ':：':
+        return 1.0 if len(text) <= MAX_LABEL_LENGTH else 0.2
+    if INLINE_PAIR_PATTERN.match(text) or len(text) > MAX_LABEL_LENGTH:
+        return 0.0
+    if not any(ch.isdigit() for ch in text):
+        return 0.95
+    # 带编号的短标识，如Sp1、Bx1
+    return 0.85 if len(text) <= 12 else 0.7
+
+
+def value_score(text):
+    """单元格作为值（value）的可能性，0~1"""
+    text = text.strip()
+    if not text:
+        return 0.9
+    if NUMERIC_PATTERN.match(text):
+        return 1.0
+    if text[-1] in ':：' or INLINE_PAIR_PATTERN.match(text):
+        return 0.0
+    if any(ch.isdigit() for ch in text):
+        return 0.8
+    return 0.5
+
+
+def extract_key_values(table):
+    """
+    按规则提取表格的key-value对
+
+    Args:
+        table: 表格模型（extractors.table_model.Table）
+
+    Returns:
+        tuple: (key-value列表, 置信度)
+        key-value列表与第一阶段LLM输出解析后的格式一致：
+        [{"key": "...", "value": "...", "valueId": "B2", "valuePos": "(1, 1)"}]
+    """
+    rows = [[cell for cell in table.row_cells(r)] for r in range(len(table.rows))]
+    non_empty = {cell.id for cell in table.cells if cell.text.strip()}
+    if not non_empty:
+        return [], 0.0
+
+    explained = set()
+    pairs = []
+    qualities = []
+
+    # 跳过顶部的通栏标题行
+    start = 0
+    while start < len(rows) and _is_title_row(table, rows[start]):
+        explained.update(cell.id for cell in rows[start])
+        start += 1
+
+    header_pairs = _extract_header_layout(rows[start:])
+    if header_pairs is not None:
+        pairs, qualities, layout_factor = header_pairs
+        explained.update(cell.id for row in rows[start:] for cell in row)
+    else:
+        layout_factor = 1.0
+        group = None
+        for row in rows[start:]:
+            if not any(cell.text.strip() for cell in row):
+                continue
+            if _is_title_row(table, row):
+                explained.update(cell.id for cell in row)
+                group = None
+                continue
+
+            i = 0
+            while i < len(row):
+                label = row[i]
+                score = label_score(label.text)
+                if score < 0.5 or i + 1 >= len(row):
+                    i += 1
+                    continue
+                value = row[i + 1]
+                v_score = value_score(value.text)
+                # 两列“标签 | 值”行或以冒号结尾的标签，位置本身就是有力的证据
+                positional = len(row) == 2 or label.text.strip()[-1] in ':：'
+                if v_score > 0 and positional:
+                    v_score = max(v_score, 0.85)
+                if v_score <= 0 or (not positional and label_score(value.text) > v_score):
+                    i += 1
+                    continue
+
+                key = _strip_label(label.text)
+                if group and key.lower() in STAT_LABELS:
+                    key = f"{group} {key}"
+                elif not value.text.strip():
+                    # 空值标签可能是后续统计量的分组名（如Bx1后跟Max/Avg/Min）
+                    group = key
+                else:
+                    group = None
+
+                pairs.append(_make_pair(key, value))
+                qualities.append(score * v_score)
+                explained.update((label.id, value.id))
+                i += 2
+
+    if not pairs:
+        return [], 0.0
+    coverage = len(non_empty & explained) / len(non_empty)
+    confidence = coverage * (sum(qualities) / len(qualities)) * layout_factor
+    return _dedupe_keys(pairs), round(confidence, 3)
+
+
+def _is_title_row(table, row):
+    """只有一个横跨整行的单元格"""
+    return len(row) == 1 and row[0].colspan == table.n_cols and table.n_cols > 1
+
+
+def _extract_header_layout(rows):
+    """
+    表头行 + 数据行版式：第一行全部是标签，其后的行单元格数相同且含数值。
+    只有一行数据时key为表头文本；多行数据时key为“首列值 表头”，可靠性较低
+
+    Returns:
+        tuple: (key-value列表, 质量列表, 版式系数)，不是该版式时返回None
+    """
+    rows = [row for row in rows if any(cell.text.strip() for cell in row)]
+    if len(rows) < 2 or len(rows[0]) < 3:
+        return None
+    header = rows[0]
+    if any(label_score(cell.text) < 0.85 for cell in header):
+        return None
+    data_rows = rows[1:]
+    if any(len(row) != len(header) for row in data_rows):
+        return None
+    if not any(NUMERIC_PATTERN.match(cell.text.strip()) for row in data_rows for cell in row):
+        return None
+
+    pairs = []
+    qualities = []
+    for row in data_rows:
+        for header_cell, cell in zip(header, row):
+            key = _strip_label(header_cell.text)
+            if len(data_rows) > 1 and cell is not row[0]:
+                key = f"{row[0].text.strip()} {key}"
+            pairs.append(_make_pair(key, cell))
+            qualities.append(max(value_score(cell.text), 0.85))
+    return pairs, qualities, 1.0 if len(data_rows) == 1 else 0.6
+
+
+def _strip_label(text):
+    return text.strip().rstrip(':：').strip()
+
+
+def _make_pair(key, cell):
+    return {"key": key, "value": cell.text, "valueId": cell.id, "valuePos": format_position(cell.row, cell.col)}
+
+
+def _dedupe_keys(pairs):
+    """同名key加序号区分，第二阶段按key对应回单元格"""
+    counts = {}
+    for item in pairs:
+        counts[item["key"]] = counts.get(item["key"], 0) + 1
+    seen = {}
+    for item in pairs:
+        key = item["key"]
+        if counts[key] > 1:
+            seen[key] = seen.get(key, 0) + 1
+            item["key"] = f"{key}{seen[key]}"
+    return pairs
+
+
+# 测试功能
+if __name__ == "__main__":
+    import tempfile
+    from extractors.extractor import extract_docx_document
+    from extractors.table_model import load_table_by_number
+
+    extract_dir = tempfile.mkdtemp()
+    _, table_count = extract_docx_document(os.path.join(os.path.dirname(project_dir), "document", "document.docx"),
+                                           extract_dir)
+    for table_number in range(1, table_count + 1):
+        pairs, confidence = extract_key_values(load_table_by_number(extract_dir, table_number))
+        print(f"\n表格 {table_number}: 置信度 {confidence:.2f}")
+        for item in pairs:
+            print(f"  {item['key']} = {item['value']!r} ({item['valueId']})")
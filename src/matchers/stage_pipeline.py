@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+两阶段流水线调度
+第一阶段的工作线程依次取出表格完成key-value提取，结果放入队列；第二阶段的工作线程从队列取出并完成key匹配。
+两个阶段各有独立的工作线程数，表格N的第二阶段与表格N+1的第一阶段同时进行，
+两阶段固定在不同的模型实例（或远程连接）上时，LLM调用也可以重叠
+"""
+
+import time
+import queue
+import threading
+
+# 队列中表示第一阶段已全部完成的标记
+_DONE = object()
+
+
+def run_pipeline(items, stage_1, stage_2, stage_1_workers=1, stage_2_workers=1):
+    """
+    按两阶段流水线处理items，单个条目失败不影响其他条目
+
+    Args:
+        items: 待处理的条目列表（如表格路径）
+        stage_1: 第一阶段函数，输入条目，返回中间结果；返回空值时跳过第二阶段，结果为空列表
+        stage_2: 第二阶段函数，输入(条目, 中间结果)，返回最终结果列表
+        stage_1_workers: 第一阶段的工作线程数
+        stage_2_workers: 第二阶段的工作线程数
+
+    Returns:
+        dict: {条目: (结果列表, 两个阶段的耗时之和)}
+    """
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+    handoff = queue.Queue()
+    results = {}
+    results_lock = threading.Lock()
+
+    def finish(item, result, elapsed):
+        with results_lock:
+            results[item] = (result, elapsed)
+
+    def stage_1_worker():
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+            start = time.perf_counter()
+            try:
+                intermediate = stage_1(item)
+            except Exception as e:
+                print(f"{item} 第一阶段失败: {str(e)}")
+                intermediate = None
+            elapsed = time.perf_counter() - start
+            if intermediate:
+                handoff.put((item, intermediate, elapsed))
+            else:
+                finish(item, [], elapsed)
+
+    def stage_2_worker():
+        while True:
+            entry = handoff.get()
+            if entry is _DONE:
+                return
+            item, intermediate, elapsed = entry
+            start = time.perf_counter()
+            try:
+                result = stage_2(item, intermediate)
+            except Exception as e:
+                print(f"{item} 第二阶段失败: {str(e)}")
+                result = []
+            finish(item, result, elapsed + time.perf_counter() - start)
+
+    stage_1_threads = [threading.Thread(target=stage_1_worker, name=f"pipeline_stage_1_{i}")
+                       for i in range(max(1, min(stage_1_workers, len(items))))]
+    stage_2_threads = [threading.Thread(target=stage_2_worker, name=f"pipeline_stage_2_{i}")
+                       for i in range(max(1, stage_2_workers))]
+    for thread in stage_1_threads + stage_2_threads:
+        thread.start()
+    for thread in stage_1_threads:
+        thread.join()
+    for _ in stage_2_threads:
+        handoff.put(_DONE)
+    for thread in stage_2_threads:
+        thread.join()
+
+    return {item: results[item] for item in items}
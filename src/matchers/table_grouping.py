@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+重复表格识别模块
+报告中同一版式的表格（如每个测点一张测量表）往往重复出现几十次，
+按结构指纹（合并单元格网格 + 表头/键单元格文本，忽略值单元格）对表格分组，
+值单元格按版式判断（规则提取中位于标签右侧或表头下方的单元格），测点编号、“正常/异常”等文本值也不影响分组，
+每组只把一个代表表格交给LLM匹配，其key映射按单元格ID投射到同组的其他表格
+"""
+
+import re
+import hashlib
+
+from extractors.table_model import format_position
+from matchers.rule_extractor import extract_key_values
+
+# 值单元格：空单元格，或只由数字、日期、单位和分隔符组成的单元格
+VALUE_CELL_PATTERN = re.compile(r'^[\s\d.,:;/\\\-+±~～%‰℃°′″()（）年月日时分秒xX×*eE]*$')
+
+
+def is_value_cell(text):
+    """判断单元格文本是否为测量值等数据内容（不参与结构指纹）"""
+    return VALUE_CELL_PATTERN.match(text) is not None
+
+
+def value_cell_ids(table):
+    """
+    按版式判断的值单元格ID集合：规则提取配对出的值单元格（标签右侧、表头下方），
+    加上空单元格和纯数值单元格
+    """
+    pairs, _ = extract_key_values(table)
+    value_ids = {pair['valueId'] for pair in pairs}
+    value_ids.update(cell.id for cell in table.cells if is_value_cell(cell.text))
+    return value_ids
+
+
+def structural_fingerprint(table):
+    """
+    计算表格的结构指纹
+
+    指纹由表格尺寸、每个单元格的网格位置/合并范围/标签，以及非值单元格的文本组成，
+    值单元格（见value_cell_ids）只记录位置不记录文本。
+    没有任何键单元格的表格（纯数据表）无法可靠地判断版式，返回None
+
+    Returns:
+        str: 指纹（SHA-256），或None
+    """
+    digest = hashlib.sha256(f"{table.n_rows}x{table.n_cols}|{table.caption or ''}".encode('utf-8'))
+    value_ids = value_cell_ids(table)
+    key_cells = 0
+    for cell in table.cells:
+        if cell.id in value_ids:
+            text = ''
+        else:
+            text = cell.text
+            key_cells += 1
+        digest.update(f"|{cell.id}:{cell.rowspan}:{cell.colspan}:{cell.tag}:{text}".encode('utf-8'))
+    return digest.hexdigest() if key_cells else None
+
+
+def group_tables(tables):
+    """
+    按结构指纹对表格分组
+
+    Args:
+        tables: [(名称, Table), ...]
+
+    Returns:
+        list: [[名称, ...], ...]，按首次出现的顺序排列，每组第一个为代表表格；
+        无法计算指纹的表格单独成组
+    """
+    groups = {}
+    ordered = []
+    for name, table in tables:
+        fingerprint = structural_fingerprint(table)
+        if fingerprint is None:
+            ordered.append([name])
+        elif fingerprint in groups:
+            groups[fingerprint].append(name)
+        else:
+            groups[fingerprint] = [name]
+            ordered.append(groups[fingerprint])
+    return ordered
+
+
+def project_results(results, table):
+    """
+    把代表表格的匹配结果投射到同版式的另一个表格
+
+    old_key/new_key沿用代表表格的结果，value和位置按valueId取自目标表格；
+    没有valueId或目标表格中不存在该单元格的项被丢弃
+
+    Returns:
+        list: 与match_table输出格式一致的结果列表
+    """
+    projected = []
+    for item in results:
+        cell = table.cell_by_id(item.get('valueId'))
+        if cell is None:
+            continue
+        projected.append({
+            "old_key": item['old_key'],
+            "value": cell.text,
+            "new_key": item['new_key'],
+            "valuePos": format_position(cell.row, cell.col),
+            "valueId": cell.id
+        })
+    return projected
@@ -5,7 +5,9 @@ import os
 import json
 import time
 import sys
+import hashlib
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加项目根目录到系统路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,6 +17,37 @@ if project_dir not in sys.path:
 
 # 使用绝对导入
 from models.model_manager import llm_manager
+from extractors.table_model import load_table, parse_position, format_position
+from extractors.extractor import get_table_fingerprint
+from matchers.table_serializers import serialize_table, DEFAULT_FORMAT
+from matchers.table_grouping import structural_fingerprint, group_tables, project_results
+from matchers.rule_extractor import (extract_key_values as extract_key_values_by_rules, label_score,
+                                     DEFAULT_CONFIDENCE_THRESHOLD, RULE_EXTRACTOR_VERSION)
+from matchers.key_embedding_index import get_key_embedding_index
+from matchers.key_lexical_index import get_key_lexical_index, LEXICAL_INDEX_VERSION
+from matchers.key_catalog import load_key_catalog, render_key_description
+from matchers.key_shortlist import shortlist_keys
+from matchers.response_schemas import stage_1_schema, stage_2_schema, combined_schema
+from matchers.model_cascade import cascade_completion, check_cells, check_matches, check_new_keys
+from matchers.stage_pipeline import run_pipeline
+
+# 匹配指纹清单文件名，记录每个匹配结果对应的表格内容和匹配上下文
+MATCH_MANIFEST_FILE = "match_manifest.json"
+
+# 每次LLM调用的token预算：固定部分 + 第一阶段每个单元格 / 第二阶段每个key的输出token数
+# 超出预算时中止生成（防止小模型循环输出直到n_ctx耗尽），保留已完成的项
+STAGE_TOKEN_OVERHEAD = 512
+STAGE_1_TOKENS_PER_CELL = 48
+STAGE_2_TOKENS_PER_KEY = 96
+
+# 匹配方式：两阶段（先提取key-value再匹配key）/ 单次调用（一次生成同时给出valueId和new_key）
+MATCH_MODE_TWO_STAGE = "two_stage"
+MATCH_MODE_COMBINED = "combined"
+MATCH_MODES = (MATCH_MODE_TWO_STAGE, MATCH_MODE_COMBINED)
+
+# 流水线的阶段名称（llm_manager.init_stage_model可为各阶段加载单独的模型实例）
+PIPELINE_STAGE_1 = "stage_1"
+PIPELINE_STAGE_2 = "stage_2"
 
 # ================ 基础工具函数 ================
 
@@ -25,33 +58,36 @@ def read_file_content(file_path):
 
 # ================ LLM 相关函数 ================
 
-def prepare_system_prompt_1(prompt_path, content_path):
+def prepare_system_prompt_1(prompt_path, table_content, format_description=""):
     """准备第一阶段提取key-value的消息
     
     Args:
         prompt_path: 提示词文件路径
-        content_path: 内容文件路径
+        table_content: 序列化后的表格内容
+        format_description: 表格格式说明
     """
-    # 读取prompt模板和内容文件
+    # 读取prompt模板
     prompt = read_file_content(prompt_path)
-    content = read_file_content(content_path)
     
     # 替换占位符
-    prompt = prompt.replace('placeholder_table_content', content)
+    prompt = prompt.replace('placeholder_table_format', format_description)
+    prompt = prompt.replace('placeholder_table_content', table_content)
 
     return prompt
 
-def prepare_system_prompt_2(prompt_path, key_path, key_value_array):
+def prepare_system_prompt_2(prompt_path, key_path, key_value_array, key_description=None):
     """准备第二阶段匹配key的消息
     
     Args:
         prompt_path: 提示词文件路径
         key_path: 关键信息描述文件路径
         key_value_array: 第一阶段提取的key-value数组的JSON字符串
+        key_description: 筛选后的key描述文本，为None时使用完整的key描述文件
     """
     # 读取prompt模板和key描述文件
     prompt = read_file_content(prompt_path)
-    key_description = read_file_content(key_path)
+    if key_description is None:
+        key_description = read_file_content(key_path)
     
     # 替换占位符
     prompt = prompt.replace('placeholder_key_value_array', key_value_array)
@@ -59,7 +95,22 @@ def prepare_system_prompt_2(prompt_path, key_path, key_value_array):
 
     return prompt
 
-# 注意：原call_llm函数已被移除，现在直接使用llm_manager.create_completion
+def prepare_system_prompt_combined(prompt_path, key_description, table_content, format_description=""):
+    """准备单次调用匹配的消息
+    
+    Args:
+        prompt_path: 提示词文件路径
+        key_description: key描述文本（完整文件内容或筛选后的候选）
+        table_content: 序列化后的表格内容
+        format_description: 表格格式说明
+    """
+    prompt = read_file_content(prompt_path)
+    prompt = prompt.replace('placeholder_key_description', key_description)
+    prompt = prompt.replace('placeholder_table_format', format_description)
+    prompt = prompt.replace('placeholder_table_content', table_content)
+    return prompt
+
+# 注意：原call_llm函数已被移除，现在使用llm_manager.create_completion（经model_cascade级联）
 
 def parse_response_1(response_text):
     """解析第一阶段的key-value提取结果"""
@@ -77,13 +128,15 @@ def parse_response_1(response_text):
             else:
                 raise ValueError("无法找到有效的JSON数组")
         
-        # 验证格式：[{"key": "...", "value": "...", "valuePos": "..."}]
+        # 验证格式：[{"key": "...", "valueId": "..."}]
+        # 兼容旧格式：[{"key": "...", "value": "...", "valuePos": "..."}]
         if not isinstance(result_list, list):
             raise ValueError("结果不是数组格式")
         
         valid_results = []
         for item in result_list:
-            if isinstance(item, dict) and 'key' in item and 'value' in item and 'valuePos' in item:
+            if isinstance(item, dict) and 'key' in item and (
+                    'valueId' in item or ('value' in item and 'valuePos' in item)):
                 valid_results.append(item)
             else:
                 print(f"警告: 跳过格式不正确的项: {item}")
@@ -127,40 +180,116 @@ def parse_response_2(response_text):
     except Exception as e:
         raise ValueError(f"第二阶段解析失败: {str(e)}")
 
+def resolve_positions(table, key_value_pairs):
+    """
+    用表格模型把第一阶段结果映射为精确的网格坐标
+    
+    - 含valueId的项：按单元格ID索引直接定位，value取该单元格文本；ID不存在的项被丢弃
+    - 只含valuePos的项（旧格式）：按网格坐标解释；位置越界或该位置单元格文本与value不符时，
+      若表格中恰有一个单元格文本等于value，则改用该单元格的位置
+    
+    结果中valuePos统一为单元格左上角的网格坐标"(行, 列)"，并补充valueId
+    """
+    resolved = []
+    for item in key_value_pairs:
+        if 'valueId' in item:
+            cell = table.cell_by_id(item['valueId'])
+            if cell is None:
+                print(f"警告: 单元格ID {item['valueId']} 不存在，跳过: {item}")
+                continue
+            item['value'] = cell.text
+        else:
+            value = str(item.get('value', '')).strip()
+            row, col = parse_position(item.get('valuePos', ''))
+            cell = table.cell_at(row, col) if row is not None else None
+            
+            if cell is None or (value and cell.text != value):
+                candidates = table.find_cells(value) if value else []
+                if len(candidates) == 1:
+                    cell = candidates[0]
+                elif cell is None:
+                    print(f"警告: 位置 {item.get('valuePos')} 超出表格范围（{table.n_rows}行 x {table.n_cols}列）")
+                    resolved.append(item)
+                    continue
+        
+        item['valueId'] = cell.id
+        item['valuePos'] = format_position(cell.row, cell.col)
+        resolved.append(item)
+    return resolved
+
+def _report_prompt_reuse(stage_name):
+    """输出本次本地推理复用KV状态节省的提示词计算时间"""
+    stats = llm_manager.last_prompt_stats
+    if stats:
+        print(f"{stage_name}提示词 {stats['prompt_tokens']} tokens，复用KV缓存 {stats['reused_tokens']} tokens，"
+              f"节省提示词计算约 {stats['saved_ms'] / 1000:.2f} 秒")
+
+# ================ 增量匹配 ================
+
+def _match_context_hash(key_description_path, match_options):
+    """匹配上下文指纹：key描述、两个提示词模板和匹配选项，任一变化都需要重新匹配"""
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256(json.dumps(match_options, sort_keys=True).encode('utf-8'))
+    digest.update(RULE_EXTRACTOR_VERSION.encode('utf-8'))
+    digest.update(LEXICAL_INDEX_VERSION.encode('utf-8'))
+    for path in (key_description_path,
+                 os.path.join(current_dir, 'table_system_prompt_1.md'),
+                 os.path.join(current_dir, 'table_system_prompt_2.md'),
+                 os.path.join(current_dir, 'table_system_prompt_combined.md')):
+        digest.update(read_file_content(path).encode('utf-8'))
+    return digest.hexdigest()
+
+def _load_match_manifest(match_results_dir):
+    """加载匹配指纹清单: {表格文件名: 匹配指纹}"""
+    manifest_path = os.path.join(match_results_dir, MATCH_MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"加载匹配指纹清单失败: {e}")
+        return {}
+
+def _save_match_manifest(match_results_dir, manifest):
+    with open(os.path.join(match_results_dir, MATCH_MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
 # ================ 主要功能函数 ================
 
-def match_table(table_content_path, key_description_path):
+def extract_key_values_llm(table, table_format=DEFAULT_FORMAT):
     """
-    两阶段表格匹配：
-    1. 提取key-value对
-    2. 进行key语义匹配
+    第一阶段（LLM）：提取key-value对
     
     Returns:
-        list: [{"old_key": "...", "value": "...", "new_key": "...", "valuePos": "..."}]
+        list: 解析后的第一阶段结果（尚未映射单元格），失败时返回空列表
     """
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    print("开始两阶段表格匹配...")
-      # 第一阶段：提取key-value对
-    print("第一阶段：提取key-value对...")
+    table_content, format_description = serialize_table(table, table_format)
     system_prompt_1 = prepare_system_prompt_1(
         os.path.join(current_dir, 'table_system_prompt_1.md'), 
-        table_content_path
+        table_content,
+        format_description
     )
+    # 约束输出格式，valueId只能是表格中存在的单元格
+    schema = stage_1_schema(table)
+    max_tokens = STAGE_TOKEN_OVERHEAD + STAGE_1_TOKENS_PER_CELL * len(table.cells)
     
     for attempt in range(2):
         try:
             print(f"第一阶段第{attempt+1}次调用LLM...")
-            response_1 = llm_manager.create_completion([{"role": "user", "content": system_prompt_1}], temperature=0)
+            # 重试时跳过缓存，避免复用无法解析的缓存结果
+            response_1 = cascade_completion("第一阶段", [{"role": "user", "content": system_prompt_1}],
+                                            lambda response: check_cells(table, parse_response_1(response)),
+                                            json_schema=schema, max_tokens=max_tokens, refresh_cache=attempt > 0)
+            _report_prompt_reuse("第一阶段")
             
             if not response_1:
                 print("第一阶段LLM返回空结果")
                 return []
             
             print(f"第一阶段输出：\n{'-'*30}\n{response_1}\n{'-'*30}")
-            key_value_pairs = parse_response_1(response_1)
-            
-            break
+            return parse_response_1(response_1)
                 
         except Exception as e:
             if attempt == 0:
@@ -169,32 +298,104 @@ def match_table(table_content_path, key_description_path):
             else:
                 print(f"第一阶段最终失败: {str(e)}")
                 return []
-    else:
-        return []
+    
+    return []
+
+def extract_key_values(table, table_format=DEFAULT_FORMAT, use_rules=False,
+                       rule_threshold=DEFAULT_CONFIDENCE_THRESHOLD):
+    """
+    第一阶段：提取key-value对并映射到单元格
+    
+    Args:
+        table: 表格模型
+        table_format: 发送给LLM的表格格式
+        use_rules: 是否先使用规则提取，置信度不低于rule_threshold时不调用LLM
+        rule_threshold: 规则提取的置信度阈值
+    
+    Returns:
+        list: [{"key": "...", "value": "...", "valueId": "...", "valuePos": "..."}]
+    """
+    print("第一阶段：提取key-value对...")
+    key_value_pairs = None
+    if use_rules:
+        rule_pairs, confidence = extract_key_values_by_rules(table)
+        if rule_pairs and confidence >= rule_threshold:
+            print(f"规则提取了 {len(rule_pairs)} 个key-value对（置信度 {confidence:.2f}），跳过LLM")
+            key_value_pairs = rule_pairs
+        else:
+            print(f"规则提取置信度 {confidence:.2f} 低于阈值 {rule_threshold:.2f}，使用LLM提取")
+    
+    if key_value_pairs is None:
+        key_value_pairs = extract_key_values_llm(table, table_format)
     
     if not key_value_pairs:
         print("第一阶段未提取到key-value对")
         return []
     
-    # 暂存第一阶段的valuePos信息，创建key到valuePos的映射
+    # 按单元格ID索引得到value和精确的网格坐标
+    key_value_pairs = resolve_positions(table, key_value_pairs)
+    if not key_value_pairs:
+        print("第一阶段结果中没有有效的单元格")
+    return key_value_pairs
+
+def match_keys_llm(key_value_pairs, key_description_path, shortlist_k=0, embedding_index=None,
+                   extra_candidates=None):
+    """
+    第二阶段（LLM）：把第一阶段的key语义匹配到key描述文件中的key
+    
+    Args:
+        key_value_pairs: extract_key_values的结果
+        key_description_path: key描述文件路径
+        shortlist_k: 大于0时每个key只筛选top-k个候选放进提示词，0表示使用完整的key描述文件
+        embedding_index: 可选的key向量索引，筛选候选时与词汇相似度的结果合并
+        extra_candidates: 筛选候选时一定保留的KeyEntry（词汇索引中被key包含、未直接确定的key）
+    
+    Returns:
+        list: [{"old_key": "...", "value": "...", "new_key": "...", "valuePos": "...", "valueId": "..."}]
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    # 暂存第一阶段的位置信息，创建key到valuePos/valueId的映射
     key_to_valuepos = {}
+    key_to_valueid = {}
     for item in key_value_pairs:
         key_to_valuepos[item['key']] = item['valuePos']
-      # 第二阶段：key匹配
+        key_to_valueid[item['key']] = item.get('valueId', "")
+    
     print("第二阶段：key匹配...")
     # 准备第二阶段输入时，只包含key和value，不包含valuePos
     key_value_for_matching = [{"key": item["key"], "value": item["value"]} for item in key_value_pairs]
     key_value_json = json.dumps(key_value_for_matching, ensure_ascii=False, indent=2)
+    key_description = None
+    candidates = load_key_catalog(key_description_path)
+    if shortlist_k > 0:
+        total = len(candidates)
+        candidates = shortlist_keys(key_value_pairs, key_description_path, shortlist_k, embedding_index,
+                                    extra_candidates)
+        # 未筛掉任何key时沿用完整的key描述文件，保持提示词前缀不变
+        if len(candidates) < total:
+            key_description = render_key_description(candidates)
+            print(f"候选筛选保留了 {len(candidates)}/{total} 个key")
+    # 约束输出格式，old_key只能是输入的key，new_key只能是候选key或空
+    schema = stage_2_schema(key_value_for_matching, candidates)
+    max_tokens = STAGE_TOKEN_OVERHEAD + STAGE_2_TOKENS_PER_KEY * len(key_value_pairs)
+    catalog_keys = {entry.key for entry in candidates}
     system_prompt_2 = prepare_system_prompt_2(
         os.path.join(current_dir, 'table_system_prompt_2.md'),
         key_description_path,
-        key_value_json
+        key_value_json,
+        key_description
     )
     
     for attempt in range(2):
         try:
             print(f"第二阶段第{attempt+1}次调用LLM...")
-            response_2 = llm_manager.create_completion([{"role": "user", "content": system_prompt_2}], temperature=0)
+            # 重试时跳过缓存，避免复用无法解析的缓存结果
+            response_2 = cascade_completion(
+                "第二阶段", [{"role": "user", "content": system_prompt_2}],
+                lambda response: check_matches(parse_response_2(response), key_value_for_matching, catalog_keys),
+                json_schema=schema, max_tokens=max_tokens, refresh_cache=attempt > 0)
+            _report_prompt_reuse("第二阶段")
             
             if not response_2:
                 print("第二阶段LLM返回空结果")
@@ -211,7 +412,8 @@ def match_table(table_content_path, key_description_path):
                     "old_key": old_key,
                     "value": item['value'],
                     "new_key": item['new_key'],
-                    "valuePos": key_to_valuepos.get(old_key, "")
+                    "valuePos": key_to_valuepos.get(old_key, ""),
+                    "valueId": key_to_valueid.get(old_key, "")
                 }
                 final_results.append(final_item)
             
@@ -228,15 +430,244 @@ def match_table(table_content_path, key_description_path):
     
     return []
 
-def match_tables(table_files_paths: list[str], key_description_path: str, match_results_dir: str):
-    """批量处理表格文件进行两阶段匹配"""
-    import os
-    import json
+def match_keys(key_value_pairs, key_description_path, use_embeddings=False, use_lexical=False, shortlist_k=0):
+    """
+    第二阶段：key语义匹配，依次尝试：
+    1. use_lexical为True时用key词汇索引确定精确/近似命中的key，只是包含索引词的key作为LLM的候选
+    2. use_embeddings为True时用key向量索引确定相似度高且无歧义的key
+    3. 其余key（相似度低或前两名接近）交给LLM，shortlist_k大于0时提示词中只包含筛选出的候选key
+    
+    Returns:
+        list: 与match_keys_llm格式一致，按第一阶段key的顺序排列
+    """
+    results = []
+    remaining = key_value_pairs
+    lexical_candidates = None
+    if use_lexical:
+        lexical_index = get_key_lexical_index(key_description_path)
+        results, remaining = lexical_index.resolve(remaining)
+        lexical_candidates = lexical_index.candidates(remaining)
+        print(f"词汇索引确定了 {len(results)} 个key")
+    
+    index = None
+    if use_embeddings and remaining:
+        index = get_key_embedding_index(key_description_path)
+        if index is not None:
+            matched, remaining = index.resolve(remaining)
+            results += matched
+            print(f"向量索引确定了 {len(matched)} 个key，{len(remaining)} 个交给LLM")
     
+    if remaining:
+        results += match_keys_llm(remaining, key_description_path, shortlist_k, index, lexical_candidates)
+    
+    order = {item["key"]: i for i, item in enumerate(key_value_pairs)}
+    results.sort(key=lambda item: order.get(item["old_key"], len(order)))
+    return results
+
+def _table_label_queries(table):
+    """单次调用匹配时用于筛选候选key的检索项：表格中像标签的单元格及其右侧单元格的值"""
+    queries = []
+    for r in range(len(table.rows)):
+        row = table.row_cells(r)
+        for i, cell in enumerate(row):
+            if label_score(cell.text) >= 0.5:
+                value = row[i + 1].text if i + 1 < len(row) else ""
+                queries.append({"key": cell.text.strip().rstrip(':：'), "value": value})
+    return queries
+
+def match_table_combined(table, key_description_path, table_format=DEFAULT_FORMAT, shortlist_k=0,
+                         embedding_index=None):
+    """
+    单次调用匹配：一次生成同时给出key、value所在单元格ID和new_key，省去第二次生成和中间的JSON序列化
+    
+    Args:
+        table: 表格模型
+        key_description_path: key描述文件路径
+        table_format: 发送给LLM的表格格式
+        shortlist_k: 大于0时按表格中的标签单元格筛选候选key放进提示词
+        embedding_index: 可选的key向量索引，筛选候选时使用
+    
+    Returns:
+        list: 与match_keys格式一致的结果列表
+    """
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    table_content, format_description = serialize_table(table, table_format)
+    
+    candidates = load_key_catalog(key_description_path)
+    key_description = read_file_content(key_description_path)
+    if shortlist_k > 0:
+        total = len(candidates)
+        candidates = shortlist_keys(_table_label_queries(table), key_description_path, shortlist_k, embedding_index)
+        if len(candidates) < total:
+            key_description = render_key_description(candidates)
+            print(f"候选筛选保留了 {len(candidates)}/{total} 个key")
+    
+    prompt = prepare_system_prompt_combined(
+        os.path.join(current_dir, 'table_system_prompt_combined.md'),
+        key_description,
+        table_content,
+        format_description
+    )
+    schema = combined_schema(table, candidates)
+    max_tokens = STAGE_TOKEN_OVERHEAD + (STAGE_1_TOKENS_PER_CELL + STAGE_2_TOKENS_PER_KEY // 2) * len(table.cells)
+    catalog_keys = {entry.key for entry in candidates}
+    
+    def validate(response):
+        items = [item for item in parse_response_1(response) if 'new_key' in item]
+        return check_cells(table, items) or check_new_keys(items, catalog_keys)
+    
+    print("单次调用匹配...")
+    for attempt in range(2):
+        try:
+            print(f"第{attempt+1}次调用LLM...")
+            # 重试时跳过缓存，避免复用无法解析的缓存结果
+            response = cascade_completion("单次调用", [{"role": "user", "content": prompt}], validate,
+                                          json_schema=schema, max_tokens=max_tokens, refresh_cache=attempt > 0)
+            _report_prompt_reuse("单次调用")
+            
+            if not response:
+                print("LLM返回空结果")
+                return []
+            
+            print(f"输出：\n{'-'*30}\n{response}\n{'-'*30}")
+            items = [item for item in parse_response_1(response) if 'new_key' in item]
+            break
+        except Exception as e:
+            if attempt == 0:
+                print(f"单次调用匹配失败: {str(e)}，重试中...")
+                continue
+            print(f"单次调用匹配最终失败: {str(e)}")
+            return []
+    
+    results = []
+    for item in resolve_positions(table, items):
+        results.append({
+            "old_key": item["key"],
+            "value": item["value"],
+            "new_key": item["new_key"],
+            "valuePos": item.get("valuePos", ""),
+            "valueId": item.get("valueId", "")
+        })
+    print(f"匹配完成，返回 {len(results)} 个结果")
+    return results
+
+def match_table(table_content_path, key_description_path, table_format=DEFAULT_FORMAT,
+                use_rules=False, rule_threshold=DEFAULT_CONFIDENCE_THRESHOLD, use_embeddings=False,
+                use_lexical=False, shortlist_k=0, match_mode=MATCH_MODE_TWO_STAGE):
+    """
+    两阶段表格匹配：
+    1. 提取key-value对（规则提取或LLM）
+    2. 进行key语义匹配
+    
+    Args:
+        table_content_path: 表格文件路径（table_N.html）
+        key_description_path: key描述文件路径
+        table_format: 发送给LLM的表格格式（见table_serializers.SERIALIZERS）
+        use_rules: 第一阶段是否先使用规则提取
+        rule_threshold: 规则提取的置信度阈值，低于该值时使用LLM
+        use_embeddings: 第二阶段是否先使用key向量索引
+        use_lexical: 第二阶段是否先使用key词汇索引
+        shortlist_k: 第二阶段LLM提示词中每个key保留的候选数，0表示使用完整的key描述文件
+        match_mode: 匹配方式，combined时单次调用LLM完成匹配（不使用规则提取和词汇索引）
+    
+    Returns:
+        list: [{"old_key": "...", "value": "...", "new_key": "...", "valuePos": "..."}]
+    """
+    # 加载提取器生成的表格模型（不再重复解析HTML）
+    table = load_table(table_content_path)
+    
+    if match_mode == MATCH_MODE_COMBINED:
+        embedding_index = get_key_embedding_index(key_description_path) if use_embeddings and shortlist_k else None
+        return match_table_combined(table, key_description_path, table_format, shortlist_k, embedding_index)
+    
+    print("开始两阶段表格匹配...")
+    key_value_pairs = extract_key_values(table, table_format, use_rules, rule_threshold)
+    if not key_value_pairs:
+        return []
+    
+    return match_keys(key_value_pairs, key_description_path, use_embeddings, use_lexical, shortlist_k)
+
+def _match_table_timed(table_path, key_description_path, match_options):
+    """执行单个表格的匹配，异常不向外传播，返回(结果列表, 耗时秒数)"""
+    start = time.perf_counter()
+    try:
+        results = match_table(table_path, key_description_path, **match_options)
+    except Exception as e:
+        print(f"表格 {os.path.basename(table_path)} 匹配失败: {str(e)}")
+        results = []
+    return results, time.perf_counter() - start
+
+def _pipeline_stage_1(table_path, match_options):
+    """流水线第一阶段：提取key-value对"""
+    with llm_manager.use_stage_model(PIPELINE_STAGE_1):
+        print(f"{os.path.basename(table_path)} 第一阶段开始")
+        table = load_table(table_path)
+        return extract_key_values(table, match_options["table_format"], match_options["use_rules"],
+                                  match_options["rule_threshold"])
+
+def _pipeline_stage_2(key_description_path, match_options, table_path, key_value_pairs):
+    """流水线第二阶段：key匹配"""
+    with llm_manager.use_stage_model(PIPELINE_STAGE_2):
+        print(f"{os.path.basename(table_path)} 第二阶段开始")
+        return match_keys(key_value_pairs, key_description_path, match_options["use_embeddings"],
+                          match_options["use_lexical"], match_options["shortlist_k"])
+
+def _run_matches(table_paths, key_description_path, match_options, max_workers, stage_workers=None):
+    """
+    匹配一批表格，max_workers大于1时并发调用LLM；
+    给出stage_workers（两个阶段的工作线程数）且为两阶段匹配时按流水线执行
+    
+    Returns:
+        dict: {表格路径: (结果列表, 耗时秒数)}
+    """
+    if stage_workers and match_options["match_mode"] == MATCH_MODE_TWO_STAGE:
+        return run_pipeline(table_paths, lambda path: _pipeline_stage_1(path, match_options),
+                            lambda path, pairs: _pipeline_stage_2(key_description_path, match_options, path, pairs),
+                            *stage_workers)
+    
+    if max_workers <= 1 or len(table_paths) <= 1:
+        return {path: _match_table_timed(path, key_description_path, match_options) for path in table_paths}
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(table_paths)),
+                            thread_name_prefix="table_matcher") as executor:
+        futures = {path: executor.submit(_match_table_timed, path, key_description_path, match_options)
+                   for path in table_paths}
+        return {path: future.result() for path, future in futures.items()}
+
+def match_tables(table_files_paths: list[str], key_description_path: str, match_results_dir: str,
+                 table_format: str = DEFAULT_FORMAT, incremental: bool = False,
+                 group_repeated: bool = False, max_workers: int = 1, use_rules: bool = False,
+                 rule_threshold: float = DEFAULT_CONFIDENCE_THRESHOLD, use_embeddings: bool = False,
+                 use_lexical: bool = False, shortlist_k: int = 0, match_mode: str = MATCH_MODE_TWO_STAGE,
+                 pipeline: bool = False, stage_workers: tuple = (1, 1)):
+    """
+    批量处理表格文件进行两阶段匹配
+    
+    incremental为True时，表格内容和匹配上下文（key描述、提示词、表格格式）都未变化的表格
+    直接沿用已有的table_N_matches.json，不再调用LLM。
+    group_repeated为True时，结构指纹相同的重复表格只匹配第一个，
+    其余表格沿用它的key映射，value和位置取自各自的单元格。
+    max_workers为同时进行中的表格匹配数上限，大于1时并发调用LLM（适用于远程模型）；
+    结果按输入顺序保存，单个表格失败不影响其他表格。
+    use_rules为True时第一阶段先使用规则提取，置信度低于rule_threshold的表格才调用LLM。
+    use_embeddings / use_lexical为True时第二阶段先用key向量索引 / 词汇索引匹配，只有无法确定的key调用LLM。
+    shortlist_k大于0时第二阶段提示词中每个key只放入top-k个候选key（召回率见benchmarks/bench_key_shortlist.py）。
+    match_mode为combined时每个表格只调用一次LLM（对比见benchmarks/bench_match_modes.py）。
+    pipeline为True时两阶段匹配按流水线执行：第一阶段和第二阶段各有stage_workers指定数量的工作线程，
+    表格N的第二阶段与表格N+1的第一阶段同时进行（本地模型每个阶段只用一个工作线程，
+    用llm_manager.init_stage_model为两个阶段加载不同的模型实例后LLM调用才会重叠）
+    """
     stats = {
         "total_tables_processed": 0,
         "total_keys_matched": 0,
-        "tables_with_matches": 0
+        "tables_with_matches": 0,
+        "tables_skipped": 0,
+        "tables_projected": 0,
+        "wall_time": 0.0,
+        "summed_latency": 0.0,
+        "speedup": 1.0,
+        "tables_per_minute": 0.0,
+        "prompt_eval_saved": 0.0
     }
     
     if not table_files_paths:
@@ -245,34 +676,151 @@ def match_tables(table_files_paths: list[str], key_description_path: str, match_
     
     os.makedirs(match_results_dir, exist_ok=True)
     
-    # 处理每个表格文件
+    if max_workers > 1 and not llm_manager.supports_concurrency():
+        print("本地模型不支持并发推理，改为逐个匹配表格")
+        max_workers = 1
+    stage_workers = tuple(stage_workers) if pipeline else None
+    if stage_workers and not llm_manager.supports_concurrency():
+        stage_workers = (1, 1)
+    
+    start_time = time.perf_counter()
+    saved_ms_before = llm_manager.get_prompt_stats()["saved_ms"]
+    manifest = _load_match_manifest(match_results_dir) if incremental else {}
+    match_options = {"table_format": table_format, "use_rules": use_rules, "rule_threshold": rule_threshold,
+                     "use_embeddings": use_embeddings, "use_lexical": use_lexical, "shortlist_k": shortlist_k,
+                     "match_mode": match_mode}
+    context_hash = _match_context_hash(key_description_path, match_options)
+    
+    existing_paths = []
     for table_path in table_files_paths:
-        if not os.path.exists(table_path):
+        if os.path.exists(table_path):
+            existing_paths.append(table_path)
+        else:
             print(f"警告：文件 {table_path} 不存在，跳过处理。")
+    
+    tables = {}
+    if group_repeated:
+        tables = {table_path: load_table(table_path) for table_path in existing_paths}
+        groups = group_tables(list(tables.items()))
+        repeated = [group for group in groups if len(group) > 1]
+        if repeated:
+            print(f"识别到 {len(repeated)} 组重复表格: "
+                  + "; ".join(", ".join(os.path.basename(path) for path in group) for group in repeated))
+    
+    # ---- 规划：沿用已有结果 / 调用LLM匹配 / 投射同版式表格的结果 ----
+    fingerprints = {}
+    structures = {}
+    results_by_path = {}
+    skipped = set()
+    # 结构指纹 -> 该版式的代表表格路径
+    representatives = {}
+    to_match = []
+    to_project = []
+    for table_path in existing_paths:
+        table_file_name = os.path.basename(table_path)
+        output_path = os.path.join(match_results_dir, table_file_name.replace(".html", "_matches.json"))
+        fingerprints[table_path] = hashlib.sha256(
+            f"{context_hash}:{get_table_fingerprint(table_path)}".encode('utf-8')).hexdigest()
+        structure = structural_fingerprint(tables[table_path]) if group_repeated else None
+        structures[table_path] = structure
+        
+        if manifest.get(table_file_name) == fingerprints[table_path] and os.path.exists(output_path):
+            # 表格和匹配上下文都未变化，沿用已有匹配结果
+            with open(output_path, 'r', encoding='utf-8') as f:
+                results_by_path[table_path] = json.load(f)
+            skipped.add(table_path)
+            stats["tables_skipped"] += 1
+            print(f"{table_file_name} 未变化，沿用已有的 {len(results_by_path[table_path])} 个匹配结果")
+            if structure and results_by_path[table_path]:
+                representatives.setdefault(structure, table_path)
+        elif structure in representatives:
+            to_project.append(table_path)
+        else:
+            to_match.append(table_path)
+            if structure:
+                representatives.setdefault(structure, table_path)
+    
+    # ---- 执行：并发匹配各代表表格 ----
+    latencies = {}
+    match_time = 0.0
+    
+    def run(paths):
+        nonlocal match_time
+        run_start = time.perf_counter()
+        for path, (results, elapsed) in _run_matches(paths, key_description_path, match_options,
+                                                     max_workers, stage_workers).items():
+            results_by_path[path] = results
+            latencies[path] = elapsed
+        match_time += time.perf_counter() - run_start
+    
+    run(to_match)
+    
+    # 代表表格匹配失败的版式，由该版式的下一个表格重新匹配
+    failed = {structures[path] for path in to_match if structures[path] and not results_by_path[path]}
+    retry = []
+    for table_path in to_project:
+        structure = structures[table_path]
+        if structure in failed:
+            failed.discard(structure)
+            representatives[structure] = table_path
+            retry.append(table_path)
+    run(retry)
+    
+    for table_path in to_project:
+        if table_path in results_by_path:
             continue
-            
+        representative = representatives[structures[table_path]]
+        results_by_path[table_path] = project_results(results_by_path.get(representative) or [], tables[table_path])
+        stats["tables_projected"] += 1
+        print(f"{os.path.basename(table_path)} 与 {os.path.basename(representative)} 版式相同，沿用其key映射")
+    
+    # ---- 汇总：按输入顺序保存结果 ----
+    for table_path in existing_paths:
         stats["total_tables_processed"] += 1
         table_file_name = os.path.basename(table_path) # 获取文件名用于输出
-          # 调用两阶段表格匹配
-        results = match_table(table_path, key_description_path)
+        output_filename = table_file_name.replace(".html", "_matches.json")
+        output_path = os.path.join(match_results_dir, output_filename)
+        results = results_by_path.get(table_path) or []
         
         if results:
             stats["tables_with_matches"] += 1
             stats["total_keys_matched"] += len(results)
+            if table_path in skipped:
+                continue
             
             # 保存结果
-            output_filename = table_file_name.replace(".html", "_matches.json")
-            output_path = os.path.join(match_results_dir, output_filename)
-            
             with open(output_path, 'w', encoding='utf-8') as f:
                 json.dump(results, f, ensure_ascii=False, indent=2)
+            manifest[table_file_name] = fingerprints[table_path]
             print(f"已为 {table_file_name} 保存 {len(results)} 个匹配结果到 {output_path}")
         else:
+            # 未记录指纹，下次运行会重试；删除已过期的旧结果
+            manifest.pop(table_file_name, None)
+            if os.path.exists(output_path):
+                os.remove(output_path)
             print(f"文件 {table_file_name} 未匹配到结果。")
     
+    _save_match_manifest(match_results_dir, manifest)
+    
+    stats["wall_time"] = time.perf_counter() - start_time
+    stats["summed_latency"] = sum(latencies.values())
+    if latencies and stats["wall_time"] > 0:
+        stats["speedup"] = stats["summed_latency"] / stats["wall_time"]
+    if latencies and match_time > 0:
+        stats["tables_per_minute"] = len(latencies) * 60 / match_time
+    stats["prompt_eval_saved"] = (llm_manager.get_prompt_stats()["saved_ms"] - saved_ms_before) / 1000
+    
     print(f"表格匹配完成: 处理了 {stats['total_tables_processed']} 个表格，"
           f"{stats['tables_with_matches']} 个有匹配结果，"
+          f"{stats['tables_skipped']} 个未变化已跳过，"
+          f"{stats['tables_projected']} 个沿用重复表格的匹配，"
           f"总共匹配了 {stats['total_keys_matched']} 个键值对")
+    concurrency = f"流水线 {stage_workers[0]}+{stage_workers[1]}" if stage_workers else f"并发数 {max_workers}"
+    print(f"LLM匹配 {len(latencies)} 个表格（{concurrency}）: 总耗时 {stats['wall_time']:.2f} 秒，"
+          f"单表耗时合计 {stats['summed_latency']:.2f} 秒，加速比 {stats['speedup']:.2f}x，"
+          f"吞吐量 {stats['tables_per_minute']:.1f} 表格/分钟")
+    if stats["prompt_eval_saved"]:
+        print(f"KV状态复用共节省提示词计算约 {stats['prompt_eval_saved']:.2f} 秒")
     
     return stats
 
@@ -303,7 +851,7 @@ if __name__ == "__main__":
             print(f"{i}. old_key: {result['old_key']}")
             print(f"   value: {result['value']}")
             print(f"   new_key: {result['new_key'] or '无匹配'}")
-            print(f"   valuePos: {result['valuePos']}")
+            print(f"   valuePos: {result['valuePos']} ({result.get('valueId', '')})")
             print()
         
         # 保存匹配结果到文件（与batch处理保持一致的格式）
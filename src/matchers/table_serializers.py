@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+表格序列化模块
+把表格模型（extractors.table_model.Table）转换为发送给LLM的文本格式。
+所有格式都能让LLM按单元格ID（列字母+行号，如B2）引用单元格
+"""
+
+from extractors.table_model import make_cell_id
+
+# 合并单元格的占位标记
+COLSPAN_MARK = '<'
+ROWSPAN_MARK = '^'
+
+
+def to_compact_html(table):
+    """精简HTML，每个单元格带id属性"""
+    return table.to_html(cell_ids=True)
+
+
+def to_markdown(table):
+    """Markdown网格：表头为列字母，首列为行号，合并单元格用<（向左合并）和^（向上合并）标记"""
+    lines = ['| | ' + ' | '.join(_column_letters(table.n_cols)) + ' |',
+             '|---' * (table.n_cols + 1) + '|']
+    for row in range(table.n_rows):
+        texts = [_escape_markdown(text) for text in _grid_row(table, row)]
+        lines.append(f'| {row + 1} | ' + ' | '.join(texts) + ' |')
+    return '\n'.join(lines)
+
+
+def to_tsv(table):
+    """TSV网格：首行为列字母，每行以行号开头，合并单元格用<和^标记"""
+    lines = ['\t' + '\t'.join(_column_letters(table.n_cols))]
+    for row in range(table.n_rows):
+        texts = [_escape_tsv(text) for text in _grid_row(table, row)]
+        lines.append(f'{row + 1}\t' + '\t'.join(texts))
+    return '\n'.join(lines)
+
+
+def to_cell_list(table):
+    """单元格列表：每行一个单元格"ID: 文本"，合并单元格注明覆盖范围"""
+    lines = []
+    for cell in table.cells:
+        span = ''
+        if cell.rowspan > 1 or cell.colspan > 1:
+            span = f' ({cell.id}:{make_cell_id(cell.row + cell.rowspan - 1, cell.col + cell.colspan - 1)})'
+        lines.append(f'{cell.id}{span}: {cell.text}')
+    return '\n'.join(lines)
+
+
+# 格式名 -> (序列化函数, 提示词中的格式说明)
+SERIALIZERS = {
+    "html": (to_compact_html, "精简HTML，每个单元格的id属性即单元格ID"),
+    "markdown": (to_markdown, f"Markdown网格，首行为列字母，首列为行号，单元格ID为列字母+行号；"
+                              f"{COLSPAN_MARK}表示与左侧单元格合并，{ROWSPAN_MARK}表示与上方单元格合并"),
+    "tsv": (to_tsv, f"制表符分隔的网格，首行为列字母，每行第一项为行号，单元格ID为列字母+行号；"
+                    f"{COLSPAN_MARK}表示与左侧单元格合并，{ROWSPAN_MARK}表示与上方单元格合并"),
+    "cells": (to_cell_list, "单元格列表，每行为“单元格ID: 单元格文本”，括号内为合并单元格覆盖的范围"),
+}
+
+DEFAULT_FORMAT = "html"
+
+
+def serialize_table(table, table_format=DEFAULT_FORMAT):
+    """
+    按指定格式序列化表格
+
+    Returns:
+        tuple: (表格文本, 格式说明)
+    """
+    if table_format not in SERIALIZERS:
+        raise ValueError(f"不支持的表格格式: {table_format}，可选: {', '.join(SERIALIZERS)}")
+    serializer, description = SERIALIZERS[table_format]
+    return serializer(table), description
+
+
+def _column_letters(n_cols):
+    return [make_cell_id(0, col)[:-1] for col in range(n_cols)]
+
+
+def _grid_row(table, row):
+    """网格中一行的文本，合并单元格的非起始位置替换为标记"""
+    texts = []
+    for col in range(table.n_cols):
+        cell = table.cell_at(row, col)
+        if cell is None:
+            texts.append('')
+        elif cell.row == row and cell.col == col:
+            texts.append(cell.text)
+        elif cell.row == row:
+            texts.append(COLSPAN_MARK)
+        else:
+            texts.append(ROWSPAN_MARK)
+    return texts
+
+
+def _escape_markdown(text):
+    return text.replace('|', '\\|').replace('\n', ' ')
+
+
+def _escape_tsv(text):
+    return text.replace('\t', ' ').replace('\n', ' ')
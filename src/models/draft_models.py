@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+投机解码的草稿模型
+匹配器输出的key、value、old_key几乎都是从提示词中原样复制的，草稿token被接受的比例很高：
+- prompt_lookup: 在已有token中查找与末尾n-gram相同的位置，把其后的token作为草稿（llama-cpp自带）
+- SmallModelDraft: 用同词表的小GGUF模型贪心生成草稿（如gemma-3-1b作为gemma-3-4b的草稿）
+MeasuredDraftModel包装任意草稿模型，统计草稿token数和被目标模型接受的token数；
+SpeculativeLlama是使用草稿模型时的目标模型，避免llama-cpp-python为所有位置保存logits
+"""
+
+import inspect
+
+import numpy as np
+from llama_cpp import Llama
+from llama_cpp.llama_speculative import LlamaDraftModel, LlamaPromptLookupDecoding
+
+# 每次提出的草稿token数
+DEFAULT_NUM_PRED_TOKENS = 10
+
+
+class SmallModelDraft(LlamaDraftModel):
+    """
+    用小模型贪心生成草稿，小模型必须与目标模型使用相同的词表
+
+    属性:
+        model: 小模型（llama_cpp.Llama实例）
+        num_pred_tokens: 每次生成的草稿token数
+    """
+
+    def __init__(self, model, num_pred_tokens=DEFAULT_NUM_PRED_TOKENS):
+        self.model = model
+        self.num_pred_tokens = num_pred_tokens
+
+    def __call__(self, input_ids, /, **kwargs):
+        draft = []
+        # generate会复用与上次输入的公共前缀，每次只需计算新增的token
+        generator = self.model.generate(input_ids.tolist(), top_k=1, temp=0)
+        try:
+            for token in generator:
+                if token == self.model.token_eos():
+                    break
+                draft.append(token)
+                if len(draft) >= self.num_pred_tokens:
+                    break
+        finally:
+            generator.close()
+        return np.array(draft, dtype=np.intc)
+
+
+class MeasuredDraftModel(LlamaDraftModel):
+    """
+    统计草稿接受率的包装：
+    目标模型下一次调用草稿模型时，输入中紧接上次输入之后、与上次草稿相同的部分即为被接受的草稿token
+    """
+
+    def __init__(self, draft_model):
+        self.draft_model = draft_model
+        self.stats = {"calls": 0, "proposed": 0, "accepted": 0}
+        self._last_input = None
+        self._last_draft = None
+
+    def __call__(self, input_ids, /, **kwargs):
+        self._count_accepted(input_ids)
+        draft = self.draft_model(input_ids, **kwargs)
+        self.stats["calls"] += 1
+        self.stats["proposed"] += len(draft)
+        self._last_input = input_ids.copy()
+        self._last_draft = draft
+        return draft
+
+    def _count_accepted(self, input_ids):
+        last_input, last_draft = self._last_input, self._last_draft
+        if last_input is None or len(last_draft) == 0:
+            return
+        # 新的一次生成（输入不是上次输入的延续），上次的草稿无法判断是否被接受
+        if len(input_ids) <= len(last_input) or not np.array_equal(input_ids[:len(last_input)], last_input):
+            return
+        continuation = input_ids[len(last_input):len(last_input) + len(last_draft)]
+        accepted = 0
+        for token, drafted in zip(continuation, last_draft):
+            if token != drafted:
+                break
+            accepted += 1
+        self.stats["accepted"] += accepted
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats["acceptance_rate"] = stats["accepted"] / stats["proposed"] if stats["proposed"] else 0.0
+        return stats
+
+
+def prompt_lookup_draft(num_pred_tokens=DEFAULT_NUM_PRED_TOKENS, max_ngram_size=2):
+    """n-gram提示词查找草稿"""
+    return LlamaPromptLookupDecoding(max_ngram_size=max_ngram_size, num_pred_tokens=num_pred_tokens)
+
+
+class SpeculativeLlama(Llama):
+    """
+    使用草稿模型的目标模型
+
+    llama-cpp-python设置draft_model后对每个批次的所有token输出logits，并复制到n_ctx x n_vocab的scores中
+    （需要同时设置logits_all=True，gemma-3词表约26万，n_ctx=10000时超过10GB）。
+    采样在llama.cpp中按批次内的位置完成，并不读取scores，这里只在校验草稿的短批次（采样的token+草稿）
+    中输出每个位置的logits，提示词批次只输出最后一个token，也不复制logits，
+    scores保持n_batch行（提示词缓存保存的状态大小与不使用草稿时相同）
+
+    draft_model在Llama初始化之后才设置，llama-cpp-python不会因此打开logits_all。
+    eval依赖llama-cpp-python 0.3.x的内部属性（_ctx.kv_cache_seq_rm、_batch.set_batch(logits_all=)、
+    input_ids、n_tokens），这些属性不存在时batched_verify为False，eval使用Llama.eval且不设置draft_model
+    （不使用投机解码）
+    """
+
+    def __init__(self, *args, verify_tokens=DEFAULT_NUM_PRED_TOKENS + 1, **kwargs):
+        """
+        Args:
+            verify_tokens: 校验批次的最大长度（1 + 每次草稿的token数），不超过该长度的批次输出所有位置的logits
+        """
+        self.verify_tokens = verify_tokens
+        draft_model = kwargs.pop("draft_model", None)
+        super().__init__(*args, **kwargs)
+        self.batched_verify = _has_eval_internals(self)
+        self.draft_model = draft_model if self.batched_verify else None
+
+    def eval(self, tokens):
+        if not self.batched_verify:
+            return super().eval(tokens)
+        logits_all = self.draft_model is not None and len(tokens) <= self.verify_tokens
+        self._ctx.kv_cache_seq_rm(-1, self.n_tokens, -1)
+        for i in range(0, len(tokens), self.n_batch):
+            batch = tokens[i:i + self.n_batch]
+            n_past = self.n_tokens
+            self._batch.set_batch(batch=batch, n_past=n_past, logits_all=logits_all)
+            self._ctx.decode(self._batch)
+            self.input_ids[n_past:n_past + len(batch)] = batch
+            self.n_tokens += len(batch)
+            self._requires_eval = False
+
+
+def _has_eval_internals(model):
+    """SpeculativeLlama.eval用到的llama-cpp-python内部属性是否都存在"""
+    try:
+        if not all(hasattr(model, name) for name in ("_ctx", "_batch", "input_ids", "n_tokens", "n_batch")):
+            return False
+        if not callable(getattr(model._ctx, "kv_cache_seq_rm", None)):
+            return False
+        return "logits_all" in inspect.signature(model._batch.set_batch).parameters
+    except (TypeError, ValueError):
+        return False
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地推理服务（inference_server.py）的客户端
+ServedModel实现ModelManager用到的llama_cpp.Llama接口（create_chat_completion、tokenize），
+请求转发给常驻的推理服务，模型只在服务进程中加载一次，多次运行和多个进程共用同一个已预热的模型。
+只使用标准库，连接推理服务时不需要导入llama_cpp
+"""
+
+import json
+import http.client
+import urllib.request
+from urllib.parse import urlsplit
+
+# 推理服务的默认地址
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+# 检测推理服务是否运行的超时（秒），服务未运行时应尽快回退到进程内加载
+DETECT_TIMEOUT = 0.5
+# 请求的连接和单次读取超时（秒）：服务端同一模型串行推理，排队等待和非流式生成都计入一次读取
+REQUEST_TIMEOUT = 600
+
+# 连接失败、超时（socket.timeout）、连接被断开和无法解析的响应
+_CONNECTION_ERRORS = (OSError, http.client.HTTPException)
+
+
+def find_served_model(server_url, model_name):
+    """
+    查询推理服务是否已加载指定的模型文件
+
+    Args:
+        server_url: 推理服务地址
+        model_name: models目录下的模型文件名
+
+    Returns:
+        str: 服务端的模型标识（文件名:大小:修改时间），服务未运行或未加载该模型时返回None
+    """
+    try:
+        with urllib.request.urlopen(f"{server_url.rstrip('/')}/v1/models", timeout=DETECT_TIMEOUT) as response:
+            models = json.load(response).get("data", [])
+    except Exception:
+        return None
+    for model in models:
+        if model.get("id", "").split(":")[0] == model_name:
+            return model["id"]
+    return None
+
+
+class ServedModel:
+    """
+    推理服务中的一个模型
+
+    属性:
+        server_url: 推理服务地址
+        model_id: 服务端的模型标识
+        served: 标记为推理服务中的模型（输出语法由服务端编译）
+    """
+
+    served = True
+
+    def __init__(self, server_url, model_id):
+        self.server_url = server_url.rstrip('/')
+        self.model_id = model_id
+
+    def _connect(self):
+        parts = urlsplit(self.server_url)
+        return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=REQUEST_TIMEOUT)
+
+    def _unreachable(self, error):
+        """连接失败和超时统一转为RuntimeError，与服务端返回错误的处理方式一致"""
+        return RuntimeError(f"推理服务 {self.server_url} 无响应或连接失败: {error}")
+
+    def _post(self, path, body):
+        """发送请求，返回(连接, 响应)，非200、连接失败或超时时抛出RuntimeError"""
+        connection = self._connect()
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        try:
+            connection.request("POST", path, body=payload, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            if response.status != 200:
+                detail = response.read().decode('utf-8', errors='replace')
+                connection.close()
+                raise RuntimeError(f"推理服务返回 {response.status}: {detail}")
+        except _CONNECTION_ERRORS as e:
+            connection.close()
+            raise self._unreachable(e) from e
+        return connection, response
+
+    def _read_json(self, connection, response):
+        """读取完整的JSON响应并关闭连接"""
+        try:
+            return json.load(response)
+        except _CONNECTION_ERRORS as e:
+            raise self._unreachable(e) from e
+        finally:
+            connection.close()
+
+    def create_chat_completion(self, messages, temperature=0, grammar=None, max_tokens=None, stream=False):
+        """
+        与Llama.create_chat_completion相同的返回格式；
+        grammar为{"grammar": GBNF文本}或{"json_schema": schema}（见ModelManager._get_grammar）
+        """
+        body = {"model": self.model_id, "messages": messages, "temperature": temperature, "stream": stream}
+        if max_tokens:
+            body["max_tokens"] = max_tokens
+        if grammar and grammar.get("grammar") is not None:
+            body["grammar"] = grammar["grammar"]
+        elif grammar and grammar.get("json_schema") is not None:
+            body["response_format"] = {"type": "json_schema",
+                                       "json_schema": {"name": "response", "schema": grammar["json_schema"]}}
+
+        connection, response = self._post("/v1/chat/completions", body)
+        if not stream:
+            return self._read_json(connection, response)
+        return self._iter_chunks(connection, response)
+
+    def _iter_chunks(self, connection, response):
+        """逐个返回SSE分块，生成器关闭时断开连接（服务端随即停止生成）"""
+        try:
+            while True:
+                try:
+                    line = response.readline()
+                except _CONNECTION_ERRORS as e:
+                    raise self._unreachable(e) from e
+                if not line:
+                    return
+                line = line.strip()
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[len(b"data: "):]
+                if data == b"[DONE]":
+                    return
+                yield json.loads(data)
+        finally:
+            connection.close()
+
+    def tokenize(self, text, add_bos=True, special=False):
+        """用服务端模型的分词器分词"""
+        connection, response = self._post("/extras/tokenize", {"model": self.model_id,
+                                                               "input": text.decode('utf-8'),
+                                                               "add_bos": add_bos, "special": special})
+        return self._read_json(connection, response)["tokens"]
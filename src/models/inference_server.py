@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地推理服务 - 常驻进程持有已加载的GGUF模型，提供OpenAI兼容的HTTP接口（仅监听本机）
+每次运行main.py不再重新加载和预热模型；ModelManager.init_local_model检测到服务已加载同一模型时
+直接连接（见inference_client.py），服务未运行时回退到进程内加载。多个进程可以共用同一个服务
+
+接口:
+    GET  /v1/models             已加载的模型，id为 文件名:大小:修改时间（与进程内加载的模型标识一致，响应缓存通用）
+    POST /v1/chat/completions   支持stream（SSE）、max_tokens、response_format（json_schema）和grammar（GBNF）
+    POST /extras/tokenize       {"input": 文本} -> {"tokens": [...]}
+
+用法:
+    python src/models/inference_server.py
+    python src/models/inference_server.py --port 8765 --draft prompt_lookup --small-model Qwen3-0.6B-Q8_0.gguf
+"""
+
+import os
+import sys
+import json
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
+
+from models.model_manager import ModelManager
+from models.inference_client import DEFAULT_SERVER_URL
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """OpenAI兼容接口，模型由manager（进程内加载的ModelManager）持有"""
+    manager = None
+
+    def _served_models(self):
+        """{模型标识: Llama实例}"""
+        models = {}
+        for model, model_id in ((self.manager.local_model, self.manager.local_model_id),
+                                (self.manager.small_model, self.manager.small_model_id)):
+            if model is not None:
+                models[model_id] = model
+        return models
+
+    def _find_model(self, name):
+        """按模型标识或文件名查找模型，未指定时使用主模型"""
+        models = self._served_models()
+        if not name:
+            return self.manager.local_model
+        for model_id, model in models.items():
+            if name in (model_id, model_id.split(":")[0]):
+                return model
+        return None
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status, message):
+        self._send_json(status, {"error": {"message": message}})
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        if path == "/v1/models":
+            self._send_json(200, {"object": "list",
+                                  "data": [{"id": model_id, "object": "model", "owned_by": "local"}
+                                           for model_id in self._served_models()]})
+        elif path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_error(404, f"未知路径: {path}")
+
+    def do_POST(self):
+        path = urlsplit(self.path).path.rstrip('/')
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+        except json.JSONDecodeError as e:
+            self._send_error(400, f"请求不是合法的JSON: {str(e)}")
+            return
+
+        model = self._find_model(body.get("model"))
+        if model is None:
+            self._send_error(404, f"未加载模型: {body.get('model')}")
+            return
+
+        try:
+            if path == "/v1/chat/completions":
+                self._chat_completion(model, body)
+            elif path == "/extras/tokenize":
+                tokens = model.tokenize(body.get("input", "").encode('utf-8'),
+                                        add_bos=body.get("add_bos", True), special=body.get("special", False))
+                self._send_json(200, {"tokens": tokens})
+            else:
+                self._send_error(404, f"未知路径: {path}")
+        except Exception as e:
+            print(f"处理请求失败: {str(e)}")
+            self._send_error(500, str(e))
+
+    def _request_grammar(self, body):
+        """请求中的grammar（GBNF）或response_format的json_schema编译为LlamaGrammar"""
+        if body.get("grammar"):
+            return self.manager._get_grammar(None, body["grammar"])
+        response_format = body.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = (response_format.get("json_schema") or {}).get("schema")
+            if schema is not None:
+                return self.manager._get_grammar(schema, None)
+        return None
+
+    def _chat_completion(self, model, body):
+        """同一模型的请求串行推理，客户端断开时停止生成"""
+        kwargs = {"messages": body["messages"], "temperature": body.get("temperature", 0),
+                  "grammar": self._request_grammar(body), "max_tokens": body.get("max_tokens")}
+        with self.manager._local_lock(model):
+            if not body.get("stream"):
+                self._send_json(200, model.create_chat_completion(**kwargs))
+                return
+
+            stream = model.create_chat_completion(stream=True, **kwargs)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.end_headers()
+            try:
+                for chunk in stream:
+                    self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+            finally:
+                stream.close()
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(host, port, model_name, draft=None, small_model_name=None, prompt_cache=True):
+    """
+    加载模型并启动推理服务（阻塞直到Ctrl+C）
+
+    Args:
+        host: 监听地址
+        port: 监听端口
+        model_name: models目录下的主模型文件名
+        draft: 投机解码的草稿方式，见ModelManager.init_local_model
+        small_model_name: 同时加载的级联小模型文件名，None时不加载
+        prompt_cache: 是否开启KV状态缓存
+    """
+    manager = ModelManager()
+    # 服务自身必须在进程内加载模型
+    if not manager.init_local_model(model_name, draft=draft, server_url=None):
+        sys.exit(1)
+    if small_model_name and not manager.init_small_model(small_model_name, server_url=None):
+        sys.exit(1)
+    if prompt_cache:
+        manager.enable_prompt_cache()
+
+    InferenceHandler.manager = manager
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    print(f"本地推理服务已启动: http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        stats = manager.get_prompt_stats()
+        print(f"推理服务已停止，提示词计算 {stats['calls']} 次，KV状态复用节省 {stats['saved_ms'] / 1000:.1f} 秒")
+
+
+if __name__ == "__main__":
+    default = urlsplit(DEFAULT_SERVER_URL)
+    parser = argparse.ArgumentParser(description="常驻的本地推理服务（OpenAI兼容接口）")
+    parser.add_argument("--host", default=default.hostname, help="监听地址，默认只监听本机")
+    parser.add_argument("--port", type=int, default=default.port, help="监听端口")
+    parser.add_argument("--model", default="gemma-3-4b-it-Q4_K_M.gguf", help="主模型文件名")
+    parser.add_argument("--draft", default="prompt_lookup", help="投机解码的草稿方式，none为不使用")
+    parser.add_argument("--small-model", default=None, help="同时加载的级联小模型文件名")
+    parser.add_argument("--no-prompt-cache", action="store_true", help="不开启KV状态缓存")
+    args = parser.parse_args()
+
+    serve(args.host, args.port, args.model, None if args.draft == "none" else args.draft,
+          args.small_model, not args.no_prompt_cache)
@@ -3,14 +3,33 @@
 
 """
 模型管理器 - 提供统一的LLM调用接口
-支持本地模型和远程API两种方式
+支持本地模型和远程API两种方式，本地推理服务（inference_server.py）运行时直接使用服务中已加载的模型
+llama_cpp、openai在初始化对应的模型时才导入，导入本模块不加载这些依赖
 """
 
+from __future__ import annotations
+
 import os
-from typing import List, Dict, Any, Optional, Union
+import sys
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Union, Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from llama_cpp import Llama, LlamaGrammar
+    from models.draft_models import MeasuredDraftModel
+
+# 添加项目根目录到系统路径
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_dir = os.path.dirname(current_dir)
+if project_dir not in sys.path:
+    sys.path.append(project_dir)
 
-from llama_cpp import Llama
-from openai import OpenAI
+from models.stream_guard import GenerationGuard, JSONArrayStreamParser, strip_thinking
+from models.inference_client import DEFAULT_SERVER_URL, ServedModel, find_served_model
 
 
 class ModelManager:
@@ -26,25 +45,90 @@ class ModelManager:
         self.remote_model = None
         self.api_key = None
         self.base_url = None
+        self.local_model_id = None
+        # 已连接的本地推理服务地址，为None时模型在进程内加载
+        self.server_url = None
+        # 投机解码的草稿模型（MeasuredDraftModel），为None时不使用投机解码
+        self.draft_model = None
+        # 级联的小模型：先用小模型生成，校验不通过时再用主模型（local_model）
+        self.small_model = None
+        self.small_model_id = None
+        # 固定给流水线各阶段的本地模型实例: {阶段: (Llama实例, 模型标识)}，未固定的阶段使用主模型
+        self.stage_models = {}
+        
+        # 本地嵌入模型（用于key向量索引）
+        self.embedding_model = None
+        self.embedding_model_id = None
+        
+        # LLM响应缓存（LLMResponseCache），为None时不缓存
+        self.response_cache = None
+        
+        # 本地模型的提示词计算统计，用于评估KV状态复用节省的时间
+        self.prompt_stats = {"calls": 0, "prompt_tokens": 0, "evaluated_tokens": 0,
+                             "prompt_eval_ms": 0.0, "saved_ms": 0.0}
         
         # 默认使用本地模型
         self.use_local_model = True
+        
+        # 按调用方给出的JSON Schema / GBNF语法约束输出（本地模型语法采样，远程API使用response_format）
+        self.constrained_decoding = True
+        # 远程API不支持response_format时置为False，之后不再发送
+        self.remote_schema_supported = True
+        # 已编译的语法: {GBNF文本: LlamaGrammar}
+        self._grammar_cache = OrderedDict()
+        
+        # 流式生成：增量解析JSON数组，检测到循环重复或超出预算时提前停止
+        self.use_streaming = True
+        # 默认的单次调用token预算和时间预算（秒），None表示不限制
+        self.max_tokens = None
+        self.time_budget = None
+        # 流式生成统计：调用次数、生成token数和各中止原因的次数
+        self.generation_stats = {"calls": 0, "tokens": 0, "repetition": 0, "max_tokens": 0,
+                                 "timeout": 0, "incomplete": 0}
+        # 各线程最近一次调用的统计（last_prompt_stats / last_generation_stats）和固定的流水线阶段
+        self._thread_state = threading.local()
+        # 保护累计统计和语法缓存
+        self._stats_lock = threading.Lock()
+        
+        # 每个本地模型实例不支持并发推理，同一实例的调用串行执行，不同实例可以同时推理
+        self._local_locks = {}
+        self._local_locks_guard = threading.Lock()
+        self._embedding_lock = threading.Lock()
+        
+        # 后台模型加载的就绪future，为None时没有后台加载
+        self._loading = None
     
-    def init_local_model(self, model_name: str = "gemma-3-4b-it-Q4_K_M.gguf") -> bool:
+    def init_local_model(self, model_name: str = "gemma-3-4b-it-Q4_K_M.gguf", draft: Optional[str] = None,
+                         num_pred_tokens: Optional[int] = None,
+                         server_url: Optional[str] = DEFAULT_SERVER_URL) -> bool:
         """
         初始化本地模型
+        本地推理服务已加载同一模型文件时直接连接服务（草稿方式由服务决定），否则在进程内加载
         
         Args:
             model_name: 模型文件名，默认为gemma-3-4b-it-Q4_K_M.gguf
+            draft: 投机解码的草稿方式：None不使用，"prompt_lookup"为n-gram提示词查找，
+                其他值为models目录下与主模型同词表的小模型文件名（词表不同时改用prompt_lookup）
+            num_pred_tokens: 每次提出的草稿token数，None时使用draft_models.DEFAULT_NUM_PRED_TOKENS
+            server_url: 本地推理服务地址，为None时不检测服务
 
         Returns:
             bool: 是否成功初始化
         """
+        served = self._connect_server(server_url, model_name)
+        if served is not None:
+            self.local_model, self.local_model_id = served, served.model_id
+            self.draft_model = None
+            self.use_local_model = True
+            return True
 
         try:
+            from llama_cpp import Llama
+            from models.draft_models import (MeasuredDraftModel, SmallModelDraft, SpeculativeLlama,
+                                             prompt_lookup_draft, DEFAULT_NUM_PRED_TOKENS)
+            num_pred_tokens = num_pred_tokens or DEFAULT_NUM_PRED_TOKENS
             # 获取models目录路径
             current_dir = os.path.dirname(os.path.abspath(__file__))
-            model_name = "gemma-3-4b-it-Q4_K_M.gguf"
             model_path = os.path.join(current_dir, model_name)
             
             # 检查模型文件是否存在
@@ -52,14 +136,35 @@ class ModelManager:
                 print(f"错误: 模型文件不存在: {model_path}")
                 return False
                 
-            self.local_model = Llama(
-                model_path=model_path, 
-                n_ctx=10000,
-                # offload_kqv=False,
-                # use_mmap=False,
-                # flash_attn=True,
-            )
+            self.draft_model = self._create_draft_model(draft, num_pred_tokens, current_dir)
+            if self.draft_model is None:
+                self.local_model = Llama(
+                    model_path=model_path, 
+                    n_ctx=10000,
+                    # offload_kqv=False,
+                    # use_mmap=False,
+                    # flash_attn=True,
+                )
+            else:
+                self.local_model = SpeculativeLlama(
+                    model_path=model_path,
+                    n_ctx=10000,
+                    draft_model=self.draft_model,
+                    verify_tokens=num_pred_tokens + 1,
+                )
+            if self.draft_model is not None and self.local_model.draft_model is None:
+                # 未适配的llama-cpp-python版本使用草稿时需要logits_all（n_ctx x 词表大小的scores），不使用投机解码
+                print("当前llama-cpp-python版本不支持按批次校验草稿，已关闭投机解码")
+                self.draft_model = None
+            if self.draft_model is not None and isinstance(self.draft_model.draft_model, SmallModelDraft):
+                if self.draft_model.draft_model.model.n_vocab() != self.local_model.n_vocab():
+                    print(f"草稿模型 {draft} 与主模型词表不同，改用prompt_lookup")
+                    self.draft_model = MeasuredDraftModel(prompt_lookup_draft(num_pred_tokens))
+                    self.local_model.draft_model = self.draft_model
             self.use_local_model = True
+            # 模型标识包含文件大小和修改时间，替换模型文件后缓存自动失效
+            model_stat = os.stat(model_path)
+            self.local_model_id = f"{model_name}:{model_stat.st_size}:{int(model_stat.st_mtime)}"
             print(f"成功加载本地模型: {model_name}")
             return True
             
@@ -67,6 +172,201 @@ class ModelManager:
             print(f"初始化本地模型失败: {str(e)}")
             return False
     
+    def init_small_model(self, model_name: str = "Qwen3-0.6B-Q8_0.gguf",
+                         server_url: Optional[str] = DEFAULT_SERVER_URL) -> bool:
+        """
+        初始化级联的小模型（与主模型同时加载），create_completion(small_model=True)时使用
+        
+        Args:
+            model_name: models目录下的模型文件名，默认为Qwen3-0.6B-Q8_0.gguf
+            server_url: 本地推理服务地址，服务已加载该模型时直接连接，为None时不检测服务
+            
+        Returns:
+            bool: 是否成功初始化
+        """
+        served = self._connect_server(server_url, model_name)
+        if served is not None:
+            self.small_model, self.small_model_id = served, served.model_id
+            return True
+
+        try:
+            from llama_cpp import Llama
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            model_path = os.path.join(current_dir, model_name)
+            if not os.path.exists(model_path):
+                print(f"错误: 小模型文件不存在: {model_path}")
+                return False
+            
+            self.small_model = Llama(model_path=model_path, n_ctx=10000, verbose=False)
+            model_stat = os.stat(model_path)
+            self.small_model_id = f"{model_name}:{model_stat.st_size}:{int(model_stat.st_mtime)}"
+            print(f"成功加载级联小模型: {model_name}")
+            return True
+            
+        except Exception as e:
+            print(f"初始化小模型失败: {str(e)}")
+            return False
+    
+    def _connect_server(self, server_url: Optional[str], model_name: str) -> Optional[ServedModel]:
+        """本地推理服务已加载model_name时返回对应的ServedModel，服务未运行或未加载该模型时返回None"""
+        if not server_url:
+            return None
+        model_id = find_served_model(server_url, model_name)
+        if model_id is None:
+            return None
+        self.server_url = server_url
+        print(f"已连接本地推理服务 {server_url}: {model_name}")
+        return ServedModel(server_url, model_id)
+    
+    def init_stage_model(self, stage: str, model_name: str = "gemma-3-4b-it-Q4_K_M.gguf") -> bool:
+        """
+        为流水线的一个阶段加载单独的本地模型实例，在use_stage_model(stage)中的调用使用该实例，
+        与其他阶段的推理可以同时进行，各实例的KV状态也只保留本阶段提示词的前缀
+        
+        Args:
+            stage: 阶段名称
+            model_name: models目录下的模型文件名
+            
+        Returns:
+            bool: 是否成功初始化
+        """
+        try:
+            from llama_cpp import Llama
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            model_path = os.path.join(current_dir, model_name)
+            if not os.path.exists(model_path):
+                print(f"错误: 模型文件不存在: {model_path}")
+                return False
+            
+            model = Llama(model_path=model_path, n_ctx=10000, verbose=False)
+            model_stat = os.stat(model_path)
+            self.stage_models[stage] = (model, f"{model_name}:{model_stat.st_size}:{int(model_stat.st_mtime)}")
+            print(f"成功为阶段 {stage} 加载模型实例: {model_name}")
+            return True
+            
+        except Exception as e:
+            print(f"初始化阶段 {stage} 的模型实例失败: {str(e)}")
+            return False
+    
+    @contextmanager
+    def use_stage_model(self, stage: str):
+        """在当前线程中把本地模型调用固定到阶段的模型实例（未加载该阶段的实例时使用主模型）"""
+        previous = getattr(self._thread_state, "stage", None)
+        self._thread_state.stage = stage
+        try:
+            yield
+        finally:
+            self._thread_state.stage = previous
+    
+    def _select_local_model(self, small_model: bool) -> tuple:
+        """本次调用使用的本地模型实例和模型标识"""
+        if small_model:
+            return self.small_model, self.small_model_id
+        stage = getattr(self._thread_state, "stage", None)
+        if stage in self.stage_models:
+            return self.stage_models[stage]
+        return self.local_model, self.local_model_id
+    
+    @property
+    def last_prompt_stats(self) -> Optional[Dict[str, float]]:
+        """当前线程最近一次本地推理的提示词计算统计"""
+        return getattr(self._thread_state, "prompt_stats", None)
+    
+    @last_prompt_stats.setter
+    def last_prompt_stats(self, stats: Optional[Dict[str, float]]) -> None:
+        self._thread_state.prompt_stats = stats
+    
+    @property
+    def last_generation_stats(self) -> Optional[Dict[str, Any]]:
+        """当前线程最近一次流式生成的统计"""
+        return getattr(self._thread_state, "generation_stats", None)
+    
+    @last_generation_stats.setter
+    def last_generation_stats(self, stats: Optional[Dict[str, Any]]) -> None:
+        self._thread_state.generation_stats = stats
+    
+    def has_small_model(self) -> bool:
+        """是否可以使用级联的小模型（仅本地模型）"""
+        self.wait_until_ready()
+        return self.use_local_model and self.small_model is not None and self.local_model is not None
+    
+    def _create_draft_model(self, draft: Optional[str], num_pred_tokens: int,
+                            models_dir: str) -> Optional[MeasuredDraftModel]:
+        """创建投机解码的草稿模型，草稿模型文件不存在或无法加载时不使用投机解码"""
+        if not draft:
+            return None
+        from llama_cpp import Llama
+        from models.draft_models import MeasuredDraftModel, SmallModelDraft, prompt_lookup_draft
+        if draft == "prompt_lookup":
+            print(f"投机解码: prompt_lookup，每次草稿 {num_pred_tokens} tokens")
+            return MeasuredDraftModel(prompt_lookup_draft(num_pred_tokens))
+        
+        draft_path = os.path.join(models_dir, draft)
+        if not os.path.exists(draft_path):
+            print(f"错误: 草稿模型文件不存在: {draft_path}，不使用投机解码")
+            return None
+        try:
+            small_model = Llama(model_path=draft_path, n_ctx=10000, verbose=False)
+        except Exception as e:
+            print(f"加载草稿模型失败: {str(e)}，不使用投机解码")
+            return None
+        print(f"投机解码: 草稿模型 {draft}，每次草稿 {num_pred_tokens} tokens")
+        return MeasuredDraftModel(SmallModelDraft(small_model, num_pred_tokens))
+    
+    def get_draft_stats(self) -> Optional[Dict[str, float]]:
+        """获取投机解码的草稿统计（提出/接受的草稿token数和接受率），未使用投机解码时返回None"""
+        if self.draft_model is None:
+            return None
+        return self.draft_model.get_stats()
+    
+    def init_embedding_model(self, model_name: str = "bge-m3-Q4_K_M.gguf") -> bool:
+        """
+        初始化本地嵌入模型（GGUF），用于key描述的向量检索
+        
+        Args:
+            model_name: models目录下的嵌入模型文件名
+            
+        Returns:
+            bool: 是否成功初始化
+        """
+        try:
+            from llama_cpp import Llama
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            model_path = os.path.join(current_dir, model_name)
+            
+            if not os.path.exists(model_path):
+                print(f"错误: 嵌入模型文件不存在: {model_path}")
+                return False
+            
+            self.embedding_model = Llama(
+                model_path=model_path,
+                embedding=True,
+                n_ctx=512,
+                verbose=False,
+            )
+            model_stat = os.stat(model_path)
+            self.embedding_model_id = f"{model_name}:{model_stat.st_size}:{int(model_stat.st_mtime)}"
+            print(f"成功加载嵌入模型: {model_name}")
+            return True
+            
+        except Exception as e:
+            print(f"初始化嵌入模型失败: {str(e)}")
+            return False
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        批量计算文本向量（一次调用编码所有文本）
+        
+        Args:
+            texts: 文本列表
+            
+        Returns:
+            list: 与texts一一对应的归一化向量
+        """
+        self.wait_until_ready()
+        with self._embedding_lock:
+            return self.embedding_model.embed(texts, normalize=True)
+    
     def init_remote_model(self, 
                          api_key: str = "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",
                          base_url: str = "https://openrouter.ai/api/v1",
@@ -84,12 +384,14 @@ class ModelManager:
         """
 
         try:
+            from openai import OpenAI
             # 初始化客户端            
             self.remote_client = OpenAI(api_key=api_key, base_url=base_url)
             self.base_url = base_url
             self.api_key = api_key
             self.use_local_model = False
             self.remote_model = model
+            self.remote_schema_supported = True
             print(f"成功初始化远程模型: {model}")
             return True
             
@@ -97,47 +399,428 @@ class ModelManager:
             print(f"初始化远程模型失败: {str(e)}")
             return False
     
+    def enable_prompt_cache(self, capacity_bytes: int = 2 << 30, cache_dir: Optional[str] = None) -> bool:
+        """
+        为本地模型开启KV状态缓存
+        每次推理后保存KV状态，之后的提示词与已保存状态有公共前缀时直接加载，
+        只计算前缀之后的部分。提示词应把静态内容（任务说明、key描述文件）放在最前面
+        
+        Args:
+            capacity_bytes: 缓存容量（字节）
+            cache_dir: 磁盘缓存目录，为None时缓存在内存中
+            
+        Returns:
+            bool: 是否成功开启
+        """
+        if self.local_model is None:
+            print("未加载本地模型，无法开启KV状态缓存")
+            return False
+        models = [("main", self.local_model)] + [(stage, model) for stage, (model, _) in self.stage_models.items()]
+        # 推理服务中的模型由服务自己开启缓存
+        models = [(name, model) for name, model in models if not getattr(model, "served", False)]
+        if not models:
+            print("本地模型由推理服务提供，KV状态缓存由服务开启")
+            return True
+        try:
+            from llama_cpp.llama_cache import LlamaRAMCache, LlamaDiskCache
+            for name, model in models:
+                # 每个模型实例使用各自的缓存
+                if cache_dir:
+                    directory = cache_dir if name == "main" else os.path.join(cache_dir, name)
+                    model.set_cache(LlamaDiskCache(cache_dir=directory, capacity_bytes=capacity_bytes))
+                else:
+                    model.set_cache(LlamaRAMCache(capacity_bytes=capacity_bytes))
+            print(f"已开启KV状态缓存: {cache_dir or '内存'}，容量 {capacity_bytes / (1 << 30):.1f} GB")
+            return True
+        except Exception as e:
+            print(f"开启KV状态缓存失败: {str(e)}")
+            return False
+    
+    def load_in_background(self, loader: Callable[[], Any]) -> Future:
+        """
+        在后台线程执行模型加载（如依次调用init_local_model、init_embedding_model），
+        加载期间可以进行文档转换和提取；create_completion、embed等调用会先等待加载完成
+        
+        Args:
+            loader: 加载函数，其返回值作为future的结果
+            
+        Returns:
+            Future: 就绪future，加载失败时result()抛出加载函数的异常
+        """
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(loader())
+            except BaseException as e:
+                future.set_exception(e)
+        
+        self._loading = future
+        threading.Thread(target=run, name="model_loader", daemon=True).start()
+        return future
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        等待后台模型加载完成
+        
+        Returns:
+            bool: 加载是否已完成（加载失败也视为完成，由调用方检查future）
+        """
+        future = self._loading
+        if future is None or future.done() or threading.current_thread().name == "model_loader":
+            return True
+        try:
+            future.exception(timeout)
+        except FutureTimeoutError:
+            return False
+        return True
+    
+    def get_prompt_stats(self) -> Dict[str, float]:
+        """获取本地模型提示词计算的累计统计（含KV状态复用节省的时间）"""
+        return dict(self.prompt_stats)
+    
+    def set_response_cache(self, cache) -> None:
+        """
+        设置LLM响应缓存
+        
+        Args:
+            cache: LLMResponseCache实例，为None时关闭缓存
+        """
+        self.response_cache = cache
+    
+    def set_constrained_decoding(self, enabled: bool) -> None:
+        """开启/关闭按JSON Schema / GBNF语法约束输出，关闭时忽略调用方给出的schema和语法"""
+        self.constrained_decoding = enabled
+    
+    def set_streaming(self, enabled: bool, max_tokens: Optional[int] = None,
+                      time_budget: Optional[float] = None) -> None:
+        """
+        设置流式生成和默认的单次调用预算
+        
+        Args:
+            enabled: 是否流式生成（关闭时整体生成后再解析，预算只有max_tokens生效）
+            max_tokens: 默认token预算，None表示不限制（本地模型会一直生成到n_ctx耗尽）
+            time_budget: 默认时间预算（秒），None表示不限制
+        """
+        self.use_streaming = enabled
+        self.max_tokens = max_tokens
+        self.time_budget = time_budget
+    
+    def get_generation_stats(self) -> Dict[str, int]:
+        """获取流式生成的累计统计（含各中止原因的次数）"""
+        return dict(self.generation_stats)
+    
     def create_completion(self,
                          messages: List[Dict[str, str]], 
-                         temperature: float = 0) -> Optional[str]:
+                         temperature: float = 0,
+                         use_cache: bool = True,
+                         refresh_cache: bool = False,
+                         json_schema: Optional[Dict[str, Any]] = None,
+                         grammar: Optional[str] = None,
+                         max_tokens: Optional[int] = None,
+                         time_budget: Optional[float] = None,
+                         on_item: Optional[Callable[[Any], None]] = None,
+                         small_model: bool = False) -> Optional[str]:
         """
         创建聊天完成
         
+        流式生成时，输出为JSON数组（json_schema的type为array或给出了on_item）的调用
+        在数组结束的“]”处停止；检测到循环重复、超出token或时间预算时中止生成，
+        返回已完成项组成的数组，且不写入响应缓存；非流式输出达到token上限（finish_reason为length）
+        时同样不写入缓存。推理模型的<think>思考内容会被去掉
+        
         Args:
             messages: 消息列表，格式为[{"role": "user", "content": "内容"}]
             temperature: 采样温度
+            use_cache: 是否使用响应缓存，为False时既不读取也不写入缓存
+            refresh_cache: 跳过缓存读取，重新调用模型并用新结果覆盖缓存（用于结果无法解析后的重试）
+            json_schema: 输出需要满足的JSON Schema，本地模型转换为语法约束采样，远程API作为response_format发送
+            grammar: GBNF语法（仅本地模型），优先于json_schema
+            max_tokens: 本次调用的token预算，None时使用set_streaming设置的默认值
+            time_budget: 本次调用的时间预算（秒），None时使用默认值
+            on_item: 输出JSON数组每完成一项时的回调，可在生成结束前处理已完成的项
+            small_model: 使用级联的小模型（未加载小模型时使用主模型）
             
         Returns:
             str: 模型返回的内容，失败时返回None
         """
+        self.wait_until_ready()
+        self.last_prompt_stats = None
+        self.last_generation_stats = None
+        self._thread_state.finish_reason = None
+        small_model = small_model and self.has_small_model()
+        if not self.constrained_decoding:
+            json_schema = grammar = None
+        
+        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+        # token预算不同，同一提示词的输出可能被截断在不同位置
+        params = {"temperature": temperature}
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if grammar is not None:
+            params["grammar"] = grammar
+        elif json_schema is not None:
+            params["json_schema"] = json_schema
+        
+        cache_key = None
+        if use_cache and self.response_cache is not None:
+            cache_key = self._cache_key(messages, params, small_model)
+            if not refresh_cache:
+                cached = self.response_cache.get(cache_key)
+                if cached is not None:
+                    self._emit_items(cached, on_item)
+                    return cached
+        
+        time_budget = time_budget if time_budget is not None else self.time_budget
+        guard = None
+        if self.use_streaming:
+            parse_array = on_item is not None or (json_schema or {}).get("type") == "array"
+            guard = GenerationGuard(max_tokens, time_budget, parse_array, on_item)
 
         # 根据模型类型调用不同的API
         try:
             if self.use_local_model:
-                return self._call_local_model(messages, temperature)
+                model, _ = self._select_local_model(small_model)
+                response = self._call_local_model(messages, temperature,
+                                                  self._get_grammar(json_schema, grammar, model),
+                                                  guard, max_tokens, model)
             else:
-                return self._call_remote_model(messages, temperature)
+                response = self._call_remote_model(messages, temperature, json_schema, guard, max_tokens)
                 
         except Exception as e:
             print(f"调用模型失败: {str(e)}")
             return None
+        
+        if guard is None:
+            self._emit_items(response, on_item)
+        elif self._record_generation(guard):
+            # 中止的输出不完整，不写入缓存
+            return response
+        if getattr(self._thread_state, "finish_reason", None) == "length":
+            # 达到token上限被截断的输出同样不完整
+            print("模型输出达到token上限被截断，不写入缓存")
+            return response
+        
+        if cache_key is not None and response:
+            self.response_cache.put(cache_key, response)
+        return response
+    
+    @staticmethod
+    def _emit_items(text: Optional[str], on_item: Optional[Callable[[Any], None]]) -> None:
+        """非流式得到的完整输出，逐项交给on_item"""
+        if on_item is None or not text:
+            return
+        for item in JSONArrayStreamParser().feed(text):
+            on_item(item)
+    
+    def _record_generation(self, guard: GenerationGuard) -> bool:
+        """
+        记录一次流式生成的统计
+        
+        Returns:
+            bool: 生成是否被中止（输出不完整）
+        """
+        stats = guard.get_stats()
+        self.last_generation_stats = stats
+        with self._stats_lock:
+            self.generation_stats["calls"] += 1
+            self.generation_stats["tokens"] += stats["tokens"]
+            if guard.truncated:
+                self.generation_stats[stats["stop_reason"]] += 1
+        if not guard.truncated:
+            return False
+        print(f"生成已中止（{stats['stop_reason']}）: {stats['tokens']} tokens，{stats['elapsed']:.1f} 秒，"
+              f"保留 {stats['items'] or 0} 个已完成的项")
+        return True
+    
+    def get_cache_stats(self) -> Optional[Dict[str, float]]:
+        """获取响应缓存统计信息，未设置缓存时返回None"""
+        if self.response_cache is None:
+            return None
+        return self.response_cache.get_stats()
+    
+    def _cache_key(self, messages: List[Dict[str, str]], params: Dict[str, Any], small_model: bool = False) -> str:
+        """响应缓存键：后端 + 模型标识 + 完整消息 + 采样参数"""
+        if self.use_local_model:
+            _, model_id = self._select_local_model(small_model)
+            return self.response_cache.make_key("local", model_id or "", messages, params)
+        return self.response_cache.make_key("remote", f"{self.base_url}|{self.remote_model}", messages, params)
+    
+    def supports_concurrency(self) -> bool:
+        """当前模型是否可以并发调用（远程API可以，本地模型只能串行推理）"""
+        self.wait_until_ready()
+        return not self.use_local_model
+    
+    def count_tokens(self, text: str) -> Optional[int]:
+        """
+        使用已加载本地模型的分词器统计token数
+        
+        Args:
+            text: 要统计的文本
+            
+        Returns:
+            int: token数，未加载本地模型时返回None
+        """
+        self.wait_until_ready()
+        if self.local_model is None:
+            return None
+        return len(self.local_model.tokenize(text.encode("utf-8"), add_bos=False, special=True))
+    
+    def _call_local_model(self, messages: List[Dict[str, str]], temperature: float,
+                          grammar: Optional[LlamaGrammar] = None, guard: Optional[GenerationGuard] = None,
+                          max_tokens: Optional[int] = None, model: Optional[Llama] = None) -> str:
+        """
+        调用本地模型（默认主模型），给出grammar时按语法约束采样，给出guard时流式生成并由guard决定何时停止
+        """
+        model = model or self.local_model
+        with self._local_lock(model):
+            before = self._prompt_eval_counters(model)
+            if guard is None:
+                response = model.create_chat_completion(
+                    messages=messages,
+                    temperature=temperature,
+                    grammar=grammar,
+                    max_tokens=max_tokens
+                )
+                self._record_prompt_stats(response.get("usage", {}).get("prompt_tokens"),
+                                          before, self._prompt_eval_counters(model))
+                self._thread_state.finish_reason = response["choices"][0].get("finish_reason")
+                return strip_thinking(response["choices"][0]["message"]["content"])
+            
+            stream = model.create_chat_completion(
+                messages=messages,
+                temperature=temperature,
+                grammar=grammar,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            try:
+                for chunk in stream:
+                    choice = chunk["choices"][0]
+                    self._thread_state.finish_reason = choice.get("finish_reason")
+                    delta = choice["delta"].get("content")
+                    if delta and guard.feed(delta):
+                        break
+            finally:
+                # 关闭生成器即停止生成
+                stream.close()
+            after = self._prompt_eval_counters(model)
+            # 流式输出不含usage：上下文中的token数减去生成时逐个计算的token数即为提示词token数
+            prompt_tokens = None
+            if before is not None and after is not None:
+                prompt_tokens = model.n_tokens - (after[2] - before[2])
+            self._record_prompt_stats(prompt_tokens, before, after)
+        return guard.finish()
+    
+    def _local_lock(self, model: Llama) -> threading.Lock:
+        """本地模型实例对应的锁"""
+        with self._local_locks_guard:
+            return self._local_locks.setdefault(id(model), threading.Lock())
+    
+    def _get_grammar(self, json_schema: Optional[Dict[str, Any]], grammar: Optional[str],
+                     model: Optional[Llama] = None) -> Optional[LlamaGrammar]:
+        """把JSON Schema / GBNF文本编译为LlamaGrammar，最近使用的语法会被缓存；无法编译时不约束输出"""
+        if grammar is None and json_schema is None:
+            return None
+        if getattr(model, "served", False):
+            # 由推理服务编译
+            return {"grammar": grammar} if grammar is not None else {"json_schema": json_schema}
+        text = grammar if grammar is not None else json.dumps(json_schema, ensure_ascii=False, sort_keys=True)
+        with self._stats_lock:
+            compiled = self._grammar_cache.get(text)
+        if compiled is None:
+            from llama_cpp import LlamaGrammar
+            try:
+                if grammar is not None:
+                    compiled = LlamaGrammar.from_string(grammar, verbose=False)
+                else:
+                    compiled = LlamaGrammar.from_json_schema(text, verbose=False)
+            except Exception as e:
+                print(f"编译输出语法失败，改为不约束输出: {str(e)}")
+                return None
+        with self._stats_lock:
+            self._grammar_cache[text] = compiled
+            self._grammar_cache.move_to_end(text)
+            while len(self._grammar_cache) > 32:
+                self._grammar_cache.popitem(last=False)
+        return compiled
     
-    def _call_local_model(self, messages: List[Dict[str, str]], temperature: float) -> str:
-        """调用本地模型"""
-        response = self.local_model.create_chat_completion(
-            messages=messages,
-            temperature=temperature
-        )
-        return response["choices"][0]["message"]["content"]
-    
-    def _call_remote_model(self, messages: List[Dict[str, str]], temperature: float) -> str:
-        """调用远程API模型"""
-        response = self.remote_client.chat.completions.create(
-            model=self.remote_model,
-            messages=messages,
-            temperature=temperature
-        )
-        return response.choices[0].message.content
+    def _prompt_eval_counters(self, model: Optional[Llama] = None) -> Optional[tuple]:
+        """读取llama.cpp的计算计数器: (提示词累计耗时毫秒, 提示词累计计算token数, 累计生成token数)"""
+        if getattr(model or self.local_model, "served", False):
+            return None
+        try:
+            import llama_cpp
+            perf = llama_cpp.llama_perf_context((model or self.local_model).ctx)
+            return perf.t_p_eval_ms, perf.n_p_eval, perf.n_eval
+        except Exception:
+            return None
+    
+    def _record_prompt_stats(self, prompt_tokens: Optional[int], before: Optional[tuple],
+                             after: Optional[tuple]) -> None:
+        """
+        记录一次本地推理的提示词计算情况
+        实际计算的token数少于提示词token数的部分来自复用的KV状态，
+        按平均每token计算耗时估算节省的时间
+        """
+        self.last_prompt_stats = None
+        if not prompt_tokens or before is None or after is None or after[1] < before[1]:
+            return
+        eval_ms = after[0] - before[0]
+        evaluated = after[1] - before[1]
+        reused = max(prompt_tokens - evaluated, 0)
+        with self._stats_lock:
+            stats = self.prompt_stats
+            stats["calls"] += 1
+            stats["prompt_tokens"] += prompt_tokens
+            stats["evaluated_tokens"] += evaluated
+            stats["prompt_eval_ms"] += eval_ms
+            ms_per_token = stats["prompt_eval_ms"] / stats["evaluated_tokens"] if stats["evaluated_tokens"] else 0.0
+            saved_ms = reused * ms_per_token
+            stats["saved_ms"] += saved_ms
+        self.last_prompt_stats = {"prompt_tokens": prompt_tokens, "reused_tokens": reused,
+                                  "prompt_eval_ms": eval_ms, "saved_ms": saved_ms}
+    
+    def _call_remote_model(self, messages: List[Dict[str, str]], temperature: float,
+                           json_schema: Optional[Dict[str, Any]] = None, guard: Optional[GenerationGuard] = None,
+                           max_tokens: Optional[int] = None) -> str:
+        """调用远程API模型，给出json_schema且服务端支持时作为response_format发送"""
+        request = {"model": self.remote_model, "messages": messages, "temperature": temperature}
+        if max_tokens:
+            request["max_tokens"] = max_tokens
+        if json_schema is not None and self.remote_schema_supported:
+            try:
+                return self._remote_request(dict(request, response_format={
+                    "type": "json_schema", "json_schema": {"name": "response", "schema": json_schema}}), guard)
+            except Exception as e:
+                # 只有请求被拒绝（400/422）视为不支持，网络等错误照常抛出
+                if getattr(e, "status_code", None) not in (400, 422):
+                    raise
+                print(f"远程API不支持response_format，改为不约束输出: {str(e)}")
+                self.remote_schema_supported = False
+        
+        return self._remote_request(request, guard)
+    
+    def _remote_request(self, request: Dict[str, Any], guard: Optional[GenerationGuard]) -> str:
+        """发送远程请求，给出guard时流式接收并由guard决定何时断开"""
+        if guard is None:
+            response = self.remote_client.chat.completions.create(**request)
+            self._thread_state.finish_reason = response.choices[0].finish_reason
+            return strip_thinking(response.choices[0].message.content)
+        
+        stream = self.remote_client.chat.completions.create(stream=True, **request)
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                self._thread_state.finish_reason = chunk.choices[0].finish_reason
+                delta = chunk.choices[0].delta.content
+                if delta and guard.feed(delta):
+                    break
+        finally:
+            # 关闭连接即停止服务端生成
+            stream.close()
+        return guard.finish()
 
 
 # 全局单例实例 - 直接在模块级别创建，其他模块导入时自动使用同一个实例
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+流式生成的监控工具
+- ThinkingFilter / strip_thinking: 去掉推理模型输出中的<think>...</think>思考内容
+- JSONArrayStreamParser: 随token到达增量解析JSON数组，每完成一项立即返回，遇到数组结束的“]”即完成
+- find_repetition: 检测生成文本末尾的循环重复（如qwen3-0.6b反复输出同一段内容直到n_ctx耗尽）
+- GenerationGuard: 组合以上工具，按重复、token预算、时间预算或数组结束决定何时停止生成
+"""
+
+import re
+import json
+import time
+
+THINK_START = "<think>"
+THINK_END = "</think>"
+THINK_PATTERN = re.compile(r'<think>.*?(</think>|$)', re.DOTALL)
+
+# 循环重复检测：重复段长度范围、末尾重复部分的最小总长度和最少重复次数
+MIN_REPEAT_PERIOD = 1
+MAX_REPEAT_PERIOD = 200
+MIN_REPEAT_SPAN = 120
+MIN_REPEAT_COUNT = 4
+# 连续完全相同的数组项数达到该值视为循环
+MAX_REPEATED_ITEMS = 3
+
+# 停止原因中属于提前中止（输出不完整）的部分
+ABORT_REASONS = ("repetition", "max_tokens", "timeout", "incomplete")
+
+
+def strip_thinking(text):
+    """去掉完整输出中的思考内容（含未闭合的<think>）"""
+    if not text or THINK_START not in text:
+        return text
+    return THINK_PATTERN.sub('', text).strip()
+
+
+def _partial_suffix(text, tag):
+    """text末尾与tag开头重合的最大长度（标签可能被拆在两个token中）"""
+    for k in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:k]):
+            return k
+    return 0
+
+
+class ThinkingFilter:
+    """流式去掉<think>...</think>，标签被拆在多个token中时也能识别"""
+
+    def __init__(self):
+        self.pending = ""
+        self.in_think = False
+
+    def feed(self, text):
+        """输入新到达的文本，返回可见部分"""
+        self.pending += text
+        visible = []
+        while True:
+            tag = THINK_END if self.in_think else THINK_START
+            pos = self.pending.find(tag)
+            if pos == -1:
+                keep = _partial_suffix(self.pending, tag)
+                if not self.in_think:
+                    visible.append(self.pending[:len(self.pending) - keep])
+                self.pending = self.pending[len(self.pending) - keep:]
+                return ''.join(visible)
+            if not self.in_think:
+                visible.append(self.pending[:pos])
+            self.pending = self.pending[pos + len(tag):]
+            self.in_think = not self.in_think
+
+    def flush(self):
+        """生成结束时返回剩余的可见文本"""
+        rest = "" if self.in_think else self.pending
+        self.pending = ""
+        return rest
+
+
+class JSONArrayStreamParser:
+    """
+    增量解析顶层JSON数组，跳过数组前的说明文字或```json标记
+
+    属性:
+        items: 已完成解析的数组项
+        done: 是否已遇到顶层数组结束的“]”
+        end: 完成时“]”之后的位置（在最后一次feed的文本中）
+    """
+
+    def __init__(self):
+        self.items = []
+        self.done = False
+        self.end = None
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._item_chars = None
+
+    def feed(self, text):
+        """输入新到达的文本，返回其中新完成的数组项列表"""
+        completed = []
+        for pos, ch in enumerate(text):
+            if self.done:
+                break
+            if not self._started:
+                if ch == '[':
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._item_chars is not None:
+                self._item_chars.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                if self._depth == 1:
+                    self._item_chars = [ch]
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._item_chars is not None:
+                    try:
+                        item = json.loads(''.join(self._item_chars))
+                        self.items.append(item)
+                        completed.append(item)
+                    except json.JSONDecodeError:
+                        pass
+                    self._item_chars = None
+                elif self._depth == 0:
+                    self.done = True
+                    self.end = pos + 1
+        return completed
+
+
+def find_repetition(text, min_period=MIN_REPEAT_PERIOD, max_period=MAX_REPEAT_PERIOD,
+                    min_span=MIN_REPEAT_SPAN, min_count=MIN_REPEAT_COUNT):
+    """
+    检测文本末尾是否由同一段内容连续重复构成
+
+    Returns:
+        int: 重复段的长度，未检测到时返回0
+    """
+    for period in range(min_period, min(max_period, len(text) // min_count) + 1):
+        count = max(min_count, -(-min_span // period))
+        if period * count > len(text):
+            continue
+        unit = text[-period:]
+        if text[-period * count:] == unit * count:
+            return period
+    return 0
+
+
+class GenerationGuard:
+    """
+    监控一次流式生成，feed返回停止原因时调用方应立即停止生成
+
+    停止原因:
+        complete: 顶层JSON数组已结束
+        repetition: 检测到循环重复
+        max_tokens: 超过token预算
+        timeout: 超过时间预算
+        incomplete: 生成结束但JSON数组未闭合（由finish设置）
+    """
+
+    # 重复检测的间隔（token数）和检查的文本长度
+    CHECK_INTERVAL = 16
+    TAIL_CHARS = 4096
+
+    def __init__(self, max_tokens=None, time_budget=None, parse_array=False, on_item=None):
+        """
+        Args:
+            max_tokens: token预算（每个流式分块计为一个token），None表示不限制
+            time_budget: 时间预算（秒），None表示不限制
+            parse_array: 是否增量解析JSON数组（数组结束即停止，中止时只保留已完成的项）
+            on_item: 每完成一个数组项时的回调
+        """
+        self.max_tokens = max_tokens
+        self.time_budget = time_budget
+        self.on_item = on_item
+        self.parser = JSONArrayStreamParser() if parse_array else None
+        self.filter = ThinkingFilter()
+        self.parts = []
+        self.tail = ""
+        self.tokens = 0
+        self.stop_reason = None
+        self.start_time = time.perf_counter()
+
+    def feed(self, delta):
+        """输入一个流式分块的文本，返回停止原因，继续生成时返回None"""
+        self.tokens += 1
+        self.tail = (self.tail + delta)[-self.TAIL_CHARS:]
+        self._accept(self.filter.feed(delta))
+        if self.stop_reason:
+            return self.stop_reason
+
+        if self.tokens % self.CHECK_INTERVAL == 0 and find_repetition(self.tail):
+            self.stop_reason = "repetition"
+        elif self.max_tokens and self.tokens >= self.max_tokens:
+            self.stop_reason = "max_tokens"
+        elif self.time_budget and time.perf_counter() - self.start_time > self.time_budget:
+            self.stop_reason = "timeout"
+        return self.stop_reason
+
+    def _accept(self, visible):
+        if not visible:
+            return
+        self.parts.append(visible)
+        if self.parser is None:
+            return
+        for item in self.parser.feed(visible):
+            if self.on_item is not None:
+                self.on_item(item)
+            recent = self.parser.items[-MAX_REPEATED_ITEMS:]
+            if len(recent) == MAX_REPEATED_ITEMS and all(other == item for other in recent):
+                self.stop_reason = "repetition"
+                return
+        if self.parser.done:
+            # 去掉同一分块中数组之后的内容
+            self.parts[-1] = visible[:self.parser.end]
+            self.stop_reason = "complete"
+
+    def finish(self):
+        """
+        结束监控，返回最终文本：
+        正常结束时为去掉思考内容的完整输出；JSON数组被中止时为已完成项组成的数组
+        """
+        if not self.stop_reason:
+            self._accept(self.filter.flush())
+        if self.parser is not None and not self.parser.done and not self.stop_reason:
+            self.stop_reason = "incomplete"
+        if self.parser is not None and self.stop_reason in ABORT_REASONS:
+            items = self.parser.items
+            if self.stop_reason == "repetition":
+                # 去掉循环产生的重复项
+                items = [item for i, item in enumerate(items) if item not in items[:i]]
+            return json.dumps(items, ensure_ascii=False)
+        return ''.join(self.parts).strip()
+
+    @property
+    def truncated(self):
+        """输出是否因中止而不完整"""
+        return self.stop_reason in ABORT_REASONS
+
+    def get_stats(self):
+        return {"stop_reason": self.stop_reason or "eos", "tokens": self.tokens,
+                "items": len(self.parser.items) if self.parser else None,
+                "elapsed": time.perf_counter() - self.start_time}
@@ -6,8 +6,6 @@
 import os
 import json
 import re
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 
 def replace_values_with_placeholders(doc, match_results_dir):
     """
@@ -4,11 +4,10 @@ Word文档替换器 - 封装文档元素替换功能
 """  
 
 import os
-from docx import Document
 from . import paragraph_replacer
 from . import table_replacer
 
-def replace_document(original_doc_path, match_results_dir, template_doc_path):
+def replace_document(original_doc_path, match_results_dir, template_doc_path, extract_dir=None):
     """
     根据匹配结果将Word文档中的实际内容替换为占位符，生成模板
     
@@ -16,6 +15,7 @@ def replace_document(original_doc_path, match_results_dir, template_doc_path):
         original_doc_path: 原始Word文档路径
         match_results_dir: 匹配结果目录路径，包含从matcher得到的匹配结果
         template_doc_path: 生成的模板文档输出路径
+        extract_dir: 提取结果目录（可选），用于加载表格模型定位单元格
     """
     # 检查输入文件和目录是否存在
     if not os.path.exists(original_doc_path):
@@ -33,10 +33,12 @@ def replace_document(original_doc_path, match_results_dir, template_doc_path):
     
     # 读取原始文档
     print(f"正在读取原始文档: {original_doc_path}")
+    # python-docx只在生成模板时导入，不影响程序启动
+    from docx import Document
     doc = Document(original_doc_path)
     
     # 表格内容替换
-    table_replacer.replace_values_with_placeholders(doc, match_results_dir)
+    table_replacer.replace_values_with_placeholders(doc, match_results_dir, extract_dir)
     
     # 段落内容替换
     # paragraph_replacer.replace_values_with_placeholders(doc, match_results_dir)
@@ -51,5 +53,6 @@ if __name__ == "__main__":
     original_doc_path = os.path.join(project_dir, "document/document.docx")
     match_results_dir = os.path.join(project_dir, "document/match_results")
     template_doc_path = os.path.join(project_dir, "document/template.docx")
+    extract_dir = os.path.join(project_dir, "document/document_extract")
     
-    replace_document(original_doc_path, match_results_dir, template_doc_path)
+    replace_document(original_doc_path, match_results_dir, template_doc_path, extract_dir)
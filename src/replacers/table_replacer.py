@@ -4,16 +4,25 @@
 """  
 
 import os
+import sys
 import json
 import re
 
-def replace_values_with_placeholders(doc, match_results_dir):
+# 添加src目录到系统路径
+src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if src_dir not in sys.path:
+    sys.path.append(src_dir)
+
+from extractors.table_model import load_table_by_number
+
+def replace_values_with_placeholders(doc, match_results_dir, extract_dir=None):
     """
     将Word文档中的表格内容替换为占位符，用于生成模板
     
     参数:
         doc: docx.Document对象，要处理的原始文档
         match_results_dir: 匹配结果目录路径
+        extract_dir: 提取结果目录，提供时加载提取器生成的表格模型来定位单元格
     """
     
     try:
@@ -39,9 +48,10 @@ def replace_values_with_placeholders(doc, match_results_dir):
                     continue
                 
                 target_table = all_tables[table_number - 1]
+                table_model = load_table_by_number(extract_dir, table_number) if extract_dir else None
                 
                 # 根据位置信信息替换单元格内容
-                replace_cells_by_position(target_table, match_data)
+                replace_cells_by_position(target_table, match_data, table_model)
                 
             except Exception as e:
                 print(f"处理匹配文件 {match_file} 时出错: {e}")
@@ -119,24 +129,38 @@ def get_all_tables_including_nested(doc):
     
     return all_tables
 
-def replace_cells_by_position(table, match_data):
+def replace_cells_by_position(table, match_data, table_model=None):
     """
     根据位置信息替换表格单元格内容
     
     参数:
         table: 目标表格对象
         match_data: 匹配数据列表，包含位置信息
+        table_model: 提取器生成的表格模型（可选），提供时优先按valueId定位，
+            按其网格校验位置，并将合并单元格内的位置归一到左上角单元格
     """
     for item in match_data:
         try:
-            # 解析位置信息，格式为 "(行号, 列号)"
-            pos_str = item.get('valuePos', '')
-            if not pos_str:
-                continue
+            # 有表格模型时优先按单元格ID定位
+            id_cell = table_model.cell_by_id(item.get('valueId')) if table_model is not None else None
+            if id_cell is not None:
+                row_index, col_index = id_cell.row, id_cell.col
+            else:
+                # 解析位置信息，格式为 "(行号, 列号)"
+                pos_str = item.get('valuePos', '')
+                if not pos_str:
+                    continue
+                
+                row_index, col_index = parse_position(pos_str)
+                if row_index is None or col_index is None:
+                    continue
             
-            row_index, col_index = parse_position(pos_str)
-            if row_index is None or col_index is None:
-                continue
+            if table_model is not None:
+                cell = table_model.cell_at(row_index, col_index)
+                if cell is None:
+                    print(f"位置 ({row_index}, {col_index}) 超出表格范围（{table_model.n_rows}行 x {table_model.n_cols}列）")
+                    continue
+                row_index, col_index = cell.row, cell.col
             
             # 检查位置是否在表格范围内
             if row_index >= len(table.rows) or col_index >= len(table.rows[row_index].cells):
@@ -8,7 +8,7 @@ import sys
 from .table_replacer import replace_tables_in_html, convert_html_to_word
 from .paragraph_replacer import replace_paragraphs_in_html
 
-def replace_html_document(html_file_path, match_results_dir, output_html_path=None, output_word_path=None):
+def replace_html_document(html_file_path, match_results_dir, output_html_path=None, output_word_path=None, extract_dir=None):
     """
     处理HTML文档的完整替换流程
     包括表格、段落等所有元素的替换
@@ -18,6 +18,7 @@ def replace_html_document(html_file_path, match_results_dir, output_html_path=No
         match_results_dir: 匹配结果目录路径
         output_html_path: 输出HTML文件路径，如果为None则覆盖原文件
         output_word_path: 输出Word文件路径，如果提供则自动转换
+        extract_dir: 提取结果目录（可选），用于加载表格模型定位单元格
         
     返回:
         bool: 是否成功
@@ -41,7 +42,7 @@ def replace_html_document(html_file_path, match_results_dir, output_html_path=No
         
         # 处理表格替换
         if table_match_files:
-            if not replace_tables_in_html(html_file_path, match_results_dir, table_match_files, output_html_path):
+            if not replace_tables_in_html(html_file_path, match_results_dir, table_match_files, output_html_path, extract_dir):
                 print("表格替换失败")
                 success = False
         
@@ -11,7 +11,8 @@ from bs4 import BeautifulSoup
 
 # 添加父目录到路径以便导入converter模块
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from src.converter.converter import word_to_html
+from src.converter.converter import word_to_html, get_conversion_backend
+from src.extractors.table_model import load_table_by_number, parse_position
 
 def get_all_tables_recursive_html(soup):
     """
@@ -114,32 +115,62 @@ def debug_table_structure_html(soup, show_content=True):
     
     print("=== HTML表格调试信息结束 ===\n")
 
-def replace_cells_by_position_html(table, match_data):
+def get_clean_rows_html(table):
+    """
+    按table_extractor.create_clean_table的规则获取表格行，
+    行序号与表格模型（table_N.json）的源行号一一对应
+    """
+    rows = []
+    for section_name in ['thead', 'tbody', 'tfoot']:
+        section = table.find(section_name)
+        if section:
+            rows.extend(row for row in section.find_all('tr') if row.find(['td', 'th']))
+    rows.extend(row for row in table.find_all('tr', recursive=False) if row.find(['td', 'th']))
+    return rows
+
+def replace_cells_by_position_html(table, match_data, table_model=None):
     """
     根据位置信息在HTML表格中替换单元格内容
     
     参数:
         table: BeautifulSoup表格对象
         match_data: 匹配数据，包含位置信息和替换内容
+        table_model: 提取器生成的表格模型（可选），提供时优先按valueId定位，
+            valuePos按合并单元格解析后的网格坐标解释
     """
     print(f"开始替换表格内容，共有 {len(match_data)} 个匹配项")
     
+    # 获取所有行
+    rows = get_clean_rows_html(table) if table_model is not None else table.find_all('tr')
+    
     for match in match_data:
-        if 'valuePos' not in match:
-            print(f"跳过没有位置信息的匹配项: {match}")
-            continue
-        
-        value_pos = match['valuePos']
-        if not isinstance(value_pos, list) or len(value_pos) != 2:
-            print(f"位置信息格式错误: {value_pos}")
-            continue
+        # 有表格模型时优先按单元格ID定位
+        id_cell = table_model.cell_by_id(match.get('valueId')) if table_model is not None else None
+        if id_cell is not None:
+            value_pos = id_cell.id
+            row_index, col_index = id_cell.row, id_cell.col
+        else:
+            if 'valuePos' not in match:
+                print(f"跳过没有位置信息的匹配项: {match}")
+                continue
+            
+            value_pos = match['valuePos']
+            row_index, col_index = parse_position(value_pos)
+            if row_index is None:
+                print(f"位置信息格式错误: {value_pos}")
+                continue
         
-        row_index, col_index = value_pos
         new_key = match.get('new_key', match.get('old_key', 'UNKNOWN'))
         
         try:
-            # 获取所有行
-            rows = table.find_all('tr')
+            if table_model is not None:
+                # 网格坐标 -> (源行号, 行内单元格序号)
+                cell = table_model.cell_at(row_index, col_index)
+                if cell is None:
+                    print(f"位置 {value_pos} 超出表格范围（{table_model.n_rows}行 x {table_model.n_cols}列）")
+                    continue
+                row_index, col_index = cell.row, cell.row_pos
+            
             if row_index >= len(rows):
                 print(f"行索引 {row_index} 超出范围（共 {len(rows)} 行）")
                 continue
@@ -181,7 +212,7 @@ def extract_table_number_from_filename(filename):
         return int(match.group(1))
     return None
 
-def replace_tables_in_html(html_file_path, match_results_dir, match_files, output_html_path=None):
+def replace_tables_in_html(html_file_path, match_results_dir, match_files, output_html_path=None, extract_dir=None):
     """
     在HTML文件中替换表格内容
     
@@ -190,6 +221,7 @@ def replace_tables_in_html(html_file_path, match_results_dir, match_files, outpu
         match_results_dir: 匹配结果目录路径
         match_files: 表格匹配结果文件列表
         output_html_path: 输出HTML文件路径，如果为None则覆盖原文件
+        extract_dir: 提取结果目录（可选），用于加载表格模型定位单元格
         
     返回:
         bool: 是否成功
@@ -231,7 +263,8 @@ def replace_tables_in_html(html_file_path, match_results_dir, match_files, outpu
                 print(f"处理表格 {table_id}，共有 {len(match_data)} 个匹配项")
                 
                 # 根据位置信息替换单元格内容
-                replace_cells_by_position_html(target_html_table, match_data)
+                table_model = load_table_by_number(extract_dir, table_number) if extract_dir else None
+                replace_cells_by_position_html(target_html_table, match_data, table_model)
                 
             except Exception as e:
                 print(f"处理匹配文件 {match_file} 时出错: {e}")
@@ -249,18 +282,29 @@ def replace_tables_in_html(html_file_path, match_results_dir, match_files, outpu
         print(f"HTML表格替换失败: {e}")
         return False
 
-def convert_html_to_word(html_file_path, word_file_path):
+def convert_html_to_word(html_file_path, word_file_path, backend=None):
     """
     将HTML文件转换为Word文档
     
     参数:
         html_file_path: HTML文件路径
         word_file_path: 输出Word文件路径
+        backend: 文档转换后端（如OfficePool），默认使用converter中设置的后端
         
     返回:
         bool: 是否成功
     """
     try:
+        # 方法0：使用常驻的转换后端（如headless LibreOffice转换池）
+        backend = backend or get_conversion_backend()
+        if backend is not None:
+            try:
+                result = backend.html_to_word(html_file_path, word_file_path)
+                print(f"使用转换后端成功转换: {word_file_path}（耗时 {result.latency:.2f} 秒）")
+                return True
+            except Exception as e:
+                print(f"使用转换后端转换失败: {e}")
+        
         # 方法1：尝试使用win32com转换
         try:
             import win32com.client
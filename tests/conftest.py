@@ -0,0 +1,7 @@
+import os
+import sys
+
+# 与main.py一致，以src为根目录导入各模块
+src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if src_dir not in sys.path:
+    sys.path.insert(0, src_dir)
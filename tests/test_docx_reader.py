@@ -0,0 +1,67 @@
+"""docx_reader 纵向合并单元格的行列解析"""
+
+import zipfile
+
+from extractors.docx_reader import read_docx
+from extractors.html_reader import _read_with_lxml
+from extractors.table_model import Table
+
+W = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+
+def _cell(text=None, v_merge=None):
+    props = ''
+    if v_merge == 'restart':
+        props = '<w:tcPr><w:vMerge w:val="restart"/></w:tcPr>'
+    elif v_merge == 'continue':
+        props = '<w:tcPr><w:vMerge/></w:tcPr>'
+    run = f'<w:r><w:t>{text}</w:t></w:r>' if text else ''
+    return f'<w:tc>{props}<w:p>{run}</w:p></w:tc>'
+
+
+def _write_docx(path, rows):
+    body = ''.join(f'<w:tr>{"".join(row)}</w:tr>' for row in rows)
+    document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<w:document xmlns:w="{W}"><w:body><w:tbl>{body}</w:tbl></w:body></w:document>')
+    with zipfile.ZipFile(path, 'w') as docx:
+        docx.writestr('word/document.xml', document)
+
+
+def test_row_of_only_continuation_cells_is_kept(tmp_path):
+    docx_path = tmp_path / 'merged.docx'
+    _write_docx(docx_path, [
+        [_cell('样品', 'restart'), _cell('结果', 'restart')],
+        [_cell(v_merge='continue'), _cell(v_merge='continue')],
+        [_cell('Sp1'), _cell('正常')],
+    ])
+
+    _, tables = read_docx(str(docx_path))
+    assert len(tables) == 1
+    table = tables[0]
+
+    assert (table.n_rows, table.n_cols) == (3, 2)
+    assert table.cell_by_id('A1').rowspan == 2
+    assert table.cell_by_id('B1').rowspan == 2
+    # 合并行保留后，第三行的单元格不会被上方的rowspan挤到右侧
+    assert table.cell_by_id('A3').text == 'Sp1'
+    assert table.cell_by_id('B3').text == '正常'
+    assert table.cell_at(1, 0).id == 'A1'
+
+
+def test_empty_row_survives_html_round_trip(tmp_path):
+    docx_path = tmp_path / 'merged.docx'
+    _write_docx(docx_path, [
+        [_cell('样品', 'restart'), _cell('结果', 'restart')],
+        [_cell(v_merge='continue'), _cell(v_merge='continue')],
+        [_cell('Sp1'), _cell('正常')],
+    ])
+    _, tables = read_docx(str(docx_path))
+    table = tables[0]
+
+    html_table = Table.from_html(table.to_html())
+    assert html_table.to_dict() == table.to_dict()
+    assert Table.from_dict(table.to_dict()).to_dict() == table.to_dict()
+
+    # HTML读取路径对同样的空<tr>给出相同的网格
+    _, html_tables = _read_with_lxml(f'<html><body>{table.to_html()}</body></html>', with_models=True)
+    assert html_tables[0][1].to_dict() == table.to_dict()
@@ -0,0 +1,47 @@
+"""table_grouping 重复表格分组"""
+
+from extractors.table_model import Table
+from matchers.table_grouping import group_tables, structural_fingerprint, project_results
+
+
+def _table(rows):
+    return Table.from_rows([[(text, 1, 1, 'td') for text in row] for row in rows])
+
+
+def _point_table(point, status, temperature, status_label='状态'):
+    return _table([
+        ['测点', point],
+        [status_label, status],
+        ['温度(℃)', temperature],
+    ])
+
+
+def test_tables_differing_only_in_text_values_are_grouped():
+    tables = [
+        ('table_1.html', _point_table('Sp1', '正常', '23.5')),
+        ('table_2.html', _point_table('Sp2', '异常', '24.1')),
+        ('table_3.html', _point_table('Sp3', '正常', '')),
+    ]
+    assert structural_fingerprint(tables[0][1]) is not None
+    assert group_tables(tables) == [['table_1.html', 'table_2.html', 'table_3.html']]
+
+
+def test_different_key_text_is_not_grouped():
+    tables = [
+        ('table_1.html', _point_table('Sp1', '正常', '23.5')),
+        ('table_2.html', _point_table('Sp2', '正常', '23.5', status_label='结论')),
+    ]
+    assert group_tables(tables) == [['table_1.html'], ['table_2.html']]
+
+
+def test_header_layout_data_rows_are_values():
+    first = _table([['测点', '温度', '湿度'], ['Sp1', '23.5', '45%']])
+    second = _table([['测点', '温度', '湿度'], ['Bx2', '24.0', '50%']])
+    assert structural_fingerprint(first) == structural_fingerprint(second)
+
+
+def test_project_results_takes_text_values_from_target():
+    results = [{"old_key": "状态", "value": "正常", "new_key": "运行状态", "valuePos": "(1, 1)", "valueId": "B2"}]
+    projected = project_results(results, _point_table('Sp2', '异常', '24.1'))
+    assert projected == [{"old_key": "状态", "value": "异常", "new_key": "运行状态",
+                          "valuePos": "(1, 1)", "valueId": "B2"}]